@@ -1,34 +1,101 @@
+import itertools
+
 from Tabla_Simbolos.symbol_table import SymbolTable
 from Tabla_Simbolos.symbol_entry import SymbolEntry
 
+def _correspondiente(tabla, vista):
+    # Tabla de `tabla` (una global) con el ámbito de `vista`
+    return tabla if vista.padre is None else tabla._tabla_local(vista.nombre_ambito)
+
+
 class GestorTablas:
     
 
-    def __init__(self):
-        self.tabla_global = SymbolTable("global")
-        self.locales = {}
+    def __init__(self, contexto=None, tabla=None):
+        # Numeración independiente de la tabla del léxico, que puede estar
+        # rellenándose a la vez cuando el parser consume tokens en streaming
+        self.contador = contexto.contador_semantico if contexto is not None else itertools.count()
+        self.tabla_global = SymbolTable("global", self.contador)
+        # Las locales cuelgan de la global, que lleva los ámbitos abiertos
+        self.locales = self.tabla_global.locales
+        # Con `tabla` (la global del léxico, ya completa) cada registro toma
+        # y completa su entrada en ella en lugar de crear otra: las tablas de
+        # aquí sólo dicen qué se ha declarado ya en cada ámbito
+        self.tabla = tabla
 
     # -------- Registro de variables o funciones --------
     def registrar_variable_global(self, lexema, tipo="id"):
-        self.tabla_global.add_if_absent(lexema, 0, tipo, categoria="Variable")
+        return self._declarar(self.tabla_global, lexema, tipo, "Variable")
 
     def registrar_funcion(self, nombre_funcion, tipo="void"):
        
-        self.tabla_global.add_if_absent(nombre_funcion, 0, tipo, categoria="Función")
-        if nombre_funcion not in self.locales:
-            self.locales[nombre_funcion] = SymbolTable(nombre_funcion)
+        entrada = self._declarar(self.tabla_global, nombre_funcion, tipo, "Función")
+        self.tabla_global._tabla_local(nombre_funcion)
+        return entrada
 
     def registrar_variable_local(self, nombre_funcion, lexema, tipo="id"):
-        if nombre_funcion not in self.locales:
-            self.locales[nombre_funcion] = SymbolTable(nombre_funcion)
-        self.locales[nombre_funcion].add_if_absent(lexema, 0, tipo, categoria="Variable")
+        return self._declarar(self.tabla_global._tabla_local(nombre_funcion), lexema, tipo, "Variable")
+
+    def _declarar(self, vista, lexema, tipo, categoria):
+        if self.tabla is not None and lexema not in vista.simbolos:
+            vista.insertar(_correspondiente(self.tabla, vista).declarar(lexema, tipo, categoria))
+        return vista.add_if_absent(lexema, 0, tipo, categoria=categoria)
+
+    def integrar(self, tabla):
+        """Lleva a `tabla` (la global del léxico) lo registrado, en el orden
+        en que se registró, como si se hubiera creado con GestorTablas(ctx,
+        tabla). Para cuando el parser empezó antes de que acabara el léxico
+        (streaming)."""
+        entradas = [(vista, e) for vista in (self.tabla_global, *self.locales.values())
+                    for e in vista.simbolos.values()]
+        entradas.sort(key=lambda ve: ve[1].index)
+        for vista, e in entradas:
+            vista.simbolos[e.lexema] = _correspondiente(tabla, vista).declarar(e.lexema, e.tipo, e.categoria)
+        self.tabla = tabla
+
+    # -------- Ámbitos (los de la tabla global) --------
+    @property
+    def nivel(self):
+        # 0 en el ámbito global
+        return self.tabla_global.nivel_actual
+
+    @property
+    def ambito_actual(self):
+        return self.tabla_global.ambito_actual
+
+    def abrir_funcion(self, nombre_funcion):
+        return self.tabla_global.abrir_funcion(nombre_funcion)
+
+    def abrir_bloque(self):
+        return self.tabla_global.abrir_bloque()
+
+    def cerrar_ambito(self):
+        return self.tabla_global.cerrar_ambito()
+
+    # Declaración visible desde el ámbito actual
+    def resolver(self, lexema):
+        return self.tabla_global.resolver(lexema)
+
+    # Declaración del propio ámbito actual (para las repetidas)
+    def en_ambito_actual(self, lexema):
+        return self.tabla_global.en_ambito_actual(lexema)
+
+    # Un identificador sin declarar es una variable global int (declaración implícita)
+    def resolver_o_declarar(self, lexema):
+        return self.resolver(lexema) or self.registrar_variable_global(lexema, "int")
+
+    # -------- Búsqueda --------
+    def buscar_global(self, lexema):
+        return self.tabla_global.buscar(lexema)
+
+    def buscar_local(self, nombre_funcion, lexema):
+        tabla = self.locales.get(nombre_funcion)
+        return tabla.buscar(lexema) if tabla else None
 
     # -------- Salida --------
     def __str__(self):
-        salida = [str(self.tabla_global)]
-        for tabla in self.locales.values():
-            salida.append(str(tabla))
-        return "\n\n".join(salida)
+        # La global ya escribe detrás sus locales
+        return str(self.tabla_global)
 
     def dump(self):
         return str(self)
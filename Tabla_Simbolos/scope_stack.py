@@ -0,0 +1,76 @@
+class ScopeStack:
+    """Ámbitos anidados abiertos y la declaración visible de cada lexema.
+
+    `_visibles` guarda sólo la cima de la pila de declaraciones de cada
+    lexema, así que resolver un identificador es un único acceso a un
+    diccionario sea cual sea el anidamiento; el resto de la pila está
+    repartido entre los ámbitos abiertos, cada uno con un diccionario de las
+    declaraciones que ocultó, que se restauran al cerrarlo. El nivel 0 es el
+    global y está siempre abierto. Cada nivel lleva asociado su ámbito (p.ej.
+    su tabla).
+    """
+
+    __slots__ = ("_visibles", "_niveles", "_ocultas", "_ambitos")
+
+    def __init__(self, ambito=None):
+        # lexema -> entrada visible y nivel en que está declarada
+        self._visibles = {}
+        self._niveles = {}
+        # Por nivel: lexema -> (entrada que ocultó o None, su nivel)
+        self._ocultas = [{}]
+        self._ambitos = [ambito]
+
+    @property
+    def nivel(self):
+        return len(self._ambitos) - 1
+
+    @property
+    def actual(self):
+        return self._ambitos[-1]
+
+    def abrir(self, ambito=None):
+        self._ambitos.append(ambito)
+        self._ocultas.append({})
+
+    def cerrar(self):
+        # Devuelve los lexemas cuya declaración deja de verse
+        self._ambitos.pop()
+        visibles, niveles = self._visibles, self._niveles
+        lexemas = []
+        for lexema, (anterior, nivel) in reversed(self._ocultas.pop().items()):
+            if anterior is None:
+                del visibles[lexema], niveles[lexema]
+            else:
+                visibles[lexema], niveles[lexema] = anterior, nivel
+            lexemas.append(lexema)
+        return lexemas
+
+    def declarar(self, lexema, entrada, nivel=None):
+        # Sin nivel, en el ámbito más interno
+        tope = len(self._ambitos) - 1
+        if nivel is None or nivel >= tope:
+            nivel = tope
+        else:
+            # En un ámbito exterior (p.ej. un global implícito desde una
+            # función): si algún ámbito interior declara ya el lexema, la
+            # nueva queda debajo y se verá al cerrarlo. Se baja por la pila
+            # de declaraciones del lexema, no por los niveles abiertos.
+            n = self._niveles.get(lexema)
+            if n is not None and n > nivel:
+                ocultas = self._ocultas[n]
+                anterior, m = ocultas[lexema]
+                while m is not None and m > nivel:
+                    ocultas = self._ocultas[m]
+                    anterior, m = ocultas[lexema]
+                if m is None or m < nivel:
+                    ocultas[lexema] = (entrada, nivel)
+                    if nivel:
+                        self._ocultas[nivel].setdefault(lexema, (anterior, m))
+                return
+        if nivel:
+            self._ocultas[nivel].setdefault(lexema, (self._visibles.get(lexema), self._niveles.get(lexema)))
+        self._visibles[lexema] = entrada
+        self._niveles[lexema] = nivel
+
+    def buscar(self, lexema):
+        return self._visibles.get(lexema)
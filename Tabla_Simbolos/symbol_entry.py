@@ -1,15 +1,12 @@
 class SymbolEntry:
-    _contador_indices = 0
+    # Hay una por identificador declarado: sin __dict__ por instancia
+    __slots__ = ("index", "categoria", "lexema", "tipo", "desplazamiento",
+                 "num_params", "tipos_params")
 
-    @classmethod
-    def reset_contador(cls):
-        
-        cls._contador_indices = 0
-    # ------------------------------------------------------------------------
-
-    def __init__(self, categoria, lexema, tipo="-", desplazamiento=None, valor=None, num_params=0, tipos_params=None):
-        self.index = SymbolEntry._contador_indices
-        SymbolEntry._contador_indices += 1
+    # El índice lo da la tabla que crea la entrada, con la numeración de su
+    # compilación (ver CompilationContext)
+    def __init__(self, categoria, lexema, tipo="-", desplazamiento=None, valor=None, num_params=0, tipos_params=None, index=None):
+        self.index = index
         # --------------------------------------------------
 
         self.categoria = categoria
@@ -17,7 +14,8 @@ class SymbolEntry:
         self.tipo = tipo
         self.desplazamiento = desplazamiento
         self.num_params = num_params
-        self.tipos_params = tipos_params or []
+        # Las variables comparten la misma tupla vacía
+        self.tipos_params = tipos_params or ()
 
     @property
     def name(self):
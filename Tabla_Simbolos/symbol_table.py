@@ -1,4 +1,7 @@
+import itertools
+
 from Tabla_Simbolos.symbol_entry import SymbolEntry
+from Tabla_Simbolos.scope_stack import ScopeStack
 
 TYPE_SIZE = {
     "int": 2,
@@ -11,11 +14,33 @@ TYPE_SIZE = {
 }
 
 class SymbolTable:
-    def __init__(self, nombre_ambito="global"):
+    # Una por función (y la global) en el léxico y otra en el parser
+    __slots__ = ("nombre_ambito", "simbolos", "inicio", "desplazamiento_actual", "locales",
+                 "contador", "padre", "ambitos", "nivel", "bloques")
+
+    def __init__(self, nombre_ambito="global", contador=None, contexto=None, padre=None):
         self.nombre_ambito = nombre_ambito
         self.simbolos = {}
+        # Primer desplazamiento del ámbito (el de un bloque sigue al de fuera)
+        self.inicio = 0
         self.desplazamiento_actual = 0
         self.locales = {}  
+        # Las locales (de función o de bloque) cuelgan de la global, que lleva
+        # la pila de ámbitos abiertos; `nivel` es el de la tabla mientras
+        # está abierta (None si no lo está) y `bloques` cuenta los bloques
+        # abiertos dentro de ella, para nombrarlos
+        self.padre = padre
+        self.ambitos = ScopeStack(self) if padre is None else None
+        self.nivel = 0 if padre is None else None
+        self.bloques = 0
+        # Iterador de índices: el dado, el del léxico de la compilación
+        # (CompilationContext) o uno propio que empieza en 0
+        if contador is None:
+            contador = contexto.contador if contexto is not None else itertools.count()
+        self.contador = contador
+
+    def _next_index(self):
+        return next(self.contador)
 
     
     def _alloc_offset(self, tipo: str) -> int:
@@ -24,6 +49,15 @@ class SymbolTable:
         self.desplazamiento_actual += sz
         return off
 
+    def _compactar(self):
+        # Desplazamientos de nuevo en orden de declaración, sin huecos
+        off = self.inicio
+        for ent in self.simbolos.values():
+            if ent.desplazamiento is not None:
+                ent.desplazamiento = off
+                off += TYPE_SIZE.get(ent.tipo, 2)
+        self.desplazamiento_actual = off
+
     # ---------- global / local ----------
     def insertar(self, simbolo: SymbolEntry):
         if simbolo.lexema in self.simbolos:
@@ -31,6 +65,8 @@ class SymbolTable:
         if simbolo.desplazamiento is None and TYPE_SIZE.get(simbolo.tipo, 0) > 0 and simbolo.categoria != "Función":
             simbolo.desplazamiento = self._alloc_offset(simbolo.tipo)
         self.simbolos[simbolo.lexema] = simbolo
+        if self.nivel is not None:
+            self._ligar(simbolo.lexema, simbolo)
 
     def buscar(self, lexema: str):
         return self.simbolos.get(lexema)
@@ -39,16 +75,52 @@ class SymbolTable:
         ent = self.simbolos.get(lexema)
         if ent is None:
             if categoria == "Función":
-                ent = SymbolEntry("Función", lexema, tipo or "void", desplazamiento=None)
+                ent = SymbolEntry("Función", lexema, tipo or "void", desplazamiento=None, index=self._next_index())
             else:
                 t = tipo if tipo != "id" else "int"
                 off = desplazamiento
                 if off is None and TYPE_SIZE.get(t, 0) > 0:
                     off = self._alloc_offset(t)
-                ent = SymbolEntry("Variable", lexema, t, off)
+                ent = SymbolEntry("Variable", lexema, t, off, index=self._next_index())
             self.simbolos[lexema] = ent
+            if self.nivel is not None:
+                self._ligar(lexema, ent)
+        return ent
+
+    def _ligar(self, lexema, ent):
+        # Entrada nueva de un ámbito abierto: se ve desde ya
+        raiz = self.padre or self
+        raiz.ambitos.declarar(lexema, ent, self.nivel)
+
+    def declarar(self, lexema, tipo="id", categoria="Variable"):
+        # Como add_if_absent, pero si la entrada ya existía toma la categoría
+        # y el tipo dados (así completa el parser la tabla del léxico)
+        ent = self.simbolos.get(lexema)
+        if ent is None:
+            return self.add_if_absent(lexema, 0, tipo, categoria=categoria)
+        if categoria == "Función":
+            hueco = ent.desplazamiento is not None
+            ent.categoria, ent.tipo, ent.desplazamiento = "Función", tipo or "void", None
+            if hueco:
+                self._compactar()
+            return ent
+        t = tipo if tipo != "id" else "int"
+        if ent.categoria != "Variable" or ent.desplazamiento is None:
+            # Sin hueco: uno nuevo al final del ámbito
+            ent.desplazamiento = self._alloc_offset(t) if TYPE_SIZE.get(t, 0) > 0 else None
+        elif TYPE_SIZE.get(t, 2) != TYPE_SIZE.get(ent.tipo, 2):
+            # De otro tamaño: se recoloca todo el ámbito para no dejar el hueco
+            ent.tipo = t
+            self._compactar()
+        ent.categoria, ent.tipo = "Variable", t
         return ent
 
+    def resolver_o_declarar(self, lexema):
+        # Un identificador sin declarar es una variable global int
+        # (declaración implícita), también desde dentro de una función: la
+        # misma regla que GestorTablas.resolver_o_declarar en el parser
+        return self.ambitos.buscar(lexema) or self.add_if_absent(lexema, 0)
+
     def update_type(self, lexema, tipo):
         ent = self.simbolos.get(lexema)
         if not ent:
@@ -67,13 +139,66 @@ class SymbolTable:
         entry = self.add_if_absent(nombre_funcion, 0, tipo_retorno, categoria="Función")
         entry.num_params = len(tipos_params)
         entry.tipos_params = tipos_params
-        if nombre_funcion not in self.locales:
-            self.locales[nombre_funcion] = SymbolTable(nombre_funcion)
+        self._tabla_local(nombre_funcion)
 
     def add_local(self, nombre_funcion, lexema, tipo="id"):
-        if nombre_funcion not in self.locales:
-            self.locales[nombre_funcion] = SymbolTable(nombre_funcion)
-        self.locales[nombre_funcion].add_if_absent(lexema, 0, tipo, categoria="Variable")
+        return self._tabla_local(nombre_funcion).add_if_absent(lexema, 0, tipo, categoria="Variable")
+
+    def _tabla_local(self, nombre):
+        # Tabla local con ese nombre. Un bloque abierto se añade a las
+        # locales con su primera declaración.
+        tabla = self.locales.get(nombre)
+        if tabla is None:
+            actual = self.ambitos.actual
+            if actual is self or actual.nombre_ambito != nombre:
+                actual = SymbolTable(nombre, self.contador, padre=self)
+            tabla = self.locales[nombre] = actual
+        return tabla
+
+    # ---------- ámbitos abiertos (en la tabla global) ----------
+    # Resolver un identificador es un acceso a la pila de ámbitos
+    # (ScopeStack), sea cual sea el anidamiento
+    @property
+    def nivel_actual(self):
+        return self.ambitos.nivel
+
+    @property
+    def ambito_actual(self):
+        # Nombre del ámbito más interno
+        return self.ambitos.actual.nombre_ambito
+
+    def abrir_funcion(self, nombre_funcion):
+        # Devuelve los lexemas que ya tenía (una función repetida), que
+        # pasan a ocultar a los de fuera
+        return self._abrir(self._tabla_local(nombre_funcion))
+
+    def abrir_bloque(self):
+        # Bloque { } con ámbito propio dentro del actual: sus variables
+        # siguen a las de éste en el espacio de desplazamientos
+        actual = self.ambitos.actual
+        actual.bloques += 1
+        tabla = SymbolTable(f"{actual.nombre_ambito}.{actual.bloques}", self.contador, padre=self)
+        tabla.inicio = tabla.desplazamiento_actual = actual.desplazamiento_actual
+        return self._abrir(tabla)
+
+    def _abrir(self, tabla):
+        ambitos = self.ambitos
+        ambitos.abrir(tabla)
+        tabla.nivel = ambitos.nivel
+        for lexema, ent in tabla.simbolos.items():
+            ambitos.declarar(lexema, ent)
+        return list(tabla.simbolos)
+
+    def cerrar_ambito(self):
+        # Devuelve los lexemas que dejan de verse
+        self.ambitos.actual.nivel = None
+        return self.ambitos.cerrar()
+
+    def resolver(self, lexema):
+        return self.ambitos.buscar(lexema)
+
+    def en_ambito_actual(self, lexema):
+        return self.ambitos.actual.simbolos.get(lexema)
 
     # ---------- salida ----------
     def __str__(self):
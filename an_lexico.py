@@ -1,6 +1,20 @@
+import mmap
+import re
+import string
+from array import array
+
+try:
+    import numpy as np
+except ImportError:     # opcional: sólo lo necesita el motor "numpy"
+    np = None
+
 from tokens import Token
 from token_types import TokenType
 from errors import LexError
+from token_buffer import TokenBuffer, TIPOS_POR_CODIGO
+from line_index import LineIndex
+from ascii_source import AsciiSource
+from compilation_context import CompilationContext
 
 KEYWORDS = {
     "let": TokenType.LET,
@@ -21,28 +35,536 @@ KEYWORDS = {
     "false": TokenType.FALSE,
 }
 
+SINGLE_OPS = {
+    "+": TokenType.PLUS,
+    "<": TokenType.LT,
+    "!": TokenType.NOT,
+    "=": TokenType.ASSIGN,
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    ";": TokenType.SEMICOLON,
+    ",": TokenType.COMMA,
+}
+
+MAX_INT = 32767
+MAX_REAL = 117549436.0
+MAX_STRING = 64
+
+# Motores de escaneo disponibles para Lexer.tokenize
+ENGINES = ("char", "regex", "bytes", "numpy")
+HAY_NUMPY = np is not None
+
+# Tamaño de lectura por defecto cuando la fuente es un fichero
+CHUNK_SIZE = 1 << 16
+
+# Modos de registro de declaraciones (let / function) en la tabla:
+#  - "rescan": _propagate_* explora la fuente por delante y rebobina.
+#  - "single-pass": se anota la declaración pendiente y se completa con los
+#    tokens que van llegando, sin volver a leer caracteres.
+BINDINGS = ("rescan", "single-pass")
+
+# Clases de blanco vistas entre dos tokens (máscara en Lexer._gap)
+GAP_BLANK = 1      # espacios / tabuladores
+GAP_NEWLINE = 2    # \r o \n
+GAP_COMMENT = 4    # comentario //
+
+_WORD_TYPES = frozenset(KEYWORDS.values()) | {TokenType.ID}
+# Palabras que no pueden añadirse directamente a la lista de tokens
+_BOUND_WORDS = frozenset({TokenType.ID, TokenType.LET, TokenType.FUNCTION})
+# Tratamiento de cada TokenType.value en Lexer.tokenize_chunks:
+# directo a la lista, con lexema en el pool, error, o siempre por _emit
+_DIRECTO, _EN_POOL, _ERRONEO, _REGISTRADO = range(4)
+_CATEGORIA_DE = {
+    TokenType.ID: _EN_POOL,
+    TokenType.INT_CONST: _EN_POOL,
+    TokenType.FLOAT_CONST: _EN_POOL,
+    TokenType.STRING_CONST: _EN_POOL,
+    TokenType.ERROR: _ERRONEO,
+    TokenType.LET: _REGISTRADO,
+    TokenType.FUNCTION: _REGISTRADO,
+    TokenType.LBRACE: _REGISTRADO,
+    TokenType.RBRACE: _REGISTRADO,
+}
+_CATEGORIAS = [_CATEGORIA_DE.get(TIPOS_POR_CODIGO.get(v), _DIRECTO)
+               for v in range(max(TIPOS_POR_CODIGO) + 1)]
+# kinds.tobytes().translate(_MARCAS): 1 en los tokens que no se copian tal cual
+_MARCAS = bytes(int(c != _DIRECTO) for c in _CATEGORIAS) + bytes(256 - len(_CATEGORIAS))
+
+# Expresión maestra del motor "regex". Sólo reconoce la parte ASCII del
+# lenguaje; cualquier carácter no ASCII cae en OTHER y se delega al motor
+# carácter a carácter para conservar exactamente su semántica Unicode.
+_MASTER = re.compile(r"""
+    [ \t\r]*
+    (?:
+    (?P<NL>\n[ \t\r\n]*)
+  | (?P<COMMENT>//[^\n]*)
+  | (?P<WORD>[A-Za-z_]\w*)
+  | (?P<NUM>[0-9]+(?P<FRAC>\.[0-9]*)?)
+  | (?P<STR>'[^'\n]*'?)
+  | (?P<OR>\|=)
+  | (?P<PUNCT>[+<!=(),;{}])
+  | (?P<OTHER>.)
+  | (?P<END>\Z)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+
+# Motor "bytes": clase de cada byte en una tabla de 256 entradas. Sólo se usa
+# con fuentes ASCII; en otro caso se recurre al motor carácter a carácter.
+_C_OTRO, _C_LETRA, _C_DIGITO, _C_BLANCO, _C_NL, _C_COMILLA, _C_BARRA, _C_OP = range(8)
+
+
+def _tabla(*grupos):
+    tabla = bytearray(256)
+    for clase, caracteres in grupos:
+        for c in caracteres:
+            tabla[ord(c)] = clase
+    return bytes(tabla)
+
+
+_CLASES = _tabla((_C_LETRA, string.ascii_letters + "_"), (_C_DIGITO, string.digits),
+                 (_C_BLANCO, " \t\r"), (_C_NL, "\n"), (_C_COMILLA, "'"), (_C_BARRA, "/"),
+                 (_C_OP, "".join(SINGLE_OPS)))
+_ES_ID = _tabla((1, string.ascii_letters + string.digits + "_"))
+_ES_DIGITO = _tabla((1, string.digits))
+_NO_ASCII = re.compile(rb"[\x80-\xff]")
+
+# Motor "numpy": los límites de los lexemas se calculan sobre toda la fuente
+# con operaciones vectoriales; luego se recorren en orden para registrarlos.
+_S_WORD, _S_MIXTO, _S_SUELTO, _S_OR, _S_STR, _S_COMMENT = range(1, 7)
+# Cadenas y comentarios: los únicos lexemas que admiten cualquier carácter
+_OPACOS = re.compile(rb"(')[^'\n]*'?|//[^\n]*")
+# Tramos de palabra que empiezan por dígito o contienen puntos
+_PIEZA = re.compile(r"(?P<NUM>[0-9]+(?P<FRAC>\.[0-9]*)?)|(?P<WORD>[A-Za-z_][A-Za-z0-9_]*)|(?P<PUNTO>\.)")
+if np is not None:
+    # 0 blanco, 1 letra / dígito / "_" / ".", 2 cualquier otro carácter
+    _CLASES_NP = np.frombuffer(_tabla((1, string.ascii_letters + string.digits + "_."),
+                                      (2, "".join(chr(i) for i in range(256) if chr(i) not in
+                                                  string.ascii_letters + string.digits + "_. \t\r\n"))),
+                               dtype=np.uint8)
+    _ES_LETRA_NP = np.frombuffer(_tabla((1, string.ascii_letters + "_")), dtype=np.bool_)
+
+
+def _segmentos(data):
+    # Inicio, fin y clase (_S_*) de cada tramo de la fuente, en orden
+    n = len(data)
+    if n == 0:
+        return [], [], []
+    cod = np.frombuffer(data, dtype=np.uint8)
+    clase = _CLASES_NP[cod]
+    tipo = np.zeros(n, dtype=np.int8)
+    fin = np.zeros(n, dtype=np.int64)
+
+    # Cadenas y comentarios con la expresión; lo que cubren queda fuera
+    opacos = [(m.start(), m.end(), _S_STR if m.group(1) else _S_COMMENT) for m in _OPACOS.finditer(data)]
+    if opacos:
+        o_ini, o_fin, o_tipo = (np.array(c) for c in zip(*opacos))
+        marca = np.zeros(n + 1, dtype=np.int8)
+        marca[o_ini] += 1
+        marca[o_fin] -= 1
+        libre = np.cumsum(marca[:n]) == 0
+        clase = np.where(libre, clase, 0)
+        tipo[o_ini] = o_tipo
+        fin[o_ini] = o_fin
+
+    # Tramos de palabra: [A-Za-z0-9_.]+
+    palabra = clase == 1
+    ini_p = palabra.copy()
+    ini_p[1:] &= ~palabra[:-1]
+    fin_p = palabra.copy()
+    fin_p[:-1] &= ~palabra[1:]
+    p_ini = np.flatnonzero(ini_p)
+    p_fin = np.flatnonzero(fin_p) + 1
+    puntos = np.concatenate(([0], np.cumsum(cod == 46)))
+    sencillo = _ES_LETRA_NP[cod[p_ini]] & (puntos[p_fin] == puntos[p_ini])
+    tipo[p_ini] = np.where(sencillo, _S_WORD, _S_MIXTO)
+    fin[p_ini] = p_fin
+
+    # Caracteres sueltos; "|=" ocupa dos
+    suelto = clase == 2
+    o = np.flatnonzero(suelto[:-1] & (cod[:-1] == 124) & (cod[1:] == 61))
+    suelto[o + 1] = False
+    s_ini = np.flatnonzero(suelto)
+    tipo[s_ini] = _S_SUELTO
+    fin[s_ini] = s_ini + 1
+    tipo[o] = _S_OR
+    fin[o] = o + 2
+
+    inicios = np.flatnonzero(tipo)
+    return inicios.tolist(), fin[inicios].tolist(), tipo[inicios].tolist()
+
+
+def _alpha_prefix(lexeme):
+    if lexeme.isalpha():
+        return len(lexeme)
+    i = 0
+    while lexeme[i].isalpha():
+        i += 1
+    return i
+
+
+class _PendingDeclaration:
+    """Declaración let/function a medio reconocer en modo single-pass."""
+
+    # Etapas: qué espera la exploración de _propagate_* a continuación
+    DONE = "done"
+    TIPO, ID, ID_CONT = "tipo", "id", "id_cont"                   # let
+    RET, NOMBRE, LPAREN, PARAM, PARAM_ID, SEP = (                 # function
+        "ret", "nombre", "lparen", "param", "param_id", "sep")
+
+    def __init__(self, kind, line):
+        self.kind = kind
+        self.stage = self.TIPO if kind == TokenType.LET else self.RET
+        self.line = line
+        self.tipo = ""
+        self.ident = ""
+        self.nombre = ""
+        self.params = []
+        self.ptype = ""
+        self.fin = 0
+        # (token, blanco previo, fin) retenidos hasta resolver la declaración
+        self.buffer = []
+
+
+def _hueco(texto):
+    # Clases de blanco (GAP_*) del texto entre dos tokens: blancos y comentarios
+    gap = 0
+    while texto:
+        i = texto.find("//")
+        blancos = texto if i < 0 else texto[:i]
+        if "\n" in blancos or "\r" in blancos:
+            gap |= GAP_NEWLINE
+        if " " in blancos or "\t" in blancos:
+            gap |= GAP_BLANK
+        if i < 0:
+            break
+        gap |= GAP_COMMENT
+        j = texto.find("\n", i)
+        if j < 0:
+            break
+        texto = texto[j:]
+    return gap
+
+
+def _valor_real(lexeme):
+    # Misma acumulación que Lexer._number, para que el chequeo de rango
+    # coincida bit a bit en el límite.
+    entera, _, decimales = lexeme.partition(".")
+    valor = int(entera)
+    div = 10.0
+    for c in decimales:
+        valor = valor + (int(c) / div)
+        div = div * 10.0
+    return valor
+
 class Lexer:
-    def __init__(self, source: str, symbols):
-        self.source = source
-        self.symbols = symbols
+    def __init__(self, source, symbols=None, engine="char", chunk_size=CHUNK_SIZE, binding="rescan",
+                 recovery=False, max_errors=None, pool=None, contexto=None, bloques=False):
+        if engine not in ENGINES:
+            raise ValueError(f"Motor léxico desconocido: '{engine}'")
+        if engine == "numpy" and np is None:
+            raise ValueError("El motor 'numpy' necesita numpy instalado")
+        if binding not in BINDINGS:
+            raise ValueError(f"Modo de registro desconocido: '{binding}'")
+        if max_errors is not None and max_errors < 1:
+            raise ValueError(f"max_errors debe ser al menos 1: {max_errors}")
+
+        # La fuente puede ser un str, bytes UTF-8 (p.ej. un fichero proyectado
+        # con mmap) o un fichero de texto abierto; en este último caso
+        # self.source es sólo una ventana de líneas completas.
+        # self._data es la misma fuente como bytes ASCII para los motores
+        # "bytes" y "numpy"
+        self._data = None
+        if isinstance(source, str):
+            self.source = source
+            self._stream = None
+            if engine in ("bytes", "numpy") and source.isascii():
+                self._data = source.encode("ascii")
+        elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            es_ascii = _NO_ASCII.search(source) is None
+            self._stream = None
+            if engine in ("bytes", "numpy") and es_ascii:
+                # Con ASCII cada byte es un carácter: se recorren los bytes
+                # y sólo se decodifica cada lexema (AsciiSource), sin copiar
+                # la fuente en un str
+                self._data = source
+                self.source = AsciiSource(source)
+            else:
+                self.source = str(source, "ascii" if es_ascii else "utf-8")
+        else:
+            self.source = ""
+            self._stream = source
+        self._carry = ""
+        self.chunk_size = chunk_size
+        # Tabla de símbolos, pool de identificadores y literales y lista de
+        # errores son los de la compilación; sin contexto se crea uno con
+        # `symbols` y `pool` si se dan
+        if contexto is None:
+            contexto = CompilationContext(symbols, pool)
+        self.contexto = contexto
+        self.symbols = contexto.symbols
+        self.pool = contexto.pool
         self.tokens = []
-        self.errors = []
-        self.line = 1
-        self.column = 1
+        self.errors = contexto.lex_errors
         self.pos = 0
+        # Las posiciones se guardan como desplazamientos en la fuente completa
+        # (self._base es el de la ventana actual); línea y columna se sacan
+        # de self.line_index sólo cuando alguien las pide.
+        self._base = 0
+        self.line_index = LineIndex(self.source)
+        self._fin_comentario = -1
         self.current_function = None
         self._awaiting_function_body_of = None
         self._brace_depth = 0
         self._pending_param_names = set()
+        # Con bloques=True cada { } que no es el cuerpo de una función abre
+        # su propio ámbito en la tabla (como Parser(bloques=True));
+        # _bloques_globales cuenta los abiertos fuera de las funciones
+        self.bloques = bloques
+        self._bloques_globales = 0
+        self.engine = engine
+        self.binding = binding
+        self._pend = None
+        self._gap = 0
+        # Fin del último token fusionado (tokenize_chunks)
+        self._previo = 0
+
+        # Sin recuperación el análisis se detiene en el primer error; con
+        # ella sigue adelante (emitiendo tokens ERROR) hasta max_errors.
+        self.recovery = recovery
+        self.max_errors = max_errors
+        self._limite_errores = (max_errors or 0) if recovery else 1
+        self._parar = False
 
 
    
     def tokenize(self):
-        
+        self._scan()
+        while not self._parar and self._refill():
+            self._scan()
+        # Ya no se necesita la proyección: se puede cerrar al volver
+        self._data = None
+        self._finish_pending()
+
+        if not self._parar:
+            self.tokens.append(self._eof())
+
+        return self.tokens, self.errors
+
+    def tokenize_buffer(self):
+        """Como tokenize, pero guarda los tokens en un TokenBuffer por columnas."""
+        # Los lexemas se leen de la fuente: hace falta el texto completo
+        if self._stream is not None:
+            self.source += self._carry + self._stream.read()
+            self._carry = ""
+            self._stream = None
+            self.line_index = LineIndex(self.source)
+        self.tokens = TokenBuffer(self.source, self.line_index, self.pool)
+        return self.tokenize()
+
+    def tokenize_chunks(self, trozos):
+        """Como tokenize, a partir de trozos de la fuente ya lexeados por
+        separado (ver parallel_lex): sólo falta registrar los tokens en orden.
+
+        Cada trozo es (kinds, starts, ends, mensajes, eof), con las
+        posiciones en la fuente completa y un mensaje por cada token ERROR.
+        Con un TokenBuffer los tramos de tokens sin nada que registrar se
+        copian columna a columna, sin crear un Token por cada uno.
+        """
+        eof = len(self.source)
+        columnas = isinstance(self.tokens, TokenBuffer)
+        for kinds, starts, ends, mensajes, fin in trozos:
+            if fin is not None:
+                eof = fin
+            if columnas:
+                self._fusionar_columnas(kinds, starts, ends, iter(mensajes))
+            else:
+                self._fusionar(kinds, starts, ends, iter(mensajes), 0, len(kinds))
+            if self._parar:
+                break
+
+        self.pos = len(self.source)
+        self._data = None
+        self._finish_pending()
+        if not self._parar:
+            # Tras un comentario final el EOF va en la columna 1 (lo da el trozo)
+            self.tokens.append(Token(TokenType.EOF, "", eof, self.line_index))
+        return self.tokens, self.errors
+
+    def _fusionar(self, kinds, starts, ends, errores, i, n):
+        # Tokens i..n-1 de un trozo, uno a uno; para en cuanto no queda
+        # ninguna declaración pendiente si se fusiona por columnas
+        source = self.source
+        line_index = self.line_index
+        append = self.tokens.append
+        categorias = _CATEGORIAS
+        tipos = TIPOS_POR_CODIGO
+        previo = self._previo
+        columnas = isinstance(self.tokens, TokenBuffer)
+        while i < n and not self._parar:
+            kind, start, end = kinds[i], starts[i], ends[i]
+            i += 1
+            if self._pend is not None and start > previo:
+                self._gap |= _hueco(source[previo:start])
+            previo = end
+
+            categoria = categorias[kind]
+            if categoria == _DIRECTO and self._pend is None:
+                append(Token(tipos[kind], source[start:end], start, line_index))
+                continue
+            self.pos = end
+            if categoria == _EN_POOL:
+                # Los rangos de los literales ya se comprobaron en el trozo
+                self._emit(self._pooled(tipos[kind], source[start:end], start))
+            elif categoria == _ERRONEO:
+                self._add_error(next(errores), start, source[start:end])
+            else:
+                self._emit(Token(tipos[kind], source[start:end], start, line_index))
+            if columnas and self._pend is None:
+                break
+        self._previo = previo
+        return i
+
+    def _fusionar_columnas(self, kinds, starts, ends, errores):
+        # Los tramos de tokens _DIRECTO se copian tal cual a las columnas del
+        # TokenBuffer; los literales y los identificadores sólo pasan por el
+        # pool y la tabla. Las declaraciones pendientes y los errores siguen
+        # el camino de _fusionar, con un Token por token.
+        buf = self.tokens
+        source = self.source
+        intern, lexemas = self.pool.intern, self.pool.lexemes
+        tipos = TIPOS_POR_CODIGO
+        categorias = _CATEGORIAS
+        id_code = TokenType.ID.value
+        llaves = (TokenType.LBRACE.value, TokenType.RBRACE.value)
+        k_ext, s_ext, e_ext = buf.kinds.extend, buf.starts.extend, buf.ends.extend
+        sym_ext, lex_ext = buf.symbols.extend, buf.lexeme_ids.extend
+        k_app, s_app, e_app = buf.kinds.append, buf.starts.append, buf.ends.append
+        sym_app, lex_app = buf.symbols.append, buf.lexeme_ids.append
+        marcas = kinds.tobytes().translate(_MARCAS)
+        sin_atributo = array("i", [-1])
+        i, n = 0, len(kinds)
+        while i < n and not self._parar:
+            if self._pend is not None:
+                i = self._fusionar(kinds, starts, ends, errores, i, n)
+                continue
+            j = marcas.find(1, i)
+            if j < 0:
+                j = n
+            if j > i:
+                k_ext(kinds[i:j])
+                s_ext(starts[i:j])
+                e_ext(ends[i:j])
+                relleno = sin_atributo * (j - i)
+                sym_ext(relleno)
+                lex_ext(relleno)
+                i = j
+                if i == n:
+                    break
+            kind = kinds[i]
+            categoria = categorias[kind]
+            if categoria == _EN_POOL:
+                start, end = starts[i], ends[i]
+                idx = intern(source[start:end], tipos[kind])
+                k_app(kind)
+                s_app(start)
+                e_app(end)
+                if kind == id_code:
+                    atributo = self._ligar_id(lexemas[idx], start)
+                    sym_app(int(atributo) if atributo else -1)
+                else:
+                    sym_app(-1)
+                lex_app(idx)
+                i += 1
+            elif kind in llaves:
+                # Sólo abren o cierran ámbitos
+                self._llave(tipos[kind])
+                k_app(kind)
+                s_app(starts[i])
+                e_app(ends[i])
+                sym_app(-1)
+                lex_app(-1)
+                i += 1
+            else:
+                # let, function (pueden abrir una declaración pendiente) y errores
+                i = self._fusionar(kinds, starts, ends, errores, i, i + 1)
+
+    def iter_tokens(self):
+        """Versión perezosa de tokenize: produce los tokens bloque a bloque."""
+        while True:
+            self._scan()
+            yield from self.tokens
+            self.tokens.clear()
+            if self._parar or not self._refill():
+                break
+
+        self._finish_pending()
+        yield from self.tokens
+        self.tokens.clear()
+
+        if not self._parar:
+            yield self._eof()
+
+    def _eof(self):
+        fin = self._base + len(self.source)
+        # Tras un comentario al final del fichero la columna vuelve a 1
+        if self._fin_comentario == fin:
+            fin = self.line_index.line_start(fin)
+        return Token(TokenType.EOF, "", fin, self.line_index)
+
+    def _scan(self):
+        # Consume lo que quede en la ventana actual de la fuente
+        if self.engine == "regex":
+            self._tokenize_regex()
+        elif self._data is None:
+            # También "bytes" y "numpy" con caracteres no ASCII o por bloques
+            self._tokenize_char()
+        elif self.engine == "numpy":
+            self._tokenize_numpy()
+        else:
+            self._tokenize_bytes()
+
+    # ---------------- Lectura por bloques ----------------
+    def _fill(self):
+        # Añade al final de la ventana las siguientes líneas completas del
+        # fichero. Ningún lexema cruza un salto de línea, así que la ventana
+        # siempre termina en un punto de corte seguro.
+        if self._stream is None:
+            return False
+
+        while True:
+            chunk = self._stream.read(self.chunk_size)
+            if not chunk:
+                self._stream = None
+                if self._carry:
+                    self.line_index.extend(self._carry, self._base + len(self.source))
+                    self.source += self._carry
+                    self._carry = ""
+                    return True
+                return False
+
+            texto = self._carry + chunk
+            corte = texto.rfind("\n") + 1
+            if corte:
+                self.line_index.extend(texto[:corte], self._base + len(self.source))
+                self.source += texto[:corte]
+                self._carry = texto[corte:]
+                return True
+            self._carry = texto
+
+    def _refill(self):
+        # Descarta lo ya consumido antes de leer el siguiente bloque
+        self._base += self.pos
+        self.source = self.source[self.pos:]
+        self.pos = 0
+        return self._fill()
+
+    # ---------------- Motor carácter a carácter ----------------
+    def _tokenize_char(self):
         while not self._is_at_end():
             
            
-            if self.errors:
+            if self._parar:
                 break
             
 
@@ -50,18 +572,20 @@ class Lexer:
 
             # --- saltos de línea ---
             if c == "\n":
-                self.line += 1
-                self.column = 1
+                if self._pend is not None:
+                    self._gap |= GAP_NEWLINE
                 continue
 
             # --- espacios y tabulaciones ---
             if c in " \t\r":
-                self.column += 1
+                if self._pend is not None:
+                    self._gap |= GAP_NEWLINE if c == "\r" else GAP_BLANK
                 continue
 
             # --- comentarios ---
             if c == "/" and self._peek() == "/":
                 self._skip_comment()
+                self._gap |= GAP_COMMENT
                 continue
 
             # --- identificadores o palabras clave ---
@@ -82,12 +606,289 @@ class Lexer:
             # --- operadores y símbolos ---
             self._operator_or_punctuator(c)
 
-            
-        if not self.errors:
-            self.tokens.append(Token(TokenType.EOF, "", self.line, self.column))
+    # ---------------- Motor de expresión maestra ----------------
+    def _tokenize_regex(self):
+        finditer = _MASTER.finditer
+        append = self.tokens.append
+        base = self._base
+        line_index = self.line_index
+        pos = self.pos
 
-        
-        return self.tokens, self.errors
+        reanudar = True
+        while reanudar and not self._parar:
+            reanudar = False
+            source = self.source
+            n = len(source)
+            for m in finditer(source, pos):
+                if self._parar:
+                    break
+
+                kind = m.lastgroup
+                inicio = m.start()
+                start, pos = m.span(kind)
+                # Con una declaración pendiente todo pasa por _emit
+                directo = self._pend is None
+                if not directo and start > inicio:
+                    self._gap |= GAP_NEWLINE if "\r" in source[inicio:start] else GAP_BLANK
+
+                if kind == "PUNCT":
+                    c = source[start]
+                    if directo and c != "{" and c != "}":
+                        append(Token(SINGLE_OPS[c], c, base + start, line_index))
+                    else:
+                        self.pos = pos
+                        self._operator_or_punctuator(c)
+                elif kind == "WORD":
+                    lexeme = source[start:pos]
+                    ttype = KEYWORDS.get(lexeme)
+                    if directo and ttype is not None and ttype is not TokenType.LET and ttype is not TokenType.FUNCTION:
+                        append(Token(ttype, lexeme, base + start, line_index))
+                    else:
+                        self.pos = pos
+                        self._word(lexeme, start)
+                elif kind == "NL":
+                    # Bloque de saltos de línea y blancos
+                    self._gap |= GAP_NEWLINE
+                elif kind == "NUM":
+                    if pos < n and source[pos] >= "\x80":
+                        # Posibles dígitos Unicode: lo resuelve el motor escalar
+                        self.pos = start
+                        self._step_char()
+                        pos = self.pos
+                        reanudar = True
+                        break
+                    self.pos = pos
+                    lexeme = source[start:pos]
+                    frac = m.group("FRAC")
+                    if frac is None:
+                        self._emit_int(lexeme, int(lexeme), start)
+                    elif frac == ".":
+                        self._add_error("Número real mal formado (falta dígito tras '.')", start, lexeme)
+                    elif len(lexeme) - len(frac) > 8:
+                        self._emit_float(lexeme, _valor_real(lexeme), start)
+                    else:
+                        self._emit_float(lexeme, float(lexeme), start)
+                elif kind == "STR":
+                    self.pos = pos
+                    lexeme = source[start:pos]
+                    if len(lexeme) < 2 or lexeme[-1] != "'":
+                        if pos >= n:
+                            self._add_error("Cadena no cerrada al final del archivo", start, lexeme)
+                        else:
+                            self._add_error("Cadena no cerrada antes del salto de línea", start, lexeme)
+                    else:
+                        self._emit_string(lexeme, start)
+                elif kind == "COMMENT":
+                    self._fin_comentario = base + pos
+                    self._gap |= GAP_COMMENT
+                elif kind == "OR":
+                    self.pos = pos
+                    self._emit(Token(TokenType.OR_ASSIGN, "|=", base + start, line_index))
+                elif kind == "END":
+                    # Blancos finales sin más lexemas;
+                    # _propagate_* puede haber ampliado la ventana
+                    reanudar = len(self.source) > n
+                else:
+                    # Carácter fuera de la expresión (no ASCII o inválido)
+                    self.pos = start
+                    self._step_char()
+                    pos = self.pos
+                    reanudar = True
+                    break
+
+        self.pos = pos
+
+    # ---------------- Motor de bytes ASCII ----------------
+    def _tokenize_bytes(self):
+        # Recorre self._data byte a byte con las tablas de clases; los
+        # lexemas se cortan de self.source, que tiene las mismas posiciones.
+        data = self._data
+        clases = _CLASES
+        es_id = _ES_ID
+        es_digito = _ES_DIGITO
+        source = self.source
+        append = self.tokens.append
+        line_index = self.line_index
+        n = len(data)
+        pos = self.pos
+
+        while pos < n and not self._parar:
+            clase = clases[data[pos]]
+
+            if clase == _C_LETRA:
+                j = pos + 1
+                while j < n and es_id[data[j]]:
+                    j += 1
+                lexeme = source[pos:j]
+                ttype = KEYWORDS.get(lexeme)
+                if (self._pend is None and ttype is not None
+                        and ttype is not TokenType.LET and ttype is not TokenType.FUNCTION):
+                    append(Token(ttype, lexeme, pos, line_index))
+                else:
+                    self.pos = j
+                    self._word(lexeme, pos)
+                pos = j
+
+            elif clase == _C_BLANCO:
+                if self._pend is not None:
+                    self._gap |= GAP_NEWLINE if data[pos] == 13 else GAP_BLANK
+                pos += 1
+
+            elif clase == _C_NL:
+                if self._pend is not None:
+                    self._gap |= GAP_NEWLINE
+                pos += 1
+
+            elif clase == _C_OP:
+                c = source[pos]
+                if self._pend is None:
+                    append(Token(SINGLE_OPS[c], c, pos, line_index))
+                else:
+                    self.pos = pos + 1
+                    self._operator_or_punctuator(c)
+                pos += 1
+
+            elif clase == _C_DIGITO:
+                j = pos + 1
+                while j < n and es_digito[data[j]]:
+                    j += 1
+                if j < n and data[j] == 46:    # "."
+                    k = j + 1
+                    while k < n and es_digito[data[k]]:
+                        k += 1
+                    lexeme = source[pos:k]
+                    self.pos = k
+                    if k == j + 1:
+                        self._add_error("Número real mal formado (falta dígito tras '.')", pos, lexeme)
+                    elif j - pos > 8:
+                        self._emit_float(lexeme, _valor_real(lexeme), pos)
+                    else:
+                        self._emit_float(lexeme, float(lexeme), pos)
+                    pos = k
+                else:
+                    lexeme = source[pos:j]
+                    self.pos = j
+                    self._emit_int(lexeme, int(lexeme), pos)
+                    pos = j
+
+            elif clase == _C_COMILLA:
+                j = pos + 1
+                while j < n and data[j] != 39 and data[j] != 10:    # "'" y "\n"
+                    j += 1
+                if j >= n:
+                    self.pos = n
+                    self._add_error("Cadena no cerrada al final del archivo", pos, source[pos:n])
+                elif data[j] == 10:
+                    self.pos = j
+                    self._add_error("Cadena no cerrada antes del salto de línea", pos, source[pos:j])
+                else:
+                    self.pos = j + 1
+                    self._emit_string(source[pos:j + 1], pos)
+                pos = self.pos
+
+            elif clase == _C_BARRA and pos + 1 < n and data[pos + 1] == 47:
+                fin = source.find("\n", pos)
+                pos = n if fin < 0 else fin
+                self._fin_comentario = pos
+                self._gap |= GAP_COMMENT
+
+            else:
+                # "{", "}", "|=" y caracteres no reconocidos
+                self.pos = pos + 1
+                self._operator_or_punctuator(source[pos])
+                pos = self.pos
+
+        self.pos = pos
+
+    # ---------------- Motor vectorial (numpy) ----------------
+    def _tokenize_numpy(self):
+        # Los tramos vienen de _segmentos; aquí sólo se clasifican las
+        # palabras y se registran los tokens, igual que en _tokenize_regex.
+        source = self.source
+        append = self.tokens.append
+        line_index = self.line_index
+        previo = self.pos
+
+        for start, end, kind in zip(*_segmentos(self._data)):
+            if self._parar:
+                break
+            if self._pend is not None and start > previo:
+                hueco = source[previo:start]
+                self._gap |= GAP_NEWLINE if "\n" in hueco or "\r" in hueco else GAP_BLANK
+            previo = end
+
+            if kind == _S_WORD:
+                lexeme = source[start:end]
+                ttype = KEYWORDS.get(lexeme)
+                if (self._pend is None and ttype is not None
+                        and ttype is not TokenType.LET and ttype is not TokenType.FUNCTION):
+                    append(Token(ttype, lexeme, start, line_index))
+                else:
+                    self.pos = end
+                    self._word(lexeme, start)
+            elif kind == _S_SUELTO:
+                c = source[start]
+                if self._pend is None and c in SINGLE_OPS:
+                    append(Token(SINGLE_OPS[c], c, start, line_index))
+                else:
+                    self.pos = end
+                    self._operator_or_punctuator(c)
+            elif kind == _S_MIXTO:
+                self._piezas(start, end)
+            elif kind == _S_STR:
+                self.pos = end
+                lexeme = source[start:end]
+                if len(lexeme) < 2 or lexeme[-1] != "'":
+                    if end >= len(source):
+                        self._add_error("Cadena no cerrada al final del archivo", start, lexeme)
+                    else:
+                        self._add_error("Cadena no cerrada antes del salto de línea", start, lexeme)
+                else:
+                    self._emit_string(lexeme, start)
+            elif kind == _S_COMMENT:
+                self._fin_comentario = end
+                self._gap |= GAP_COMMENT
+            else:
+                self.pos = end
+                self._emit(Token(TokenType.OR_ASSIGN, "|=", start, line_index))
+
+        self.pos = len(source)
+
+    def _piezas(self, start, end):
+        # Tramo con dígitos al principio o con puntos: números, palabras y "."
+        for m in _PIEZA.finditer(self.source[start:end]):
+            if self._parar:
+                return
+            kind = m.lastgroup
+            a, b = m.span()
+            a += start
+            b += start
+            lexeme = m.group()
+            self.pos = b
+            if kind == "WORD":
+                self._word(lexeme, a)
+            elif kind == "PUNTO":
+                self._operator_or_punctuator(".")
+            else:
+                frac = m.group("FRAC")
+                if frac is None:
+                    self._emit_int(lexeme, int(lexeme), a)
+                elif frac == ".":
+                    self._add_error("Número real mal formado (falta dígito tras '.')", a, lexeme)
+                elif len(lexeme) - len(frac) > 8:
+                    self._emit_float(lexeme, _valor_real(lexeme), a)
+                else:
+                    self._emit_float(lexeme, float(lexeme), a)
+
+    def _step_char(self):
+        # Un paso del motor carácter a carácter desde self.pos
+        c = self._advance()
+        if c.isalpha() or c == "_":
+            self._identifier(c)
+        elif c.isdigit():
+            self._number(c)
+        else:
+            self._operator_or_punctuator(c)
 
     # ---------------- Rutinas auxiliares ----------------
     def _is_at_end(self):
@@ -99,7 +900,9 @@ class Lexer:
         return char
 
     def _peek(self):
-        if self._is_at_end():
+        # Sólo las exploraciones hacia delante de _propagate_* llegan al
+        # final de la ventana; en modo fichero se amplía en ese momento.
+        if self._is_at_end() and not self._fill():
             return "\0"
         return self.source[self.pos]
 
@@ -107,68 +910,285 @@ class Lexer:
     def _skip_comment(self):
         while not self._is_at_end() and self._peek() != "\n":
             self.pos += 1
-        self.column = 1
+        self._fin_comentario = self._base + self.pos
 
     # --- identificadores / palabras clave ---
     def _identifier(self, first_char):
         start_pos = self.pos - 1
-        start_col = self.column
         while self._peek().isalnum() or self._peek() == "_":
             self._advance()
-        lexeme = self.source[start_pos:self.pos]
-        ttype = KEYWORDS.get(lexeme, TokenType.ID)
+        self._word(self.source[start_pos:self.pos], start_pos)
+
+    def _word(self, lexeme, start):
+        ttype = KEYWORDS.get(lexeme)
+        if ttype is None:
+            ttype = TokenType.ID
+            token = self._pooled(ttype, lexeme, start)
+        else:
+            token = Token(ttype, lexeme, self._base + start, self.line_index)
+        if self._pend is None and ttype not in _BOUND_WORDS:
+            self.tokens.append(token)
+        else:
+            self._emit(token)
+
+    # --- emisión y enlace con la tabla de símbolos ---
+    def _emit(self, token, fin=None):
+        if self._pend is not None:
+            self._feed_pending(token, self.pos if fin is None else fin)
+            return
+
+        self._bind(token)
+        self.tokens.append(token)
+
+        ttype = token.type
+        if ttype == TokenType.LET or ttype == TokenType.FUNCTION:
+            if self.binding == "rescan":
+                if ttype == TokenType.LET:
+                    self._propagate_type_declaration()
+                else:
+                    self._propagate_function_declaration()
+            else:
+                self._pend = _PendingDeclaration(ttype, token.line)
+                self._pend.fin = self.pos if fin is None else fin
+                self._gap = 0
+
+    def _bind(self, token):
+        ttype = token.type
 
         if ttype == TokenType.ID:
-            if self.current_function:
-                
-                ltab = self.symbols.locales.get(self.current_function)
-                lentry = ltab.buscar(lexeme) if ltab else None
-                if lentry:
-                    entry = lentry
+            token.attribute = self._ligar_id(token.lexeme, token.offset)
+        elif ttype == TokenType.LBRACE or ttype == TokenType.RBRACE:
+            self._llave(ttype)
+
+    def _ligar_id(self, lexeme, offset):
+        # Atributo (índice en la tabla) del identificador en `offset`
+        if self.current_function:
+            # Lo que se ve desde el ámbito actual (la función, un bloque o
+            # el global) o, si no hay nada, un global implícito, como en
+            # el parser
+            entry = self.symbols.resolver_o_declarar(lexeme)
+
+        elif self._awaiting_function_body_of and lexeme in self._pending_param_names:
+            
+            fname = self._awaiting_function_body_of
+            entry = self.symbols.locales[fname].buscar(lexeme)
+
+        else:
+            entry = self.symbols.resolver(lexeme)
+            if entry is None:
+                line = self.line_index.line(offset)
+                if lexeme in self.symbols.locales:
+                    entry = self.symbols.add_if_absent(lexeme, line, "void", categoria="Función")
                 else:
-                    
-                    gentry = self.symbols.buscar(lexeme)
-                    if gentry:
-                        entry = gentry
+                    entry = self.symbols.add_if_absent(lexeme, line)
+
+        idx = getattr(entry, "index", "?")
+        return str(idx)
+
+    def _llave(self, ttype):
+        if ttype == TokenType.LBRACE:
+            if self._awaiting_function_body_of and not self.current_function:
+                self.current_function = self._awaiting_function_body_of
+                self._awaiting_function_body_of = None
+                self._brace_depth = 1
+                self._pending_param_names.clear()  
+                self.symbols.abrir_funcion(self.current_function)
+            elif self.current_function:
+                self._brace_depth += 1
+                if self.bloques:
+                    self.symbols.abrir_bloque()
+            elif self.bloques:
+                self._bloques_globales += 1
+                self.symbols.abrir_bloque()
+
+        elif ttype == TokenType.RBRACE:
+            if self.current_function:
+                self._brace_depth -= 1
+                if self._brace_depth <= 0:
+                    self.current_function = None
+                    self._brace_depth = 0
+                    self.symbols.cerrar_ambito()
+                elif self.bloques:
+                    self.symbols.cerrar_ambito()
+            elif self._bloques_globales:
+                self._bloques_globales -= 1
+                self.symbols.cerrar_ambito()
+
+    # --- declaraciones pendientes (binding="single-pass") ---
+    # Reproduce, token a token, lo que _propagate_type_declaration y
+    # _propagate_function_declaration leerían por delante: los tokens de la
+    # declaración se retienen sin enlazar hasta saber qué registrar, y luego
+    # se enlazan en el mismo orden que en modo "rescan".
+    def _feed_pending(self, token, fin):
+        p = self._pend
+        gap = self._gap
+        self._gap = 0
+        ttype = token.type
+        lexeme = token.lexeme
+        palabra = ttype in _WORD_TYPES
+        stage = p.stage
+        sigue = None
+
+        if gap & GAP_COMMENT:
+            pass
+
+        elif stage == p.TIPO:
+            if palabra:
+                k = _alpha_prefix(lexeme)
+                if k:
+                    p.tipo = lexeme[:k]
+                    if k < len(lexeme):
+                        p.ident = lexeme[k:]
+                        sigue = p.DONE
                     else:
-                        
-                        self.symbols.add_local(self.current_function, lexeme, "id")
-                        entry = self.symbols.locales[self.current_function].buscar(lexeme)
+                        sigue = p.ID
 
-            elif self._awaiting_function_body_of and lexeme in self._pending_param_names:
-                
-                fname = self._awaiting_function_body_of
-                entry = self.symbols.locales[fname].buscar(lexeme)
+        elif stage == p.ID:
+            if gap & GAP_NEWLINE:
+                pass
+            elif palabra:
+                p.ident = lexeme
+                sigue = p.DONE
+            elif ttype == TokenType.FLOAT_CONST:
+                p.ident = lexeme[:lexeme.index(".")]
+                sigue = p.DONE
+            elif ttype == TokenType.INT_CONST:
+                # El identificador leído por delante seguiría con una
+                # palabra pegada al número (p.ej. "5x")
+                p.ident = lexeme
+                sigue = p.ID_CONT
+            elif ttype == TokenType.ERROR and lexeme[:1].isdigit():
+                # Número erróneo en modo recuperación: se lee igual que arriba
+                if "." in lexeme:
+                    p.ident = lexeme[:lexeme.index(".")]
+                    sigue = p.DONE
+                else:
+                    p.ident = lexeme
+                    sigue = p.ID_CONT
+
+        elif stage == p.ID_CONT:
+            if palabra and not gap:
+                p.ident += lexeme
+                sigue = p.DONE
+
+        elif stage == p.RET:
+            if palabra:
+                k = _alpha_prefix(lexeme)
+                if k:
+                    p.tipo = lexeme[:k]
+                    if k == len(lexeme):
+                        sigue = p.NOMBRE
+                    elif lexeme[k] == "_":
+                        p.nombre = lexeme[k:]
+                        sigue = p.LPAREN
+
+        elif stage == p.NOMBRE:
+            if palabra:
+                p.nombre = lexeme
+                sigue = p.LPAREN
+
+        elif stage == p.LPAREN:
+            if ttype == TokenType.LPAREN:
+                sigue = p.PARAM
+
+        elif stage == p.PARAM:
+            if ttype == TokenType.RPAREN:
+                sigue = p.DONE
+            elif palabra:
+                k = _alpha_prefix(lexeme)
+                if k == len(lexeme):
+                    p.ptype = lexeme
+                    sigue = p.PARAM_ID
+                elif k and lexeme[k] == "_":
+                    p.params.append((lexeme[:k], lexeme[k:]))
+                    sigue = p.SEP
 
+        elif stage == p.PARAM_ID:
+            if palabra and not gap & GAP_NEWLINE:
+                p.params.append((p.ptype, lexeme))
+                sigue = p.SEP
+
+        elif stage == p.SEP:
+            if ttype == TokenType.COMMA:
+                sigue = p.PARAM
+            elif ttype == TokenType.RPAREN:
+                sigue = p.DONE
+
+        if sigue is None:
+            # El token ya no forma parte de la declaración
+            self._pend = None
+            self._resolve_pending(p)
+            self._flush_pending(p)
+            self._gap = gap
+            self._emit(token, fin)
+            return
+
+        p.stage = sigue
+        p.fin = fin
+        p.buffer.append((token, gap, fin))
+        if sigue == p.DONE:
+            self._pend = None
+            self._resolve_pending(p)
+            self._flush_pending(p)
+            self._gap = 0
+
+    def _resolve_pending(self, p):
+        if p.kind == TokenType.LET:
+            if p.stage not in (p.ID_CONT, p.DONE):
+                return
+            if self.symbols.nivel_actual:
+                self.symbols.add_local(self.symbols.ambito_actual, p.ident, p.tipo)
             else:
-                
-                if hasattr(self.symbols, "locales") and lexeme in self.symbols.locales:
-                    entry = (self.symbols.buscar(lexeme)
-                            or self.symbols.add_if_absent(lexeme, self.line, "void", categoria="Función"))
-                else:
-                    entry = self.symbols.add_if_absent(lexeme, self.line)
+                self.symbols.add_if_absent(p.ident, p.line, p.tipo)
+                self.symbols.update_type(p.ident, p.tipo)
+            return
 
-            
-            idx = getattr(entry, "index", "?")
-            
-            token = Token(ttype, lexeme, self.line, start_col, attribute=str(idx))
-            
-        else:
-            token = Token(ttype, lexeme, self.line, start_col)
+        if p.stage not in (p.PARAM, p.PARAM_ID, p.SEP, p.DONE):
+            return
+        for ptype, pid in p.params:
+            self.symbols.add_local(p.nombre, pid, ptype)
+        try:
+            self.symbols.declare_function(p.nombre, p.tipo or "void", [t for t, _ in p.params])
+        except AttributeError:
+            return
+        self._awaiting_function_body_of = p.nombre
+        self._pending_param_names = {pid for _, pid in p.params}
 
-        self.tokens.append(token)
-        self.column += len(lexeme)
+    def _flush_pending(self, p):
+        # Los tokens retenidos pueden abrir a su vez otra declaración
+        for token, gap, fin in p.buffer:
+            self._gap = gap
+            self._emit(token, fin)
 
-        if ttype == TokenType.LET:
-            self._propagate_type_declaration()
-        elif ttype == TokenType.FUNCTION:
-            self._propagate_function_declaration()
+    def _finish_pending(self):
+        # Fin de fichero o error: la declaración se cierra con lo leído
+        while self._pend is not None:
+            p = self._pend
+            self._pend = None
+            gap = self._gap
+
+            if p.stage == p.ID or p.stage == p.ID_CONT:
+                # Sólo tras un error léxico puede quedar un identificador
+                # pegado por delante (p.ej. "let int 99999x")
+                if not gap & (GAP_NEWLINE | GAP_COMMENT) and not (p.stage == p.ID_CONT and gap):
+                    src = self.source
+                    i = p.fin
+                    if p.stage == p.ID:
+                        while i < len(src) and src[i] in " \t":
+                            i += 1
+                    j = i
+                    while j < len(src) and (src[j].isalnum() or src[j] == "_"):
+                        j += 1
+                    p.ident += src[i:j]
+                    if p.ident:
+                        p.stage = p.DONE
+
+            self._resolve_pending(p)
+            self._flush_pending(p)
+            self._gap = gap
 
     # --- números ---
     def _number(self, first_char):
-        start_col = self.column
-        
-        
         start_pos = self.pos - 1 
         valor = int(first_char)
         
@@ -184,7 +1204,8 @@ class Lexer:
             
             
             if not self._peek().isdigit():
-                self._add_error("Número real mal formado (falta dígito tras '.')", start_col)
+                self._add_error("Número real mal formado (falta dígito tras '.')", start_pos,
+                                self.source[start_pos:self.pos])
                 return
             
             div = 10.0
@@ -195,120 +1216,100 @@ class Lexer:
                 div = div * 10.0
             
             
-            lexeme = self.source[start_pos:self.pos]
-            
-           
-            if valor > 117549436.0:
-                self._add_error(f"Real fuera de rango ({lexeme})", start_col)
-            else:
-               
-                self.tokens.append(Token(TokenType.FLOAT_CONST, lexeme, self.line, start_col))
-                
+            self._emit_float(self.source[start_pos:self.pos], valor, start_pos)
         else:
-            
-            lexeme = self.source[start_pos:self.pos]
-            
-            # Chequeo de rango ENTERO 
-            if valor > 32767:
-                self._add_error(f"Entero fuera de rango ({lexeme})", start_col)
-            else:
-                
-                self.tokens.append(Token(TokenType.INT_CONST, lexeme, self.line, start_col))
+            self._emit_int(self.source[start_pos:self.pos], valor, start_pos)
 
-        
-        self.column += len(lexeme)
+    def _emit_int(self, lexeme, valor, start):
+        # Chequeo de rango ENTERO 
+        if valor > MAX_INT:
+            self._add_error(f"Entero fuera de rango ({lexeme})", start, lexeme)
+            return
+        self._emit(self._pooled(TokenType.INT_CONST, lexeme, start))
+
+    def _emit_float(self, lexeme, valor, start):
+        if valor > MAX_REAL:
+            self._add_error(f"Real fuera de rango ({lexeme})", start, lexeme)
+            return
+        self._emit(self._pooled(TokenType.FLOAT_CONST, lexeme, start))
 
     # --- cadenas ---
     def _string(self):
-        start_col = self.column
         start_pos = self.pos
         
         
         while not self._is_at_end() and self._peek() != "'":
             if self._peek() == "\n":
-                self._add_error("Cadena no cerrada antes del salto de línea", start_col)
+                self._add_error("Cadena no cerrada antes del salto de línea", start_pos - 1,
+                                self.source[start_pos - 1:self.pos])
                 return
             self._advance()
             
         if self._is_at_end():
-            self._add_error("Cadena no cerrada al final del archivo", start_col)
+            self._add_error("Cadena no cerrada al final del archivo", start_pos - 1,
+                            self.source[start_pos - 1:self.pos])
             return
             
         self._advance()  
         
-        lexeme_completo = self.source[start_pos - 1:self.pos]
-        contenido = self.source[start_pos:self.pos - 1]
-        
-        if len(contenido) > 64:
-            self._add_error(f"Cadena demasiado larga ({len(contenido)} caracteres). Máximo permitido: 64.", start_col)
+        self._emit_string(self.source[start_pos - 1:self.pos], start_pos - 1)
+
+    def _emit_string(self, lexeme_completo, start):
+        longitud = len(lexeme_completo) - 2
+        if longitud > MAX_STRING:
+            self._add_error(f"Cadena demasiado larga ({longitud} caracteres). Máximo permitido: {MAX_STRING}.",
+                            start, lexeme_completo)
             return
-        
-        self.tokens.append(Token(TokenType.STRING_CONST, lexeme_completo, self.line, start_col))
-        self.column += len(lexeme_completo)
+
+        self._emit(self._pooled(TokenType.STRING_CONST, lexeme_completo, start))
+
+    def _pooled(self, ttype, lexeme, start):
+        # Token que comparte su lexema (y su valor, si es literal) vía el pool
+        pool = self.pool
+        idx = pool.intern(lexeme, ttype)
+        return Token(ttype, pool.lexemes[idx], self._base + start, self.line_index, "", idx, pool)
 
     # --- operadores / delimitadores ---
     def _operator_or_punctuator(self, c):
-        start_col = self.column
+        offset = self._base + self.pos - 1
 
         if c == "|" and self._peek() == "=":
             self._advance()
-            self.tokens.append(Token(TokenType.OR_ASSIGN, "|=", self.line, start_col))
-            self.column += 2
-            return
-
-        if c == "{":
-            if self._awaiting_function_body_of and not self.current_function:
-                self.current_function = self._awaiting_function_body_of
-                self._awaiting_function_body_of = None
-                self._brace_depth = 1
-                self._pending_param_names.clear()  
-            elif self.current_function:
-                self._brace_depth += 1
-            self.tokens.append(Token(TokenType.LBRACE, "{", self.line, start_col))
-            self.column += 1
+            self._emit(Token(TokenType.OR_ASSIGN, "|=", offset, self.line_index))
             return
 
-        if c == "}":
-            if self.current_function:
-                self._brace_depth -= 1
-                if self._brace_depth <= 0:
-                    self.current_function = None
-                    self._brace_depth = 0
-            self.tokens.append(Token(TokenType.RBRACE, "}", self.line, start_col))
-            self.column += 1
-            return
-
-        single_ops = {
-            "+": TokenType.PLUS,
-            "<": TokenType.LT,
-            "!": TokenType.NOT,
-            "=": TokenType.ASSIGN,
-            "(": TokenType.LPAREN,
-            ")": TokenType.RPAREN,
-            ";": TokenType.SEMICOLON,
-            ",": TokenType.COMMA,
-        }
-        if c in single_ops:
-            self.tokens.append(Token(single_ops[c], c, self.line, start_col))
-            self.column += 1
+        if c in SINGLE_OPS:
+            token = Token(SINGLE_OPS[c], c, offset, self.line_index)
+            if self._pend is None:
+                self.tokens.append(token)
+            else:
+                self._emit(token)
+        elif c == "{":
+            self._emit(Token(TokenType.LBRACE, "{", offset, self.line_index))
+        elif c == "}":
+            self._emit(Token(TokenType.RBRACE, "}", offset, self.line_index))
         else:
-            self._add_error(f"Carácter no reconocido: '{c}'", start_col)
+            self._add_error(f"Carácter no reconocido: '{c}'", self.pos - 1, c)
 
     # --- errores ---
-    def _add_error(self, message: str, column: int):
-        self.errors.append(LexError(self.line, column, message))
+    def _add_error(self, message: str, start: int, lexeme: str = ""):
+        # start: posición del texto erróneo en la ventana actual
+        offset = self._base + start
+        line, column = self.line_index.position(offset)
+        self.errors.append(LexError(line, column, message))
+        if len(self.errors) == self._limite_errores:
+            self._parar = True
+
+        # Recuperación: el texto erróneo ya consumido pasa como token ERROR
+        # (el parser lo salta) y se sigue desde el carácter siguiente.
+        if self.recovery:
+            self._emit(Token(TokenType.ERROR, lexeme, offset, self.line_index))
 
     
     def _propagate_type_declaration(self):
         temp_pos = self.pos
-        temp_line = self.line
-        temp_col = self.column
 
         while self._peek() in " \t\r\n":
-            if self._peek() == "\n":
-                temp_line += 1; temp_col = 1
-            else:
-                temp_col += 1
             self.pos += 1
 
         # tipo
@@ -327,10 +1328,10 @@ class Lexer:
         identificador = self.source[start_id:self.pos]
 
         if tipo and identificador:
-            if self.current_function:
-                self.symbols.add_local(self.current_function, identificador, tipo)
+            if self.symbols.nivel_actual:
+                self.symbols.add_local(self.symbols.ambito_actual, identificador, tipo)
             else:
-                self.symbols.add_if_absent(identificador, temp_line, tipo)
+                self.symbols.add_if_absent(identificador, self.line_index.line(self._base + start_tipo), tipo)
                 self.symbols.update_type(identificador, tipo)
 
         self.pos = temp_pos
@@ -365,15 +1366,9 @@ class Lexer:
 
     def _propagate_function_declaration(self):
         temp_pos = self.pos
-        temp_line = self.line
-        temp_col = self.column
 
         # espacios
         while self._peek() in " \t\r\n":
-            if self._peek() == "\n":
-                temp_line += 1; temp_col = 1
-            else:
-                temp_col += 1
             self.pos += 1
 
         # tipo de retorno
@@ -0,0 +1,283 @@
+from token_types import TokenType
+from an_sintactico_semtant import Parser
+from gramatica import RUTA_GRAMATICA, cargar_tabla, es_accion
+from tipos import CODIGO, NINGUNO, INT, FLOAT, BOOLEAN, STRING, VOID, ERROR, RESULTADO_MENOR
+from ast_arena import (PROGRAMA, DECLARACION, FUNCION, PARAMETRO, BLOQUE, IF, DO_WHILE, READ,
+                       WRITE, RETURN, ASIGNACION, OR_ASIGNACION, LLAMADA, MENOR, SUMA, NOT,
+                       ENTERO, REAL, CADENA, LOGICO, VARIABLE)
+
+# Código de tipo que fija cada token de tipo o literal (acción @tipo)
+TIPOS = {
+    TokenType.INT: INT, TokenType.FLOAT: FLOAT,
+    TokenType.BOOLEAN: BOOLEAN, TokenType.STRING: STRING, TokenType.VOID: VOID,
+    TokenType.INT_CONST: INT, TokenType.FLOAT_CONST: FLOAT,
+    TokenType.STRING_CONST: STRING, TokenType.TRUE: BOOLEAN, TokenType.FALSE: BOOLEAN,
+}
+
+# Tabla compilada por clase de parser: las acciones se resuelven a sus métodos
+_compiladas = {}
+
+# Árbol sintáctico: nodo que abre cada producción (el mismo que crea Parser
+# en el método del no terminal) y literal de cada producción de K
+_NODOS = {1: PROGRAMA, 11: DECLARACION, 14: FUNCION, 22: BLOQUE, 26: IF, 28: DO_WHILE,
+          29: READ, 30: WRITE, 31: RETURN, 36: ASIGNACION, 37: OR_ASIGNACION, 38: LLAMADA,
+          43: MENOR, 46: SUMA, 49: NOT, 57: VARIABLE}
+_LITERALES = {52: (ENTERO, INT, None), 53: (REAL, FLOAT, None), 54: (CADENA, STRING, None),
+              55: (LOGICO, BOOLEAN, True), 56: (LOGICO, BOOLEAN, False)}
+# Producciones que fijan el operador del nodo abierto (el token que sigue
+# al primer operando de X o D) o que K -> id es una llamada (K1 -> ( G ))
+_OPERADOR = frozenset({44, 45, 47, 48})
+_LLAMADA = 58
+
+
+def _compilar(cls, ruta):
+    inicial, producciones, prediccion, defecto = cargar_tabla(ruta)
+
+    def simbolo(s):
+        if es_accion(s):
+            return getattr(cls, "accion_" + s[1:])
+        if s in prediccion:
+            return s
+        return TokenType[s]
+
+    # Cuerpo de cada producción ya invertido, tal y como se apila
+    expansion = {n: [simbolo(s) for s in reversed(cuerpo)]
+                 for n, (_, cuerpo) in producciones.items()}
+    tabla = {a: {TokenType[t]: n for t, n in fila.items()} for a, fila in prediccion.items()}
+    errores = {a: getattr(cls, "error_" + a, cls.error_prediccion)
+               for a in prediccion if a not in defecto}
+    return inicial, expansion, tabla, defecto, errores
+
+
+class ParserLL1(Parser):
+    """Parser predictivo dirigido por la tabla LL(1) de gramatica.ll1.
+
+    Una pila explícita sustituye a la recursión de Parser y da la misma
+    traza de reglas, los mismos errores, las mismas tablas de símbolos y,
+    con ast=True, el mismo árbol. Cada acción @nombre de la gramática es el
+    método accion_nombre; los atributos (tipos, símbolos) viajan por la pila
+    de valores. Los nodos del árbol se abren al expandir su producción y se
+    cierran al acabar su cuerpo (_cerrar_nodo, apilado debajo).
+    """
+
+    def __init__(self, tokens, trace="full", ast=False, recovery=False, max_errors=None,
+                 contexto=None, bloques=False, *, gramatica=RUTA_GRAMATICA):
+        # Mismos argumentos y en el mismo orden que Parser, para poder usar
+        # uno u otro; la gramática sólo se da por nombre
+        super().__init__(tokens, trace, ast=ast, recovery=recovery, max_errors=max_errors,
+                         contexto=contexto, bloques=bloques)
+        clave = (type(self), gramatica)
+        if clave not in _compiladas:
+            _compiladas[clave] = _compilar(type(self), gramatica)
+        self.inicial, self.expansion, self.tabla, self.defecto, self.errores_nt = _compiladas[clave]
+        self.valores = []
+        # Nodos abiertos: [clase, token, marca, tipo, dato]
+        self._abiertos = []
+
+    def _analizar(self):
+        # Sustituye al descenso recursivo de Parser (P) por la pila explícita
+        pila = [self.inicial]
+        rules = self.rules
+        expansion, tabla, defecto = self.expansion, self.tabla, self.defecto
+        eof = TokenType.EOF
+        arbol = self.ast is not None
+        while pila:
+            s = pila.pop()
+            tipo = type(s)
+            if tipo is str:
+                token = self.current_token
+                n = tabla[s].get(token.type if token else None) or defecto.get(s)
+                if n is None:
+                    self.errores_nt[s](self)
+                    continue
+                rules.append(n)
+                if arbol and self._abrir_nodo(n):
+                    pila.append(ParserLL1._cerrar_nodo)
+                pila.extend(expansion[n])
+            elif tipo is TokenType:
+                token = self.current_token
+                if token is not None and token.type is s:
+                    # P -> L eof: el fin de fichero se comprueba pero no se consume
+                    if s is not eof:
+                        self.advance()
+                        self._panico = False
+                elif s is not eof:
+                    self.eat(s)
+                elif self._resincronizar_programa():
+                    # Como en Parser.P: otra vez el cuerpo de P tras saltar lo que no es sentencia
+                    pila += expansion[defecto[self.inicial]]
+            else:
+                s(self)
+
+    # ---------------- ÁRBOL SINTÁCTICO ----------------
+    def _abrir_nodo(self, n):
+        # Devuelve si la producción n abre un nodo
+        clase = _NODOS.get(n)
+        if clase is not None:
+            marca = len(self._nodos)
+            if clase == PROGRAMA or clase == MENOR or clase == SUMA:
+                # Sin token: el de MENOR y SUMA es su primer operador
+                token = None
+            elif clase == ASIGNACION or clase == OR_ASIGNACION or clase == LLAMADA:
+                # SE1: el identificador ya consumido, cuyo símbolo está en la pila
+                simbolo = self.valores[-1]
+                self._abiertos.append([clase, self.previous_token, marca,
+                                       CODIGO[simbolo.tipo] if simbolo else NINGUNO, simbolo])
+                return True
+            else:
+                token = self.current_token
+            self._abiertos.append([clase, token, marca, BOOLEAN if clase == NOT else NINGUNO, None])
+            return True
+        if n in _LITERALES:
+            self._abiertos.append(_LITERALES[n])
+            return True
+        if n in _OPERADOR:
+            abierto = self._abiertos[-1]
+            if abierto[1] is None:
+                abierto[1] = self.current_token
+        elif n == _LLAMADA:
+            self._abiertos[-1][0] = LLAMADA
+        return False
+
+    def _cerrar_nodo(self):
+        abierto = self._abiertos.pop()
+        if len(abierto) == 3:
+            # Literal recién consumido
+            self._literal(*abierto)
+            return
+        clase, token, marca, tipo, dato = abierto
+        if clase == MENOR or clase == SUMA:
+            # Sólo con más de un operando; el tipo es el de la expresión
+            if len(self._nodos) > marca + 1:
+                self._nodo(clase, token, marca, self.valores[-1])
+        else:
+            self._nodo(clase, token, marca, tipo, dato)
+
+    def _anotar_nodo(self, tipo=None, dato=None):
+        # Tipo y dato del nodo abierto más interno, que sólo se conocen en
+        # la acción semántica
+        if self._abiertos:
+            abierto = self._abiertos[-1]
+            if tipo is not None:
+                abierto[3] = tipo
+            if dato is not None:
+                abierto[4] = dato
+
+    # ---------------- ACCIONES SEMÁNTICAS ----------------
+    def accion_tipo(self):
+        self.valores.append(TIPOS[self.previous_token.type])
+
+    def accion_void(self):
+        self.valores.append(VOID)
+
+    def accion_descartar(self):
+        self.valores.pop()
+
+    def accion_declarar_variable(self):
+        # El tipo se queda en la pila como atributo heredado de V1
+        self._anotar_nodo(self.valores[-1], self._declarar_variable(self.valores[-1]))
+
+    def accion_inicializar(self):
+        tipo_expr = self.valores.pop()
+        self._comprobar_inicializacion(self.valores.pop(), tipo_expr)
+
+    def accion_declarar_funcion(self):
+        tipo_retorno = self.valores.pop()
+        self._anotar_nodo(tipo_retorno, self._declarar_funcion(tipo_retorno))
+
+    def accion_cerrar_funcion(self):
+        self._cerrar_funcion()
+
+    def accion_abrir_bloque(self):
+        self._abrir_bloque()
+
+    def accion_cerrar_bloque(self):
+        self._cerrar_bloque()
+
+    def accion_declarar_parametro(self):
+        tipo_param = self.valores.pop()
+        self._nodo(PARAMETRO, self.current_token, len(self._nodos), tipo_param,
+                   self._declarar_parametro(tipo_param))
+
+    def accion_otro_parametro(self):
+        tipo_param = self.valores.pop()
+        self._nodo(PARAMETRO, self.current_token, len(self._nodos), tipo_param,
+                   self._declarar_parametro(tipo_param, avisar=False))
+
+    def accion_condicion_if(self):
+        self._comprobar_condicion("if", self.valores.pop())
+
+    def accion_condicion_while(self):
+        self._comprobar_condicion("while", self.valores.pop())
+
+    def accion_leer(self):
+        self._anotar_nodo(dato=self._comprobar_lectura())
+
+    def accion_retorno(self):
+        tipo_retornado = self.valores.pop()
+        self._anotar_nodo(tipo_retornado)
+        self._comprobar_retorno(tipo_retornado)
+
+    def accion_simbolo(self):
+        self.valores.append(self.ts.resolver_o_declarar(self.current_token.lexeme))
+
+    def accion_asignar(self):
+        tipo_rhs = self.valores.pop()
+        self._comprobar_asignacion(self.valores.pop(), tipo_rhs)
+
+    def accion_or_asignar(self):
+        self.valores.pop()
+        self._comprobar_or_asignacion(self.valores.pop())
+
+    def accion_llamar(self):
+        self._comprobar_llamada(self.valores.pop())
+
+    def accion_duplicar(self):
+        # X -> D R: debajo queda el tipo de X, encima el operando izquierdo de R
+        self.valores.append(self.valores[-1])
+
+    def accion_comparar(self):
+        tipo_der = self.valores.pop()
+        tipo_izq = self.valores.pop()
+        self._comprobar_comparacion(tipo_izq, tipo_der)
+        # Cada comparación se hace con el operando anterior
+        self.valores[-1] = RESULTADO_MENOR[tipo_izq][tipo_der]
+        self.valores.append(tipo_der)
+
+    def accion_sumar(self):
+        # Todos los sumandos se comparan con el primero, que es el tipo de D
+        self._comprobar_suma(self.valores[-2], self.valores.pop())
+
+    def accion_negar(self):
+        self.valores.append(self._comprobar_negacion(self.valores.pop()))
+
+    def accion_identificador(self):
+        simbolo = self._usar_identificador()
+        tipo = CODIGO[simbolo.tipo] if simbolo else ERROR
+        self._anotar_nodo(tipo, simbolo)
+        self.valores.append(tipo)
+
+    # ---------------- ERRORES ----------------
+    # Token fuera de la tabla en un no terminal sin producción por defecto;
+    # error_prediccion sirve a los que no tienen un error_<no terminal> propio
+    def error_prediccion(self):
+        line, col = self._posicion(self.current_token)
+        self._error_sintactico(line, col, "Token inesperado")
+        self.advance()
+
+    def error_T(self):
+        self.valores.append(self._error_tipo())
+
+    def error_V1(self):
+        self.valores.pop()
+        self._error_declaracion()
+
+    def error_SS(self):
+        self._error_sentencia()
+
+    def error_SE1(self):
+        self.valores.pop()
+        self._error_asignacion()
+
+    def error_K(self):
+        self.valores.append(self._error_factor())
@@ -1,76 +1,202 @@
 from token_types import TokenType
+from token_stream import TokenStream
 from errors import SyntacticError, SemanticError
-from Tabla_Simbolos.gestor_tabla import GestorTablas
+from compilation_context import CompilationContext
+from rule_trace import new_trace
+from tipos import (TIPOS, CODIGO, NINGUNO, INT, FLOAT, BOOLEAN, STRING, VOID, ERROR,
+                   COMPATIBLES_SUMA, COMPATIBLES_MENOR, COMPATIBLES_INICIALIZACION,
+                   COMPATIBLES_ASIGNACION, COMPATIBLES_RETORNO, NEGABLE, CONDICION_VALIDA,
+                   RESULTADO_SUMA, RESULTADO_MENOR, RESULTADO_NOT)
+from gramatica import Gramatica
+from ast_arena import (AstArena, PROGRAMA, DECLARACION, FUNCION, PARAMETRO, BLOQUE, IF,
+                       DO_WHILE, READ, WRITE, RETURN, ASIGNACION, OR_ASIGNACION, LLAMADA,
+                       MENOR, SUMA, NOT, ENTERO, REAL, CADENA, LOGICO, VARIABLE)
+
+# Conjuntos FIRST que se consultan en cada decisión: se construyen una vez
+FIRST_E = frozenset({
+    TokenType.LET, TokenType.FUNCTION,
+    TokenType.IF, TokenType.DO, TokenType.READ, TokenType.WRITE, TokenType.RETURN,
+    TokenType.ID, TokenType.LBRACE
+})
+FIRST_S = frozenset({
+    TokenType.IF, TokenType.DO, TokenType.READ, TokenType.WRITE,
+    TokenType.RETURN, TokenType.LBRACE, TokenType.ID
+})
+FIRST_T = frozenset({TokenType.INT, TokenType.FLOAT, TokenType.BOOLEAN, TokenType.STRING})
+FIRST_X = frozenset({
+    TokenType.LPAREN, TokenType.INT_CONST, TokenType.FLOAT_CONST, TokenType.STRING_CONST,
+    TokenType.TRUE, TokenType.FALSE, TokenType.ID, TokenType.NOT
+})
+# Tokens en los que se detiene la recuperación de una declaración mal cerrada
+SAFE_TOKENS = frozenset({
+    TokenType.FUNCTION, TokenType.LET, TokenType.IF, TokenType.DO, TokenType.READ,
+    TokenType.WRITE, TokenType.RETURN, TokenType.RBRACE, TokenType.EOF
+})
+
+# Modo recuperación: tras un error se saltan tokens hasta uno de
+# sincronización (comienzo de sentencia, ';', '}' o fin de fichero) o del
+# FOLLOW del no terminal en que se produjo.
+SYNC_TOKENS = SAFE_TOKENS | {TokenType.SEMICOLON}
+# En eat(t) vale además el propio t
+_SYNC_EAT = {t: SYNC_TOKENS | {t} for t in TokenType}
+_sync_no_terminal = {}
+
+
+def _sync(no_terminal):
+    # FOLLOW(no_terminal) de gramatica.ll1 más SYNC_TOKENS, calculado una vez
+    if not _sync_no_terminal:
+        gramatica = Gramatica.desde_fichero()
+        for a, follow in gramatica.follow.items():
+            _sync_no_terminal[a] = SYNC_TOKENS | {TokenType[t] for t in follow}
+    return _sync_no_terminal[no_terminal]
+
+
+class _LimiteErrores(Exception):
+    # Se alcanzó max_errors: el análisis se detiene
+    pass
 
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
+    def __init__(self, tokens, trace="full", ast=False, recovery=False, max_errors=None, contexto=None,
+                 bloques=False):
+        if max_errors is not None and max_errors < 1:
+            raise ValueError(f"max_errors debe ser al menos 1: {max_errors}")
+        # tokens puede ser una lista o cualquier iterador (p.ej. Lexer.iter_tokens())
+        self.tokens = TokenStream(tokens)
         self.pos = 0
-        self.current_token = self.tokens[0] if self.tokens else None
+        self.current_token = self.tokens.next()
         self.previous_token = None 
-        self.rules = [] 
-        self.errors = []
+        # Traza según el modo (rule_trace.TRACE_MODES): array('B') completo,
+        # contadores por regla o nada
+        self.rules = new_trace(trace)
+        # Tablas y errores son los de la compilación (CompilationContext)
+        self.contexto = contexto if contexto is not None else CompilationContext()
+        self.errors = self.contexto.errors
+        # Sin recuperación cada error salta como mucho un token; con ella se
+        # sincroniza con los conjuntos FOLLOW y se callan los errores
+        # sintácticos hasta que vuelve a casar un token (_panico). Al llegar
+        # a max_errors errores el análisis se detiene.
+        self.recovery = recovery
+        self.max_errors = max_errors
+        self._panico = False
         
         # --- ANÁLISIS SEMÁNTICO ---
-        self.ts = GestorTablas()      
-        self.scope_actual = "global"
-        self.tipo_retorno_actual = None 
+        self.ts = self.contexto.ts
+        # Con bloques=True cada bloque { } que no es el cuerpo de una función
+        # abre su propio ámbito (sus `let` no se ven fuera de él)
+        self.bloques = bloques
+        # Los tipos son códigos enteros (tipos.py)
+        self.tipo_retorno_actual = NINGUNO
+
+        # --- ÁRBOL SINTÁCTICO (opcional) ---
+        # Los nodos se crean al cerrar cada producción; los ya creados que
+        # aún no tienen padre esperan en la pila _nodos.
+        self.ast = AstArena() if ast else None
+        self._nodos = []
 
     # ---------------- UTILIDADES ----------------
     def advance(self):
         self.previous_token = self.current_token
         self.pos += 1
-        if self.pos < len(self.tokens):
-            self.current_token = self.tokens[self.pos]
-        else:
-            self.current_token = None 
+        self.current_token = self.tokens.next()
 
     def eat(self, token_type):
         if self.current_token and self.current_token.type == token_type:
             self.advance()
+            self._panico = False
             return True
         else:
-            got = self.current_token.type.name if self.current_token else "EOF"
-            lexeme = self.current_token.lexeme if self.current_token else "fin de fichero"
-            line = self.current_token.line if self.current_token else 0
-            col = self.current_token.column if self.current_token else 0
-            
-            msg = f"Se esperaba '{token_type.name}', pero se encontró '{got}' ('{lexeme}')"
-            self.errors.append(SyntacticError(line, col, msg))
-            
-            if self.current_token and self.current_token.type != TokenType.EOF:
+            if not self._panico:
+                got = self.current_token.type.name if self.current_token else "EOF"
+                lexeme = self.current_token.lexeme if self.current_token else "fin de fichero"
+                line = self.current_token.line if self.current_token else 0
+                col = self.current_token.column if self.current_token else 0
+
+                msg = f"Se esperaba '{token_type.name}', pero se encontró '{got}' ('{lexeme}')"
+                self._error_sintactico(line, col, msg)
+            
+            if self.recovery:
+                # Si el esperado aparece antes de un token de sincronización,
+                # se consume; si no, se da por insertado
+                self._saltar(_SYNC_EAT[token_type])
+                if self.current_token and self.current_token.type == token_type:
+                    self.advance()
+                    self._panico = False
+            elif self.current_token and self.current_token.type != TokenType.EOF:
                 self.advance()
             return False
 
     def parse(self):
-        self.P()
+        try:
+            self._analizar()
+        except _LimiteErrores:
+            # El análisis se corta antes de cerrar P: lo ya construido (los
+            # nodos que aún no tienen padre) queda bajo la raíz PROGRAMA
+            self._nodo(PROGRAMA, None, 0)
         return self.rules, self.errors
 
+    def _analizar(self):
+        self.P()
+
+    # ---------------- ERRORES Y RECUPERACIÓN ----------------
+    def _anotar(self, error):
+        self.errors.append(error)
+        if len(self.errors) == self.max_errors:
+            raise _LimiteErrores()
+
+    def _error_sintactico(self, line, col, msg):
+        # En modo pánico el error es consecuencia del anterior: no se anota
+        if self._panico:
+            return
+        if self.recovery:
+            self._panico = True
+        self._anotar(SyntacticError(line, col, msg))
+
+    def _saltar(self, sincronizacion):
+        while self.current_token and self.current_token.type not in sincronizacion:
+            self.advance()
+
+    def _resincronizar_programa(self):
+        # Sin recuperación el análisis acaba en el primer token que no puede
+        # empezar una sentencia. Con ella se anota el error y se salta hasta
+        # la siguiente sentencia: devuelve si hay que seguir con otra L.
+        if not self.recovery or not self.current_token or self.current_token.type == TokenType.EOF:
+            return False
+        line, col = self._posicion(self.current_token)
+        self._error_sintactico(line, col, "Se esperaba el comienzo de una sentencia")
+        self._saltar(FIRST_E | {TokenType.EOF})
+        return bool(self.current_token) and self.current_token.type != TokenType.EOF
+
+    def _recuperar(self, no_terminal, fin_sentencia=False):
+        # Tras el error de un no terminal: se salta hasta su FOLLOW o un token
+        # de sincronización. Un ';' que cierra la sentencia rota se consume.
+        self._saltar(_sync(no_terminal))
+        if fin_sentencia and self.current_token and self.current_token.type == TokenType.SEMICOLON:
+            self.advance()
+            self._panico = False
+
     # ---------------- REGLAS GRAMATICALES ----------------
 
     # 1. P -> L eof
     def P(self):
         self.rules.append(1)
         self.L()
+        while self._resincronizar_programa():
+            self.L()
+        self._nodo(PROGRAMA, None, 0)
         if self.current_token and self.current_token.type == TokenType.EOF:
             return True
         return False
 
     # 2. L -> E L
     # 3. L -> lambda
+    # Las producciones recursivas por la derecha (L, A1, LS, G1, R, D1, M)
+    # se recorren con un bucle: mismas reglas, sin un marco de pila por
+    # sentencia, argumento u operador.
     def L(self):
-        ct = self.current_token.type if self.current_token else None
-        first_E = [
-            TokenType.LET, TokenType.FUNCTION, 
-            TokenType.IF, TokenType.DO, TokenType.READ, TokenType.WRITE, TokenType.RETURN, 
-            TokenType.ID, TokenType.LBRACE
-        ]
-        if ct in first_E:
+        while self.current_token and self.current_token.type in FIRST_E:
             self.rules.append(2)
             self.E()
-            self.L()
-        else:
-            self.rules.append(3)
+        self.rules.append(3)
 
     # 4. E -> F 
     # 5. E -> V 
@@ -92,66 +218,47 @@ class Parser:
     # 9. T -> boolean
     # 10. T -> string
     def T(self):
-        """Devuelve el tipo detectado como string."""
+        """Devuelve el código del tipo detectado."""
         ct = self.current_token.type if self.current_token else None
-        tipo_leido = "void"
+        tipo_leido = VOID
 
         if ct == TokenType.INT:
             self.rules.append(7)
             self.eat(TokenType.INT)
-            tipo_leido = "int"
+            tipo_leido = INT
         elif ct == TokenType.FLOAT:
             self.rules.append(8)
             self.eat(TokenType.FLOAT)
-            tipo_leido = "float"
+            tipo_leido = FLOAT
         elif ct == TokenType.BOOLEAN:
             self.rules.append(9)
             self.eat(TokenType.BOOLEAN)
-            tipo_leido = "boolean"
+            tipo_leido = BOOLEAN
         elif ct == TokenType.STRING:
             self.rules.append(10)
             self.eat(TokenType.STRING)
-            tipo_leido = "string"
+            tipo_leido = STRING
         else:
-             line = self.current_token.line if self.current_token else 0
-             col = self.current_token.column if self.current_token else 0
-             self.errors.append(SyntacticError(line, col, "Se esperaba un TIPO"))
-             self.advance()
+            tipo_leido = self._error_tipo()
         
         return tipo_leido
 
     # 11. V -> let T id V1
     def V(self):
+        inicio, marca = self.current_token, len(self._nodos)
         self.rules.append(11)
         self.eat(TokenType.LET)
         
         tipo_var = self.T()
-        nombre_var = self.current_token.lexeme if self.current_token else "unknown"
-        line = self.current_token.line if self.current_token else 0
-        col = self.current_token.column if self.current_token else 0
-        
-        
-        ya_existe = False
-        if self.scope_actual == "global":
-            if self.ts.tabla_global.buscar(nombre_var): ya_existe = True
-        else:
-            tabla_local = self.ts.locales.get(self.scope_actual)
-            if tabla_local and tabla_local.buscar(nombre_var): ya_existe = True
-
-        if ya_existe:
-            self.errors.append(SemanticError(line, col, f"Variable '{nombre_var}' ya declarada explícitamente en este ámbito."))
-        else:
-            if self.scope_actual == "global":
-                self.ts.registrar_variable_global(nombre_var, tipo_var)
-            else:
-                self.ts.registrar_variable_local(self.scope_actual, nombre_var, tipo_var)
+        simbolo = self._declarar_variable(tipo_var)
 
         self.eat(TokenType.ID)
         self.V1(tipo_var) 
+        self._nodo(DECLARACION, inicio, marca, tipo_var, simbolo)
 
     # 12. V1 -> ;
     # 13. V1 -> = X ;
-    def V1(self, tipo_esperado=None):
+    def V1(self, tipo_esperado=NINGUNO):
         ct = self.current_token.type if self.current_token else None
         if ct == TokenType.SEMICOLON:
             self.rules.append(12)
@@ -160,50 +267,31 @@ class Parser:
             self.rules.append(13)
             self.eat(TokenType.ASSIGN)
             tipo_expr = self.X() 
-            
-            
-            if tipo_esperado and tipo_expr and tipo_esperado != tipo_expr:
-                 line = self.previous_token.line if self.previous_token else 0
-                 col = self.previous_token.column if self.previous_token else 0
-                 self.errors.append(SemanticError(line, col, f"No se puede inicializar '{tipo_esperado}' con '{tipo_expr}'."))
+            self._comprobar_inicializacion(tipo_esperado, tipo_expr)
 
             self.eat(TokenType.SEMICOLON)
         else:
-            if self.previous_token:
-                line = self.previous_token.line
-                col = self.previous_token.column + len(self.previous_token.lexeme)
-            else:
-                line = self.current_token.line if self.current_token else 0
-                col = self.current_token.column if self.current_token else 0
-            self.errors.append(SyntacticError(line, col, "Se esperaba ';' o '=' en la declaración"))
-            
-            safe_tokens = [TokenType.FUNCTION, TokenType.LET, TokenType.IF, TokenType.DO, TokenType.READ, TokenType.WRITE, TokenType.RETURN, TokenType.RBRACE, TokenType.EOF]
-            if self.current_token and self.current_token.type not in safe_tokens:
-                self.advance()
+            self._error_declaracion()
 
     # 14. F -> function H id ( A ) B
     def F(self):
+        inicio, marca = self.current_token, len(self._nodos)
         self.rules.append(14)
         self.eat(TokenType.FUNCTION)
         
         tipo_retorno = self.H()
-        nombre_func = self.current_token.lexeme if self.current_token else "unknown"
-        
-        self.ts.registrar_funcion(nombre_func, tipo_retorno)
+        simbolo = self._declarar_funcion(tipo_retorno)
         
         self.eat(TokenType.ID)
         
-        self.scope_actual = nombre_func
-        self.tipo_retorno_actual = tipo_retorno 
-        
         self.eat(TokenType.LPAREN)
         self.A() 
         self.eat(TokenType.RPAREN)
         
         self.B() 
         
-        self.scope_actual = "global"
-        self.tipo_retorno_actual = None
+        self._cerrar_funcion()
+        self._nodo(FUNCION, inicio, marca, tipo_retorno, simbolo)
 
     # 15. H -> T
     # 16. H -> void
@@ -212,7 +300,7 @@ class Parser:
         if ct == TokenType.VOID:
             self.rules.append(16)
             self.eat(TokenType.VOID)
-            return "void"
+            return VOID
         else:
             self.rules.append(15)
             return self.T()
@@ -225,19 +313,12 @@ class Parser:
         if ct == TokenType.VOID:
             self.rules.append(18)
             self.eat(TokenType.VOID)
-        elif ct in [TokenType.INT, TokenType.FLOAT, TokenType.BOOLEAN, TokenType.STRING]:
+        elif ct in FIRST_T:
             self.rules.append(17)
             
             tipo_param = self.T()
-            nombre_param = self.current_token.lexeme
-            line = self.current_token.line
-            col = self.current_token.column
-            
-            tabla_local = self.ts.locales.get(self.scope_actual)
-            if tabla_local and tabla_local.buscar(nombre_param):
-                 self.errors.append(SemanticError(line, col, f"Parámetro '{nombre_param}' repetido."))
-            else:
-                self.ts.registrar_variable_local(self.scope_actual, nombre_param, tipo_param)
+            self._nodo(PARAMETRO, self.current_token, len(self._nodos), tipo_param,
+                       self._declarar_parametro(tipo_param))
 
             self.eat(TokenType.ID)
             self.A1()
@@ -247,54 +328,49 @@ class Parser:
     # 20. A1 -> , T id A1
     # 21. A1 -> lambda
     def A1(self):
-        ct = self.current_token.type if self.current_token else None
-        if ct == TokenType.COMMA:
+        while self.current_token and self.current_token.type == TokenType.COMMA:
             self.rules.append(20)
             self.eat(TokenType.COMMA)
             
             tipo_param = self.T()
-            nombre_param = self.current_token.lexeme
-            
-            tabla_local = self.ts.locales.get(self.scope_actual)
-            if tabla_local and tabla_local.buscar(nombre_param):
-                 pass 
-            else:
-                self.ts.registrar_variable_local(self.scope_actual, nombre_param, tipo_param)
+            # Tras el primero, un parámetro repetido se ignora sin error
+            self._nodo(PARAMETRO, self.current_token, len(self._nodos), tipo_param,
+                       self._declarar_parametro(tipo_param, avisar=False))
             
             self.eat(TokenType.ID)
-            self.A1()
-        else:
-            self.rules.append(21)
+        self.rules.append(21)
 
     # 22. B -> { LS }
     def B(self):
+        inicio, marca = self.current_token, len(self._nodos)
         self.rules.append(22)
         self.eat(TokenType.LBRACE)
         self.LS()
         self.eat(TokenType.RBRACE)
+        self._nodo(BLOQUE, inicio, marca)
 
     # 23. LS -> S LS
     # 24. LS -> V LS 
     # 25. LS -> lambda
     def LS(self):
-        ct = self.current_token.type if self.current_token else None
-        
-        if ct == TokenType.LET:
-            self.rules.append(24)
-            self.V()
-            self.LS()
-        elif ct in [TokenType.IF, TokenType.DO, TokenType.READ, TokenType.WRITE, 
-                    TokenType.RETURN, TokenType.LBRACE, TokenType.ID]:
-            self.rules.append(23)
-            self.S()
-            self.LS()
-        else:
-            self.rules.append(25)
+        while True:
+            ct = self.current_token.type if self.current_token else None
+            
+            if ct == TokenType.LET:
+                self.rules.append(24)
+                self.V()
+            elif ct in FIRST_S:
+                self.rules.append(23)
+                self.S()
+            else:
+                self.rules.append(25)
+                return
 
     # ------------------ SENTENCIAS ------------------
 
     # S -> Sentencia General
     def S(self):
+        inicio, marca = self.current_token, len(self._nodos)
         ct = self.current_token.type if self.current_token else None
 
         # 26. S -> if ( X ) SS
@@ -304,12 +380,11 @@ class Parser:
             self.eat(TokenType.LPAREN)
             
             tipo_cond = self.X()
-            if tipo_cond != "boolean":
-                self.errors.append(SemanticError(self.previous_token.line, self.previous_token.column, 
-                                                 f"Condición del 'if' debe ser boolean, se encontró '{tipo_cond}'."))
+            self._comprobar_condicion("if", tipo_cond)
             
             self.eat(TokenType.RPAREN)
             self.SS() 
+            self._nodo(IF, inicio, marca)
         
         else:
             self.rules.append(27)
@@ -317,40 +392,35 @@ class Parser:
 
     # SS -> Sentencia Simple
     def SS(self):
+        inicio, marca = self.current_token, len(self._nodos)
         ct = self.current_token.type if self.current_token else None
         
         # 28. SS -> do B while ( X ) ;
         if ct == TokenType.DO:
             self.rules.append(28)
             self.eat(TokenType.DO)
+            self._abrir_bloque()
             self.B()
+            self._cerrar_bloque()
             self.eat(TokenType.WHILE)
             self.eat(TokenType.LPAREN)
             
             tipo_cond = self.X()
-            if tipo_cond != "boolean":
-                self.errors.append(SemanticError(self.previous_token.line, self.previous_token.column, 
-                                                 f"Condición del 'while' debe ser boolean, se encontró '{tipo_cond}'."))
+            self._comprobar_condicion("while", tipo_cond)
 
             self.eat(TokenType.RPAREN)
             self.eat(TokenType.SEMICOLON)
+            self._nodo(DO_WHILE, inicio, marca)
             
         # 29. SS -> read id ;
         elif ct == TokenType.READ:
             self.rules.append(29)
             self.eat(TokenType.READ)
-            
-            if self.current_token.type == TokenType.ID:
-                nombre_var = self.current_token.lexeme
-                simbolo = self._buscar_simbolo_o_declarar_implicito(nombre_var)
-                
-                categoria = getattr(simbolo, "categoria", "Variable")
-                if categoria == "Función":
-                     self.errors.append(SemanticError(self.current_token.line, self.current_token.column, 
-                                        f"No se puede leer ('read') sobre la función '{nombre_var}'."))
+            simbolo = self._comprobar_lectura()
 
             self.eat(TokenType.ID)
             self.eat(TokenType.SEMICOLON)
+            self._nodo(READ, inicio, marca, dato=simbolo)
             
         # 30. SS -> write X ;
         elif ct == TokenType.WRITE:
@@ -358,6 +428,7 @@ class Parser:
             self.eat(TokenType.WRITE)
             self.X()
             self.eat(TokenType.SEMICOLON)
+            self._nodo(WRITE, inicio, marca)
             
         # 31. SS -> return R1 ;
         elif ct == TokenType.RETURN:
@@ -365,116 +436,80 @@ class Parser:
             self.eat(TokenType.RETURN)
             
             tipo_retornado = self.R1()
-            
-            if self.tipo_retorno_actual and self.tipo_retorno_actual != tipo_retornado:
-                 self.errors.append(SemanticError(self.previous_token.line, self.previous_token.column, 
-                                                  f"Función espera retornar '{self.tipo_retorno_actual}' pero retorna '{tipo_retornado}'."))
+            self._comprobar_retorno(tipo_retornado)
 
             self.eat(TokenType.SEMICOLON)
+            self._nodo(RETURN, inicio, marca, tipo_retornado)
             
         # 34. SS -> B
         elif ct == TokenType.LBRACE:
             self.rules.append(34)
+            self._abrir_bloque()
             self.B()
+            self._cerrar_bloque()
             
         # 35. SS -> id SE1
         elif ct == TokenType.ID:
             self.rules.append(35)
             
-            nombre_var = self.current_token.lexeme
-            simbolo = self._buscar_simbolo_o_declarar_implicito(nombre_var)
+            simbolo = self.ts.resolver_o_declarar(self.current_token.lexeme)
 
             self.eat(TokenType.ID)
             self.SE1(simbolo) 
             
         else:
-             line = self.current_token.line if self.current_token else 0
-             col = self.current_token.column if self.current_token else 0
-             self.errors.append(SyntacticError(line, col, "Sentencia simple esperada"))
-             self.advance()
-
-    # Metodo auxiliar para las declaraciones implícita
-    def _buscar_simbolo_o_declarar_implicito(self, nombre_var):
-        simbolo = None
-        if self.scope_actual != "global":
-            tabla_local = self.ts.locales.get(self.scope_actual)
-            if tabla_local: simbolo = tabla_local.buscar(nombre_var)
-        if not simbolo:
-            simbolo = self.ts.tabla_global.buscar(nombre_var)
-        
-        if not simbolo:
-            self.ts.registrar_variable_global(nombre_var, "int")
-            simbolo = self.ts.tabla_global.buscar(nombre_var)
-        return simbolo
+            self._error_sentencia()
 
     # 32. R1 -> X
     # 33. R1 -> lambda
     def R1(self):
         ct = self.current_token.type if self.current_token else None
-        first_X = [
-            TokenType.LPAREN, TokenType.INT_CONST, TokenType.FLOAT_CONST, TokenType.STRING_CONST,
-            TokenType.TRUE, TokenType.FALSE, TokenType.ID, TokenType.NOT
-        ]
-        if ct in first_X:
+        if ct in FIRST_X:
             self.rules.append(32)
             return self.X()
         
         else:
             self.rules.append(33)
-            return "void"
+            return VOID
 
     # SE1 -> ...
     def SE1(self, simbolo=None):
+        # El nodo de la sentencia se sitúa en el identificador ya consumido
+        inicio, marca = self.previous_token, len(self._nodos)
+        tipo = CODIGO[simbolo.tipo] if simbolo else NINGUNO
         ct = self.current_token.type if self.current_token else None
         
-        tipo_lhs = simbolo.tipo if simbolo else "error"
-        categoria = getattr(simbolo, "categoria", "Variable") if simbolo else "Variable"
-        
         # 36. SE1 -> = X ;
         if ct == TokenType.ASSIGN:
             self.rules.append(36)
             self.eat(TokenType.ASSIGN)
             tipo_rhs = self.X()
-            
-            if categoria == "Función":
-                self.errors.append(SemanticError(self.previous_token.line, self.previous_token.column, 
-                                f"No se puede asignar un valor a '{simbolo.lexema}' porque es una Función."))
-            
-            elif tipo_lhs and tipo_rhs and tipo_lhs != "error" and tipo_rhs != "error":
-                if tipo_lhs != tipo_rhs:
-                     self.errors.append(SemanticError(self.previous_token.line, self.previous_token.column, 
-                                                      f"No se puede asignar '{tipo_rhs}' a variable '{tipo_lhs}'."))
+            self._comprobar_asignacion(simbolo, tipo_rhs)
 
             self.eat(TokenType.SEMICOLON)
+            self._nodo(ASIGNACION, inicio, marca, tipo, simbolo)
             
         # 37. SE1 -> |= X ;
         elif ct == TokenType.OR_ASSIGN:
             self.rules.append(37)
             self.eat(TokenType.OR_ASSIGN)
             self.X()
-            if categoria == "Función":
-                 self.errors.append(SemanticError(self.previous_token.line, self.previous_token.column, 
-                                f"No se puede operar con '{simbolo.lexema}' porque es una Función."))
+            self._comprobar_or_asignacion(simbolo)
             self.eat(TokenType.SEMICOLON)
+            self._nodo(OR_ASIGNACION, inicio, marca, tipo, simbolo)
             
         # 38. SE1 -> ( G ) ; 
         elif ct == TokenType.LPAREN:
             self.rules.append(38)
-            
-            if simbolo and categoria != "Función":
-                self.errors.append(SemanticError(self.previous_token.line, self.previous_token.column, 
-                                f"El identificador '{simbolo.lexema}' es una Variable, no una Función. No se puede invocar."))
+            self._comprobar_llamada(simbolo)
 
             self.eat(TokenType.LPAREN)
             self.G()
             self.eat(TokenType.RPAREN)
             self.eat(TokenType.SEMICOLON)
+            self._nodo(LLAMADA, inicio, marca, tipo, simbolo)
         else:
-            line = self.current_token.line if self.current_token else 0
-            col = self.current_token.column if self.current_token else 0
-            msg = "Se esperaba una asignación ('=') o una llamada a función ('(')"
-            self.errors.append(SyntacticError(line, col, msg))
-            self.advance()
+            self._error_asignacion()
 
     # --- EXPRESIONES ---
 
@@ -482,9 +517,7 @@ class Parser:
     # 40. G -> lambda
     def G(self):
         ct = self.current_token.type if self.current_token else None
-        first_X = [ TokenType.LPAREN, TokenType.INT_CONST, TokenType.FLOAT_CONST, TokenType.STRING_CONST,
-            TokenType.TRUE, TokenType.FALSE, TokenType.ID, TokenType.NOT ]
-        if ct in first_X:
+        if ct in FIRST_X:
             self.rules.append(39)
             self.X()
             self.G1()
@@ -494,85 +527,90 @@ class Parser:
     # 41. G1 -> , X G1
     # 42. G1 -> lambda
     def G1(self):
-        ct = self.current_token.type if self.current_token else None
-        if ct == TokenType.COMMA:
+        while self.current_token and self.current_token.type == TokenType.COMMA:
             self.rules.append(41)
             self.eat(TokenType.COMMA)
             self.X()
-            self.G1()
-        else:
-            self.rules.append(42)
+        self.rules.append(42)
 
     # 43. X -> D R
     def X(self):
+        marca = len(self._nodos)
         self.rules.append(43)
         tipo_d = self.D()
+        operador = self.current_token
         tipo_r = self.R(tipo_d) 
         
+        # Una cadena de '<' es un único nodo con todos los operandos
+        if len(self._nodos) > marca + 1:
+            self._nodo(MENOR, operador, marca, tipo_r)
         if tipo_r: return tipo_r
         return tipo_d
 
     # 44. R -> < D R
     # 45. R -> lambda
-    def R(self, tipo_izq=None):
-        ct = self.current_token.type if self.current_token else None
-        if ct == TokenType.LT:
+    def R(self, tipo_izq=NINGUNO):
+        tipo = NINGUNO
+        while self.current_token and self.current_token.type == TokenType.LT:
             self.rules.append(44)
             self.eat(TokenType.LT)
             tipo_der = self.D()
+            self._comprobar_comparacion(tipo_izq, tipo_der)
+            tipo = RESULTADO_MENOR[tipo_izq][tipo_der]
             
-            if tipo_izq and tipo_der and tipo_izq != tipo_der:
-                 self.errors.append(SemanticError(self.previous_token.line, self.previous_token.column, 
-                                                  f"Comparación incompatible: '{tipo_izq}' < '{tipo_der}'."))
-            
-            self.R(tipo_der)
-            return "boolean" 
-        else:
-            self.rules.append(45)
-            return None
+            # Cada comparación se hace con el operando anterior
+            tipo_izq = tipo_der
+        self.rules.append(45)
+        return tipo
 
     # 46. D -> M D1
     def D(self):
+        marca = len(self._nodos)
         self.rules.append(46)
         tipo_m = self.M()
+        operador = self.current_token
         tipo_d1 = self.D1(tipo_m)
         
+        if len(self._nodos) > marca + 1:
+            self._nodo(SUMA, operador, marca, tipo_m)
         if tipo_d1: return tipo_d1
         return tipo_m
 
     # 47. D1 -> + M D1
     # 48. D1 -> lambda
-    def D1(self, tipo_izq=None):
-        ct = self.current_token.type if self.current_token else None
-        if ct == TokenType.PLUS:
+    def D1(self, tipo_izq=NINGUNO):
+        tipo = NINGUNO
+        while self.current_token and self.current_token.type == TokenType.PLUS:
             self.rules.append(47)
             self.eat(TokenType.PLUS)
             tipo_der = self.M()
+            self._comprobar_suma(tipo_izq, tipo_der)
             
-            if tipo_izq and tipo_der and tipo_izq != tipo_der:
-                self.errors.append(SemanticError(self.previous_token.line, self.previous_token.column, 
-                                                  f"Suma incompatible: '{tipo_izq}' + '{tipo_der}'."))
-            
-            return self.D1(tipo_izq) or tipo_izq
-        else:
-            self.rules.append(48)
-            return None
+            # Todos los sumandos se comparan con el primero
+            tipo = RESULTADO_SUMA[tipo_izq][tipo_der]
+        self.rules.append(48)
+        return tipo
 
     # 49. M -> ! M
     # 50. M -> K
     def M(self):
-        ct = self.current_token.type if self.current_token else None
-        if ct == TokenType.NOT:
+        operadores = []
+        while self.current_token and self.current_token.type == TokenType.NOT:
             self.rules.append(49)
+            operadores.append(self.current_token)
             self.eat(TokenType.NOT)
-            tipo = self.M()
-            if tipo != "boolean":
-                 self.errors.append(SemanticError(self.previous_token.line, self.previous_token.column, 
-                                                  f"Operador '!' espera boolean, se encontró '{tipo}'."))
-            return "boolean"
-        else:
-            self.rules.append(50)
-            return self.K()
+        marca = len(self._nodos)
+        self.rules.append(50)
+        tipo = self.K()
+        if not operadores:
+            return tipo
+        # Sólo el '!' más interno puede recibir algo que no sea boolean. Se
+        # comprueba antes de crear los nodos, como en ParserLL1 (@negar), para
+        # que un análisis cortado por max_errors deje el mismo árbol
+        tipo = self._comprobar_negacion(tipo)
+        for operador in reversed(operadores):
+            self._nodo(NOT, operador, marca, BOOLEAN)
+        return tipo
 
     # 51. K -> ( X )
     # 52. K -> int
@@ -594,55 +632,249 @@ class Parser:
         elif ct == TokenType.INT_CONST:
             self.rules.append(52)
             self.eat(TokenType.INT_CONST)
-            return "int"
+            self._literal(ENTERO, INT)
+            return INT
             
         elif ct == TokenType.FLOAT_CONST:
             self.rules.append(53)
             self.eat(TokenType.FLOAT_CONST)
-            return "float"
+            self._literal(REAL, FLOAT)
+            return FLOAT
             
         elif ct == TokenType.STRING_CONST:
             self.rules.append(54)
             self.eat(TokenType.STRING_CONST)
-            return "string"
+            self._literal(CADENA, STRING)
+            return STRING
             
         elif ct == TokenType.TRUE:
             self.rules.append(55)
             self.eat(TokenType.TRUE)
-            return "boolean"
+            self._literal(LOGICO, BOOLEAN, True)
+            return BOOLEAN
             
         elif ct == TokenType.FALSE:
             self.rules.append(56)
             self.eat(TokenType.FALSE)
-            return "boolean"
+            self._literal(LOGICO, BOOLEAN, False)
+            return BOOLEAN
             
         elif ct == TokenType.ID:
             self.rules.append(57)
-            nombre_var = self.current_token.lexeme
-            simbolo = self._buscar_simbolo_o_declarar_implicito(nombre_var)
-            tipo = simbolo.tipo if simbolo else "error"
+            inicio, marca = self.current_token, len(self._nodos)
+            simbolo = self._usar_identificador()
+            tipo = CODIGO[simbolo.tipo] if simbolo else ERROR
             
             self.eat(TokenType.ID)
-            self.K1() 
+            llamada = self.K1() 
+            self._nodo(LLAMADA if llamada else VARIABLE, inicio, marca, tipo, simbolo)
             return tipo
             
         else:
-             line = self.current_token.line if self.current_token else 0
-             col = self.current_token.column if self.current_token else 0
-             self.errors.append(SyntacticError(line, col, "Factor inesperado en expresión"))
-             self.advance()
-             return "error"
+            return self._error_factor()
 
     # 58. K1 -> ( G )
     # 59. K1 -> lambda
     def K1(self):
+        """Devuelve si el identificador era una llamada."""
         ct = self.current_token.type if self.current_token else None
         if ct == TokenType.LPAREN:
             self.rules.append(58)
             self.eat(TokenType.LPAREN)
             self.G()
             self.eat(TokenType.RPAREN)
+            return True
         else:
             self.rules.append(59)
+            return False
 
             
+
+    # ------------------ ÁRBOL SINTÁCTICO ------------------
+    def _nodo(self, clase, token, desde, tipo=NINGUNO, dato=None):
+        # Nodo cuyos hijos son los que esperan en la pila desde `desde`
+        if self.ast is None:
+            return
+        hijos = self._nodos[desde:]
+        del self._nodos[desde:]
+        offset = token.offset if token is not None else 0
+        self._nodos.append(self.ast.add(clase, offset, tipo, dato, hijos))
+
+    def _literal(self, clase, tipo, valor=None):
+        # Hoja del literal recién consumido, con su valor ya convertido
+        if self.ast is None:
+            return
+        token = self.previous_token
+        self._nodo(clase, token, len(self._nodos), tipo, token.value if valor is None else valor)
+
+    # ------------------ ACCIONES SEMÁNTICAS ------------------
+    # Compartidas con el analizador de tabla (an_sintactico_ll1), que las
+    # invoca desde las acciones @nombre de la gramática.
+
+    def _posicion(self, token):
+        return (token.line, token.column) if token else (0, 0)
+
+    def _declarar_variable(self, tipo_var):
+        # V: el token actual es el identificador declarado. Devuelve su
+        # entrada (la ya existente si estaba declarada).
+        nombre_var = self.current_token.lexeme if self.current_token else "unknown"
+        line, col = self._posicion(self.current_token)
+
+        ya_existe = self.ts.en_ambito_actual(nombre_var)
+        if ya_existe:
+            self._anotar(SemanticError(line, col, f"Variable '{nombre_var}' ya declarada explícitamente en este ámbito."))
+            return ya_existe
+        if self.ts.nivel == 0:
+            return self.ts.registrar_variable_global(nombre_var, TIPOS[tipo_var])
+        return self.ts.registrar_variable_local(self.ts.ambito_actual, nombre_var, TIPOS[tipo_var])
+
+    def _comprobar_inicializacion(self, tipo_esperado, tipo_expr):
+        if not COMPATIBLES_INICIALIZACION[tipo_esperado][tipo_expr]:
+            line, col = self._posicion(self.previous_token)
+            self._anotar(SemanticError(line, col, f"No se puede inicializar '{TIPOS[tipo_esperado]}' con '{TIPOS[tipo_expr]}'."))
+
+    def _declarar_funcion(self, tipo_retorno):
+        # F: el token actual es el nombre de la función
+        nombre_func = self.current_token.lexeme if self.current_token else "unknown"
+        simbolo = self.ts.registrar_funcion(nombre_func, TIPOS[tipo_retorno])
+        self.ts.abrir_funcion(nombre_func)
+        self.tipo_retorno_actual = tipo_retorno
+        return simbolo
+
+    def _cerrar_funcion(self):
+        self.ts.cerrar_ambito()
+        self.tipo_retorno_actual = NINGUNO
+
+    def _abrir_bloque(self):
+        if self.bloques:
+            self.ts.abrir_bloque()
+
+    def _cerrar_bloque(self):
+        if self.bloques:
+            self.ts.cerrar_ambito()
+
+    def _declarar_parametro(self, tipo_param, avisar=True):
+        nombre_param = self.current_token.lexeme
+        line = self.current_token.line
+        col = self.current_token.column
+
+        repetido = self.ts.en_ambito_actual(nombre_param)
+        if repetido:
+            if avisar:
+                self._anotar(SemanticError(line, col, f"Parámetro '{nombre_param}' repetido."))
+            return repetido
+        return self.ts.registrar_variable_local(self.ts.ambito_actual, nombre_param, TIPOS[tipo_param])
+
+    def _comprobar_condicion(self, sentencia, tipo_cond):
+        if not CONDICION_VALIDA[tipo_cond]:
+            self._anotar(SemanticError(self.previous_token.line, self.previous_token.column, 
+                                             f"Condición del '{sentencia}' debe ser boolean, se encontró '{TIPOS[tipo_cond]}'."))
+
+    def _comprobar_lectura(self):
+        # read: el token actual debería ser la variable leída (None si no lo es)
+        simbolo = None
+        if self.current_token.type == TokenType.ID:
+            nombre_var = self.current_token.lexeme
+            simbolo = self.ts.resolver_o_declarar(nombre_var)
+
+            categoria = getattr(simbolo, "categoria", "Variable")
+            if categoria == "Función":
+                self._anotar(SemanticError(self.current_token.line, self.current_token.column, 
+                                   f"No se puede leer ('read') sobre la función '{nombre_var}'."))
+        return simbolo
+
+    def _comprobar_retorno(self, tipo_retornado):
+        if not COMPATIBLES_RETORNO[self.tipo_retorno_actual][tipo_retornado]:
+            self._anotar(SemanticError(self.previous_token.line, self.previous_token.column, 
+                                             f"Función espera retornar '{TIPOS[self.tipo_retorno_actual]}' pero retorna '{TIPOS[tipo_retornado]}'."))
+
+    def _comprobar_asignacion(self, simbolo, tipo_rhs):
+        tipo_lhs = CODIGO[simbolo.tipo] if simbolo else ERROR
+        categoria = getattr(simbolo, "categoria", "Variable") if simbolo else "Variable"
+
+        if categoria == "Función":
+            self._anotar(SemanticError(self.previous_token.line, self.previous_token.column, 
+                            f"No se puede asignar un valor a '{simbolo.lexema}' porque es una Función."))
+
+        elif not COMPATIBLES_ASIGNACION[tipo_lhs][tipo_rhs]:
+            self._anotar(SemanticError(self.previous_token.line, self.previous_token.column, 
+                                             f"No se puede asignar '{TIPOS[tipo_rhs]}' a variable '{TIPOS[tipo_lhs]}'."))
+
+    def _comprobar_or_asignacion(self, simbolo):
+        if simbolo and getattr(simbolo, "categoria", "Variable") == "Función":
+            self._anotar(SemanticError(self.previous_token.line, self.previous_token.column, 
+                            f"No se puede operar con '{simbolo.lexema}' porque es una Función."))
+
+    def _comprobar_llamada(self, simbolo):
+        if simbolo and getattr(simbolo, "categoria", "Variable") != "Función":
+            self._anotar(SemanticError(self.previous_token.line, self.previous_token.column, 
+                            f"El identificador '{simbolo.lexema}' es una Variable, no una Función. No se puede invocar."))
+
+    def _comprobar_comparacion(self, tipo_izq, tipo_der):
+        if not COMPATIBLES_MENOR[tipo_izq][tipo_der]:
+            self._anotar(SemanticError(self.previous_token.line, self.previous_token.column, 
+                                             f"Comparación incompatible: '{TIPOS[tipo_izq]}' < '{TIPOS[tipo_der]}'."))
+
+    def _comprobar_suma(self, tipo_izq, tipo_der):
+        if not COMPATIBLES_SUMA[tipo_izq][tipo_der]:
+            self._anotar(SemanticError(self.previous_token.line, self.previous_token.column, 
+                                             f"Suma incompatible: '{TIPOS[tipo_izq]}' + '{TIPOS[tipo_der]}'."))
+
+    def _comprobar_negacion(self, tipo):
+        if not NEGABLE[tipo]:
+            self._anotar(SemanticError(self.previous_token.line, self.previous_token.column, 
+                                             f"Operador '!' espera boolean, se encontró '{TIPOS[tipo]}'."))
+        return RESULTADO_NOT[tipo]
+
+    def _usar_identificador(self):
+        # K -> id K1: el token actual es el identificador usado
+        return self.ts.resolver_o_declarar(self.current_token.lexeme)
+
+    # Errores de los no terminales sin producción por defecto
+    def _error_tipo(self):
+        line, col = self._posicion(self.current_token)
+        self._error_sintactico(line, col, "Se esperaba un TIPO")
+        if self.recovery:
+            self._recuperar("T")
+        else:
+            self.advance()
+        return VOID
+
+    def _error_declaracion(self):
+        if self.previous_token:
+            line = self.previous_token.line
+            col = self.previous_token.column + len(self.previous_token.lexeme)
+        else:
+            line, col = self._posicion(self.current_token)
+        self._error_sintactico(line, col, "Se esperaba ';' o '=' en la declaración")
+
+        if self.recovery:
+            self._recuperar("V1", fin_sentencia=True)
+        elif self.current_token and self.current_token.type not in SAFE_TOKENS:
+            self.advance()
+
+    def _error_sentencia(self):
+        line, col = self._posicion(self.current_token)
+        self._error_sintactico(line, col, "Sentencia simple esperada")
+        if self.recovery:
+            self._recuperar("SS", fin_sentencia=True)
+        else:
+            self.advance()
+
+    def _error_asignacion(self):
+        line, col = self._posicion(self.current_token)
+        msg = "Se esperaba una asignación ('=') o una llamada a función ('(')"
+        self._error_sintactico(line, col, msg)
+        if self.recovery:
+            self._recuperar("SE1", fin_sentencia=True)
+        else:
+            self.advance()
+
+    def _error_factor(self):
+        line, col = self._posicion(self.current_token)
+        self._error_sintactico(line, col, "Factor inesperado en expresión")
+        if self.recovery:
+            self._recuperar("K")
+        else:
+            self.advance()
+        return ERROR
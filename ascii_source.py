@@ -0,0 +1,58 @@
+import re
+
+
+class AsciiSource:
+    """Fuente ASCII guardada como bytes (p.ej. un fichero proyectado con
+    mmap) que se lee como un str.
+
+    Cada byte es un carácter, así que las posiciones coinciden con las del
+    texto; sólo se decodifica lo que se pide (un lexema, un trozo), nunca la
+    fuente entera. Ofrece lo que usan de la fuente el Lexer, LineIndex,
+    TokenBuffer, incremental y token_file.
+    """
+
+    __slots__ = ("data", "_n", "_find", "_rfind")
+
+    def __init__(self, data):
+        self.data = data
+        self._n = len(data)
+        # memoryview no tiene find/rfind: se busca con una expresión
+        self._find = getattr(data, "find", None)
+        self._rfind = getattr(data, "rfind", None)
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return str(self.data[i], "ascii")
+        return chr(self.data[i])
+
+    def _rango(self, start, end):
+        n = self._n
+        start = 0 if start is None else (max(0, start + n) if start < 0 else start)
+        end = n if end is None else (max(0, end + n) if end < 0 else min(end, n))
+        return start, end
+
+    def find(self, sub, start=None, end=None):
+        start, end = self._rango(start, end)
+        if self._find is not None:
+            return self._find(sub.encode("ascii"), start, end)
+        m = re.compile(re.escape(sub.encode("ascii"))).search(self.data, start, end)
+        return m.start() if m else -1
+
+    def rfind(self, sub, start=None, end=None):
+        start, end = self._rango(start, end)
+        if self._rfind is not None:
+            return self._rfind(sub.encode("ascii"), start, end)
+        i = -1
+        for m in re.compile(re.escape(sub.encode("ascii"))).finditer(self.data, start, end):
+            i = m.start()
+        return i
+
+    def encode(self, encoding="utf-8", errors="strict"):
+        # ASCII ya es UTF-8 válido
+        return bytes(self.data)
+
+    def __str__(self):
+        return str(self.data, "ascii")
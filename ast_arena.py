@@ -0,0 +1,180 @@
+from array import array
+
+from tipos import TIPOS, NINGUNO
+
+# Clases de nodo (columna `clases`)
+NODOS = (
+    "PROGRAMA",
+    # Declaraciones
+    "DECLARACION", "FUNCION", "PARAMETRO",
+    # Sentencias
+    "BLOQUE", "IF", "DO_WHILE", "READ", "WRITE", "RETURN",
+    "ASIGNACION", "OR_ASIGNACION", "LLAMADA",
+    # Expresiones
+    "MENOR", "SUMA", "NOT", "ENTERO", "REAL", "CADENA", "LOGICO", "VARIABLE",
+)
+(PROGRAMA, DECLARACION, FUNCION, PARAMETRO, BLOQUE, IF, DO_WHILE, READ, WRITE, RETURN,
+ ASIGNACION, OR_ASIGNACION, LLAMADA, MENOR, SUMA, NOT, ENTERO, REAL, CADENA, LOGICO,
+ VARIABLE) = range(len(NODOS))
+
+# Nodos cuyo `dato` es el valor del literal; en el resto es el símbolo
+LITERALES = frozenset({ENTERO, REAL, CADENA, LOGICO})
+
+# La columna `tipos` guarda el código del tipo inferido (tipos.TIPOS); 0 = sin tipo
+
+
+class AstArena:
+    """Árbol sintáctico guardado en columnas paralelas, un índice por nodo.
+
+    Los nodos se crean en postorden (los hijos antes que el padre), así que
+    los hijos de cada nodo ocupan un tramo contiguo de `hijos`, de
+    hijos_desde[i] a hijos_desde[i + 1]. La raíz es el último nodo (None
+    si la arena está vacía).
+    """
+
+    def __init__(self):
+        self.clases = array("B")
+        # Desplazamiento en la fuente del token que da nombre al nodo
+        self.offsets = array("I")
+        self.tipos = array("B")
+        # Símbolo resuelto (SymbolEntry) o valor del literal; None si no hay
+        self.datos = []
+        self.hijos = array("I")
+        self.hijos_desde = array("I", [0])
+
+    def add(self, clase, offset, tipo=NINGUNO, dato=None, hijos=()):
+        i = len(self.clases)
+        self.clases.append(clase)
+        self.offsets.append(offset)
+        self.tipos.append(tipo)
+        self.datos.append(dato)
+        self.hijos.extend(hijos)
+        self.hijos_desde.append(len(self.hijos))
+        return i
+
+    def __len__(self):
+        return len(self.clases)
+
+    def anexar(self, otra, desplazamiento=0, simbolo=None):
+        """Copia al final todos los nodos de otra arena y devuelve el índice
+        que pasa a tener su primer nodo.
+
+        Los offsets se mueven `desplazamiento` posiciones; si se da
+        simbolo(entrada), cada símbolo se sustituye por lo que devuelva.
+        """
+        base, base_hijos = len(self.clases), len(self.hijos)
+        self.clases.extend(otra.clases)
+        self.tipos.extend(otra.tipos)
+        if desplazamiento:
+            self.offsets.extend(o + desplazamiento for o in otra.offsets)
+        else:
+            self.offsets.extend(otra.offsets)
+        if simbolo is None:
+            self.datos.extend(otra.datos)
+        else:
+            self.datos.extend(d if c in LITERALES or d is None else simbolo(d)
+                              for c, d in zip(otra.clases, otra.datos))
+        self.hijos.extend(h + base for h in otra.hijos)
+        self.hijos_desde.extend(h + base_hijos for h in otra.hijos_desde[1:])
+        return base
+
+    @property
+    def raiz(self):
+        return len(self.clases) - 1 if self.clases else None
+
+    # --- acceso por columnas ---
+    def clase(self, i):
+        return NODOS[self.clases[i]]
+
+    def tipo(self, i):
+        return TIPOS[self.tipos[i]]
+
+    def simbolo(self, i):
+        return None if self.clases[i] in LITERALES else self.datos[i]
+
+    def valor(self, i):
+        return self.datos[i] if self.clases[i] in LITERALES else None
+
+    def hijos_de(self, i):
+        return self.hijos[self.hijos_desde[i]:self.hijos_desde[i + 1]]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.clases)
+        if not 0 <= i < len(self.clases):
+            raise IndexError("índice de nodo fuera de rango")
+        return NodeView(self, i)
+
+    def preorden(self, i=None):
+        """Índices de los nodos del subárbol de i (la raíz por defecto)."""
+        if i is None:
+            i = self.raiz
+        pila = [] if i is None else [i]
+        while pila:
+            i = pila.pop()
+            yield i
+            pila.extend(reversed(self.hijos_de(i)))
+
+    def volcar(self):
+        # Una línea por nodo, sangrada según la profundidad
+        lineas = []
+        pila = [] if self.raiz is None else [(self.raiz, 0)]
+        while pila:
+            i, prof = pila.pop()
+            nodo = NodeView(self, i)
+            partes = [nodo.clase]
+            if nodo.tipo:
+                partes.append(nodo.tipo)
+            if nodo.simbolo is not None:
+                partes.append(f"'{nodo.simbolo.lexema}'")
+            elif self.clases[i] in LITERALES:
+                partes.append(repr(nodo.valor))
+            lineas.append("  " * prof + " ".join(partes) + f" @{nodo.offset}")
+            pila.extend((h, prof + 1) for h in reversed(self.hijos_de(i)))
+        return "\n".join(lineas)
+
+    def nbytes(self):
+        # Memoria de las columnas (sin contar los símbolos ni los valores)
+        columnas = (self.clases, self.offsets, self.tipos, self.hijos, self.hijos_desde)
+        return sum(c.itemsize * len(c) for c in columnas) + 8 * len(self.datos)
+
+
+class NodeView:
+    """Vista ligera del nodo i de un AstArena."""
+
+    __slots__ = ("_arena", "_i")
+
+    def __init__(self, arena, i):
+        self._arena = arena
+        self._i = i
+
+    @property
+    def index(self):
+        return self._i
+
+    @property
+    def clase(self):
+        return self._arena.clase(self._i)
+
+    @property
+    def offset(self):
+        return self._arena.offsets[self._i]
+
+    @property
+    def tipo(self):
+        return self._arena.tipo(self._i)
+
+    @property
+    def simbolo(self):
+        return self._arena.simbolo(self._i)
+
+    @property
+    def valor(self):
+        return self._arena.valor(self._i)
+
+    @property
+    def hijos(self):
+        return [NodeView(self._arena, h) for h in self._arena.hijos_de(self._i)]
+
+    def __repr__(self):
+        return f"NodeView({self.clase}, tipo={self.tipo!r}, offset={self.offset})"
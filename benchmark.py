@@ -0,0 +1,702 @@
+import argparse
+import hashlib
+import mmap
+import multiprocessing
+import os
+import random
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from an_lexico import Lexer, ENGINES, BINDINGS, HAY_NUMPY
+from Tabla_Simbolos.symbol_table import SymbolTable
+from compilation_context import CompilationContext
+from an_sintactico_semtant import Parser
+from an_sintactico_ll1 import ParserLL1
+from errors import SyntacticError
+from token_file import write_token_file, TokenFile
+from incremental import relex
+from incremental_parse import ParseSession
+from parallel_lex import tokenize_parallel
+from parallel_parse import parse_parallel
+from main import _proyectar_fuente
+from rule_trace import TRACE_MODES, write_trace, write_counts
+
+
+# ---------------- Generación de entradas sintéticas ----------------
+TIPOS = ["int", "float", "boolean", "string"]
+NOMBRES = ["a", "b", "cont", "total", "flag", "msg", "_tmp", "valor"]
+
+
+def _expresion(r, prof=0):
+    k = r.randint(0, 7 if prof < 2 else 4)
+    if k == 0:
+        return str(r.randint(0, 32767))
+    if k == 1:
+        return f"{r.randint(0, 999)}.{r.randint(0, 99)}"
+    if k == 2:
+        return "'" + "hola mundo"[:r.randint(0, 10)] + "'"
+    if k in (3, 4):
+        return r.choice(NOMBRES)
+    if k == 5:
+        return f"{_expresion(r, prof + 1)} + {_expresion(r, prof + 1)}"
+    if k == 6:
+        return f"{_expresion(r, prof + 1)} < {_expresion(r, prof + 1)}"
+    return f"!({_expresion(r, prof + 1)})"
+
+
+def _sentencia(r):
+    k = r.randint(0, 6)
+    if k == 0:
+        return f"let {r.choice(TIPOS)} {r.choice(NOMBRES)} = {_expresion(r)};"
+    if k == 1:
+        return f"if ({_expresion(r)}) write {_expresion(r)};"
+    if k == 2:
+        return f"do {{ read {r.choice(NOMBRES)}; }} while ({_expresion(r)});"
+    if k == 3:
+        return f"{r.choice(NOMBRES)} |= {_expresion(r)}; // acumulado"
+    if k == 4:
+        return f"f{r.randint(0, 9)}({_expresion(r)}, {_expresion(r)});"
+    if k == 5:
+        return f"return {_expresion(r)};"
+    return f"{r.choice(NOMBRES)} = {_expresion(r)};"
+
+
+def generar_fuente(n_funciones, sentencias=20, semilla=1):
+    """Programa sintético determinista y léxicamente válido."""
+    r = random.Random(semilla)
+    lineas = []
+    for i in range(n_funciones):
+        lineas.append(f"let {r.choice(TIPOS)} g{i};")
+        params = ", ".join(f"{r.choice(TIPOS)} p{j}" for j in range(r.randint(0, 3)))
+        lineas.append(f"function {r.choice(TIPOS + ['void'])} f{i}({params}) {{")
+        for _ in range(sentencias):
+            lineas.append("\t" + _sentencia(r))
+        lineas.append("}")
+    return "\n".join(lineas) + "\n"
+
+
+# ---------------- Medidas ----------------
+def _lexear(source, **opciones):
+    return Lexer(source, SymbolTable(), **opciones).tokenize()
+
+
+def _medir_motor(source, engine, repeticiones):
+    # Mejor tiempo de un motor, número de tokens y huella de su salida
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        tokens, _ = _lexear(source, engine=engine)
+        t = time.perf_counter() - inicio
+        mejor = t if mejor is None else min(mejor, t)
+    huella = hashlib.sha1()
+    for tok in tokens:
+        huella.update(f"{tok}\t{tok.line}\t{tok.column}\n".encode())
+    return mejor, len(tokens), huella.hexdigest()
+
+
+def _medir_aparte(source, engine, repeticiones):
+    # Cada motor en un intérprete recién arrancado: en el mismo proceso el
+    # que se mide después hereda el montón y la basura de los anteriores, y
+    # el orden de las medidas llega a cambiar cuál gana
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+        return pool.submit(_medir_motor, source, engine, repeticiones).result()
+
+
+def bench_lexer(source, repeticiones=3):
+    referencia = None
+    for engine in ENGINES:
+        if engine == "numpy" and not HAY_NUMPY:
+            print(f"{engine:>8}: numpy no está instalado")
+            continue
+        mejor, n_tokens, salida = _medir_aparte(source, engine, repeticiones)
+        if referencia is None:
+            referencia = salida
+        elif salida != referencia:
+            raise AssertionError(f"El motor '{engine}' no reproduce la salida de '{ENGINES[0]}'")
+
+        print(f"{engine:>8}: {n_tokens:>9} tokens  {mejor:8.3f} s  {n_tokens / mejor:>12,.0f} tokens/s")
+
+
+def bench_tamanos(funciones, repeticiones=3):
+    # Motor vectorial frente a los escalares según el tamaño de la entrada:
+    # calcular los límites con numpy tiene un coste fijo que sólo compensa
+    # a partir de cierto tamaño. Cada motor se mide en su propio proceso.
+    if not HAY_NUMPY:
+        print("numpy no está instalado: no se puede medir el motor 'numpy'")
+        return
+    motores = ("char", "bytes", "numpy")
+    print(f"{'tamaño':>10}  " + "  ".join(f"{m:>9}" for m in motores) + "  numpy/char")
+    # Tamaño desde el que numpy gana en todos los medidos (el último cruce)
+    supera = None
+    for n in sorted({max(1, funciones // d) for d in (1000, 100, 10, 1)}):
+        source = generar_fuente(n)
+        tiempos = {}
+        referencia = None
+        for engine in motores:
+            tiempos[engine], _, salida = _medir_aparte(source, engine, repeticiones)
+            if referencia is None:
+                referencia = salida
+            elif salida != referencia:
+                raise AssertionError(f"El motor '{engine}' no reproduce la salida de 'char'")
+
+        relacion = tiempos["numpy"] / tiempos["char"]
+        if relacion >= 1:
+            supera = None
+        elif supera is None:
+            supera = len(source)
+        print(f"{len(source) / 1e3:>8.1f} kB  " + "  ".join(f"{tiempos[m] * 1e3:7.1f}ms" for m in motores)
+              + f"  {relacion:10.2f}")
+
+    if supera is None:
+        print("El motor 'numpy' no queda por delante del escalar en el mayor de los tamaños medidos")
+    else:
+        print(f"El motor 'numpy' supera al escalar desde unos {supera / 1e3:.1f} kB en adelante")
+
+
+def bench_binding(source, repeticiones=3):
+    referencia = None
+    for binding in BINDINGS:
+        mejor = None
+        for _ in range(repeticiones):
+            symbols = SymbolTable()
+            inicio = time.perf_counter()
+            tokens, errores = Lexer(source, symbols, binding=binding).tokenize()
+            t = time.perf_counter() - inicio
+            mejor = t if mejor is None else min(mejor, t)
+
+        salida = ([str(tok) for tok in tokens], symbols.dump())
+        if referencia is None:
+            referencia = salida
+        elif salida != referencia:
+            raise AssertionError(f"El registro '{binding}' no reproduce la salida de '{BINDINGS[0]}'")
+
+        print(f"{binding:>11}: {len(tokens):>9} tokens  {mejor:8.3f} s  {len(tokens) / mejor:>12,.0f} tokens/s")
+
+
+def bench_tokens(source, repeticiones=3):
+    # Lista de Token frente a TokenBuffer: memoria retenida tras el léxico,
+    # velocidad del léxico, del volcado resultado_tokens_* y del parser.
+    formas = {
+        "list[Token]": (lambda lx: lx.tokenize(), lambda toks: [str(t) for t in toks]),
+        "TokenBuffer": (lambda lx: lx.tokenize_buffer(), lambda toks: list(toks.iter_str())),
+    }
+    referencia = None
+    for nombre, (lexear, volcar) in formas.items():
+        tracemalloc.start()
+        antes = tracemalloc.get_traced_memory()[0]
+        tokens, _ = lexear(Lexer(source, SymbolTable()))
+        memoria = tracemalloc.get_traced_memory()[0] - antes
+        tracemalloc.stop()
+
+        t_lex = t_dump = t_parse = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            tokens, _ = lexear(Lexer(source, SymbolTable()))
+            t = time.perf_counter() - inicio
+            t_lex = t if t_lex is None else min(t_lex, t)
+
+            inicio = time.perf_counter()
+            lineas = volcar(tokens)
+            t = time.perf_counter() - inicio
+            t_dump = t if t_dump is None else min(t_dump, t)
+
+            inicio = time.perf_counter()
+            reglas, _ = Parser(tokens).parse()
+            t = time.perf_counter() - inicio
+            t_parse = t if t_parse is None else min(t_parse, t)
+
+        if referencia is None:
+            referencia = (lineas, reglas)
+        elif (lineas, reglas) != referencia:
+            raise AssertionError(f"'{nombre}' no reproduce la salida de la lista de Token")
+
+        n = len(tokens)
+        print(f"{nombre:>12}: {n:>9} tokens  {memoria / 2**20:8.1f} MiB ({memoria / n:6.1f} B/token)  "
+              f"léxico {t_lex:6.3f} s  volcado {t_dump:6.3f} s  parser {t_parse:6.3f} s")
+
+    # Identificadores y literales que comparten lexema a través del pool
+    compartidos = sum(1 for idx in tokens.lexeme_ids if idx >= 0)
+    print(f"{'pool':>12}: {compartidos:>9} tokens con lexema en el pool, {len(tokens.pool)} lexemas distintos")
+
+
+def bench_token_file(source, repeticiones=3, ruta="benchmark_tokens.bin"):
+    # Relexear en cada ejecución frente a reutilizar el fichero binario
+    tokens, _ = Lexer(source, SymbolTable()).tokenize_buffer()
+    inicio = time.perf_counter()
+    write_token_file(ruta, tokens)
+    t_escritura = time.perf_counter() - inicio
+
+    t_lex = t_carga = None
+    try:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            tokens, _ = Lexer(source, SymbolTable()).tokenize_buffer()
+            reglas_lex, _ = Parser(tokens).parse()
+            t = time.perf_counter() - inicio
+            t_lex = t if t_lex is None else min(t_lex, t)
+
+            inicio = time.perf_counter()
+            with TokenFile(ruta) as tf:
+                if not tf.matches(source):
+                    raise AssertionError("El fichero de tokens no corresponde a la fuente")
+                reglas_bin, _ = Parser(tf).parse()
+            t = time.perf_counter() - inicio
+            t_carga = t if t_carga is None else min(t_carga, t)
+
+            if reglas_bin != reglas_lex:
+                raise AssertionError("El fichero de tokens no reproduce el análisis sintáctico")
+        tam = os.path.getsize(ruta)
+    finally:
+        os.remove(ruta)
+
+    print(f"fichero: {tam / 2**20:.1f} MiB ({tam / len(tokens):.1f} B/token), escrito en {t_escritura:.3f} s")
+    print(f"léxico + parser:            {t_lex:8.3f} s")
+    print(f"fichero (mmap) + parser:    {t_carga:8.3f} s")
+
+
+def bench_relex(source, repeticiones=3, ediciones=200):
+    # Una pulsación (insertar un carácter) en posiciones al azar: relexeo
+    # completo frente a relexeo de las líneas afectadas.
+    r = random.Random(7)
+    posiciones = [r.randrange(len(source)) for _ in range(ediciones)]
+    base, errores = Lexer(source, SymbolTable(), recovery=True).tokenize_buffer()
+
+    t_completo = t_incremental = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for pos in posiciones[:10]:
+            Lexer(source[:pos] + "x" + source[pos:], SymbolTable(), recovery=True).tokenize_buffer()
+        t = (time.perf_counter() - inicio) / 10
+        t_completo = t if t_completo is None else min(t_completo, t)
+
+        inicio = time.perf_counter()
+        for pos in posiciones:
+            relex(base, pos, 0, "x", errores)
+        t = (time.perf_counter() - inicio) / ediciones
+        t_incremental = t if t_incremental is None else min(t_incremental, t)
+
+    print(f"relexeo completo:     {t_completo * 1e3:9.2f} ms/edición")
+    print(f"relexeo incremental:  {t_incremental * 1e3:9.2f} ms/edición")
+
+
+def bench_paralelo(source, repeticiones=3):
+    # Lexer.tokenize_buffer frente a tokenize_parallel con distinto número de
+    # procesos (los dos a un TokenBuffer, donde la fusión copia columnas)
+    def serie():
+        return Lexer(source, symbols, binding="single-pass").tokenize_buffer()
+
+    def paralelo(procesos):
+        return lambda: tokenize_parallel(source, symbols, procesos=procesos, buffer=True,
+                                         binding="single-pass")
+
+    formas = [("serie", serie)] + [(f"{p} procesos", paralelo(p))
+                                   for p in sorted({1, 2, 4, os.cpu_count() or 1})]
+    referencia = None
+    for nombre, lexear in formas:
+        mejor = None
+        for _ in range(repeticiones):
+            symbols = SymbolTable()
+            inicio = time.perf_counter()
+            tokens, _ = lexear()
+            t = time.perf_counter() - inicio
+            mejor = t if mejor is None else min(mejor, t)
+
+        salida = (list(tokens.iter_str()), symbols.dump())
+        if referencia is None:
+            referencia = salida
+        elif salida != referencia:
+            raise AssertionError(f"'{nombre}' no reproduce la salida en serie")
+        print(f"{nombre:>11}: {len(tokens):>9} tokens  {mejor:8.3f} s  {len(tokens) / mejor:>12,.0f} tokens/s")
+
+
+def bench_lectura(source, repeticiones=3, ruta="benchmark_fuente.myjs"):
+    # Fuente leída con f.read() frente a proyectada con mmap (motor "bytes"):
+    # pico de memoria al cargarla y tiempo de carga más léxico.
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(source)
+
+    def leer_texto():
+        with open(ruta, "r", encoding="utf-8") as f:
+            return Lexer(f.read(), SymbolTable(), engine="char"), None
+
+    def proyectar():
+        with open(ruta, "rb") as f:
+            fuente = _proyectar_fuente(f)
+        return Lexer(fuente, SymbolTable(), engine="bytes"), fuente
+
+    def lexear(cargar):
+        lexer, proyeccion = cargar()
+        tokens, _ = lexer.tokenize_buffer()
+        return tokens, proyeccion
+
+    try:
+        referencia = None
+        for nombre, cargar in (("f.read()", leer_texto), ("mmap", proyectar)):
+            tracemalloc.start()
+            lexer, proyeccion = cargar()
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del lexer
+            if isinstance(proyeccion, mmap.mmap):
+                proyeccion.close()
+
+            mejor = None
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                tokens, proyeccion = lexear(cargar)
+                t = time.perf_counter() - inicio
+                mejor = t if mejor is None else min(mejor, t)
+                # Los lexemas se leen de la proyección: se cierra cuando ya
+                # se han sacado las líneas, como en main.procesar_archivo
+                lineas = list(tokens.iter_str())
+                if isinstance(proyeccion, mmap.mmap):
+                    proyeccion.close()
+
+            if referencia is None:
+                referencia = lineas
+            elif lineas != referencia:
+                raise AssertionError(f"'{nombre}' no reproduce la salida de f.read()")
+            print(f"{nombre:>9}: carga {pico / 2**20:6.1f} MiB  carga y léxico {mejor:6.3f} s")
+    finally:
+        os.remove(ruta)
+
+
+def bench_parser(source, repeticiones=3):
+    # Descendente recursivo frente al analizador de tabla LL(1)
+    tokens, _ = Lexer(source, SymbolTable()).tokenize_buffer()
+    referencia = None
+    for nombre, clase in (("recursivo", Parser), ("tabla LL(1)", ParserLL1)):
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            parser = clase(tokens)
+            reglas, errores = parser.parse()
+            t = time.perf_counter() - inicio
+            mejor = t if mejor is None else min(mejor, t)
+
+        salida = (reglas, [str(e) for e in errores], parser.ts.dump())
+        if referencia is None:
+            referencia = salida
+        elif salida != referencia:
+            raise AssertionError(f"'{nombre}' no reproduce la salida del parser recursivo")
+        print(f"{nombre:>11}: {len(reglas):>9} reglas  {mejor:8.3f} s  {len(tokens) / mejor:>12,.0f} tokens/s")
+
+
+def bench_traza(source, repeticiones=3, ruta="benchmark_parse.txt"):
+    # Lista de int unida en un str frente a los modos de rule_trace: pico de
+    # memoria y tiempo de parser más escritura de resultado_parse_*.
+    tokens, _ = Lexer(source, SymbolTable()).tokenize_buffer()
+
+    def lista(fp):
+        parser = Parser(tokens)
+        parser.rules = []
+        reglas, _ = parser.parse()
+        fp.write(f"Descendente {' '.join(str(r) for r in reglas)}")
+        return len(reglas)
+
+    def modo(trace):
+        def analizar(fp):
+            reglas, _ = Parser(tokens, trace).parse()
+            if trace == "full":
+                write_trace(fp, reglas)
+            elif trace == "counts":
+                write_counts(fp, reglas)
+            return len(reglas)
+        return analizar
+
+    try:
+        referencia = None
+        for nombre, analizar in [("list + join", lista)] + [(m, modo(m)) for m in TRACE_MODES]:
+            tracemalloc.start()
+            with open(ruta, "w", encoding="utf-8") as fp:
+                n = analizar(fp)
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            mejor = None
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                with open(ruta, "w", encoding="utf-8") as fp:
+                    analizar(fp)
+                t = time.perf_counter() - inicio
+                mejor = t if mejor is None else min(mejor, t)
+
+            if nombre in ("list + join", "full"):
+                with open(ruta, encoding="utf-8") as fp:
+                    salida = fp.read()
+                if referencia is None:
+                    referencia = salida
+                elif salida != referencia:
+                    raise AssertionError(f"'{nombre}' no reproduce resultado_parse_*")
+            print(f"{nombre:>11}: {n:>9} reglas  pico {pico / 2**20:7.1f} MiB  parser y escritura {mejor:6.3f} s")
+    finally:
+        os.remove(ruta)
+
+
+class _NodoSlots:
+    # Referencia para bench_ast: el mismo árbol con un objeto por nodo
+    __slots__ = ("clase", "offset", "tipo", "dato", "hijos")
+
+    def __init__(self, clase, offset, tipo, dato, hijos):
+        self.clase = clase
+        self.offset = offset
+        self.tipo = tipo
+        self.dato = dato
+        self.hijos = hijos
+
+
+def bench_ast(source, repeticiones=3):
+    # Parser sin árbol, con árbol en AstArena y memoria del árbol frente a
+    # la misma estructura con objetos __slots__
+    tokens, _ = Lexer(source, SymbolTable()).tokenize_buffer()
+
+    tiempos = {}
+    for ast in (False, True):
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            parser = Parser(tokens, ast=ast)
+            parser.parse()
+            t = time.perf_counter() - inicio
+            mejor = t if mejor is None else min(mejor, t)
+        tiempos[ast] = mejor
+
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    parser = Parser(tokens, trace="off", ast=True)
+    parser.parse()
+    con_arbol = tracemalloc.get_traced_memory()[0] - antes
+    del parser
+    antes = tracemalloc.get_traced_memory()[0]
+    parser = Parser(tokens, trace="off")
+    parser.parse()
+    sin_arbol = tracemalloc.get_traced_memory()[0] - antes
+    del parser
+    tracemalloc.stop()
+
+    parser = Parser(tokens, trace="off", ast=True)
+    parser.parse()
+    arena = parser.ast
+    n = len(arena)
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    objetos = []
+    for i in range(n):
+        objetos.append(_NodoSlots(arena.clases[i], arena.offsets[i], arena.tipos[i], arena.datos[i],
+                                  [objetos[h] for h in arena.hijos_de(i)]))
+    con_objetos = tracemalloc.get_traced_memory()[0] - antes
+    tracemalloc.stop()
+
+    arbol = con_arbol - sin_arbol
+    print(f"{n:>9} nodos  ({len(tokens)} tokens)")
+    print(f"parser sin árbol:        {tiempos[False]:8.3f} s")
+    print(f"parser con AstArena:     {tiempos[True]:8.3f} s")
+    print(f"AstArena:                {arbol / 2**20:8.1f} MiB ({arbol / n:5.1f} B/nodo, columnas {arena.nbytes() / n:4.1f} B/nodo)")
+    print(f"objetos con __slots__:   {con_objetos / 2**20:8.1f} MiB ({con_objetos / n:5.1f} B/nodo)")
+
+
+def corromper(source, cada=50, semilla=5):
+    """Cambia un carácter de una de cada `cada` líneas por basura sintáctica."""
+    r = random.Random(semilla)
+    lineas = source.split("\n")
+    for i in range(cada // 2, len(lineas), cada):
+        linea = lineas[i]
+        if len(linea) > 4:
+            k = r.randrange(len(linea))
+            lineas[i] = linea[:k] + r.choice(["", ")", "(", ";", "+", "} ", "let "]) + linea[k + 1:]
+    return "\n".join(lineas)
+
+
+def bench_recuperacion(source, repeticiones=3):
+    # Fuente con errores sintácticos: sin recuperación, con recuperación por
+    # conjuntos FOLLOW y con un tope de errores
+    tokens, _ = Lexer(corromper(source), SymbolTable(), recovery=True).tokenize_buffer()
+    modos = [("sin recuperación", {}), ("recuperación", {"recovery": True}),
+             ("tope de 100", {"recovery": True, "max_errors": 100})]
+    for nombre, opciones in modos:
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            parser = Parser(tokens, **opciones)
+            _, errores = parser.parse()
+            t = time.perf_counter() - inicio
+            mejor = t if mejor is None else min(mejor, t)
+        sintacticos = sum(1 for e in errores if isinstance(e, SyntacticError))
+        print(f"{nombre:>16}: {len(errores):>7} errores ({sintacticos} sintácticos)  "
+              f"{parser.pos:>9} tokens leídos  {mejor:7.3f} s")
+
+
+def bench_reanalisis(source, repeticiones=3, ediciones=50):
+    # Una pulsación en posiciones al azar: relexeo y análisis completo frente
+    # a relexeo incremental y ParseSession.update
+    r = random.Random(11)
+    posiciones = [r.randrange(len(source)) for _ in range(ediciones)]
+    base, errores = Lexer(source, SymbolTable(), recovery=True).tokenize_buffer()
+    t_completo = t_incremental = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for pos in posiciones[:5]:
+            tokens, _ = Lexer(source[:pos] + "x" + source[pos:], SymbolTable(), recovery=True).tokenize_buffer()
+            Parser(tokens).parse()
+        t = (time.perf_counter() - inicio) / 5
+        t_completo = t if t_completo is None else min(t_completo, t)
+
+        sesion = ParseSession(base)
+        unidades = len(sesion.unidades)
+        tokens, errs = base, errores
+        reanalizadas = 0
+        inicio = time.perf_counter()
+        for pos in posiciones:
+            tokens, errs, cambio = relex(tokens, pos, 0, "x", errs)
+            reanalizadas += len(sesion.update(tokens, cambio).reanalizadas)
+        t = (time.perf_counter() - inicio) / ediciones
+        t_incremental = t if t_incremental is None else min(t_incremental, t)
+
+    reglas, errs = Parser(tokens).parse()
+    if sesion.rules != reglas or [str(e) for e in sesion.errors] != [str(e) for e in errs]:
+        raise AssertionError("ParseSession no reproduce el análisis completo")
+    print(f"análisis completo:     {t_completo * 1e3:9.2f} ms/edición")
+    print(f"análisis incremental:  {t_incremental * 1e3:9.2f} ms/edición "
+          f"({reanalizadas / ediciones:.1f} sentencias reanalizadas de {unidades})")
+
+
+def bench_semantico_paralelo(source, repeticiones=3):
+    # Parser en serie frente a parse_parallel con distinto número de procesos
+    tokens, _ = Lexer(source, SymbolTable(), recovery=True).tokenize_buffer()
+
+    def serie():
+        parser = Parser(tokens)
+        reglas, errores = parser.parse()
+        return reglas, errores, parser.ts, 0
+
+    def paralelo(procesos):
+        def analizar():
+            sesion = parse_parallel(tokens, procesos=procesos)
+            return sesion.rules, sesion.errors, sesion.ts, len(sesion.informe.reanalizadas)
+        return analizar
+
+    formas = [("serie", serie)] + [(f"{p} procesos", paralelo(p))
+                                   for p in sorted({1, 2, 4, os.cpu_count() or 1})]
+    referencia = None
+    for nombre, analizar in formas:
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            reglas, errores, ts, reanalizadas = analizar()
+            t = time.perf_counter() - inicio
+            mejor = t if mejor is None else min(mejor, t)
+
+        salida = (list(reglas), [str(e) for e in errores], ts.dump())
+        if referencia is None:
+            referencia = salida
+        elif salida != referencia:
+            raise AssertionError(f"'{nombre}' no reproduce el análisis en serie")
+        print(f"{nombre:>11}: {len(errores):>7} errores  {mejor:8.3f} s  "
+              f"{len(tokens) / mejor:>12,.0f} tokens/s  ({reanalizadas} sentencias reanalizadas)")
+
+
+def fuente_declaraciones(n_funciones, locales=8):
+    """Programa con muchos símbolos distintos: por cada i un global y una
+    función con sus propios parámetros y locales."""
+    lineas = []
+    for i in range(n_funciones):
+        lineas.append(f"let {TIPOS[i % 4]} g{i};")
+        lineas.append(f"function int h{i}(int p{i}, string q{i}) {{")
+        for j in range(locales):
+            lineas.append(f"\tlet {TIPOS[j % 4]} v{i}_{j};")
+        lineas.append(f"\treturn p{i};")
+        lineas.append("}")
+    return "\n".join(lineas) + "\n"
+
+
+def _simbolos(tabla_global, locales):
+    return len(tabla_global.simbolos) + sum(len(t.simbolos) for t in locales.values())
+
+
+def bench_memoria_simbolos(funciones):
+    # Memoria que retienen las tablas de símbolos del léxico y del parser
+    # (entradas, tablas locales y sus diccionarios) una vez analizado todo;
+    # "compartida" es lo que añade el parser al completar la del léxico
+    source = fuente_declaraciones(funciones)
+    tokens, _ = Lexer(source, SymbolTable(), binding="single-pass").tokenize_buffer()
+    contexto = CompilationContext()
+    tokens_ctx, _ = Lexer(source, binding="single-pass", contexto=contexto).tokenize_buffer()
+    contexto.compartir_tabla()
+    print(f"Entrada: {len(source) / 1e6:.2f} MB, {funciones} funciones")
+
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    symbols = SymbolTable()
+    Lexer(source, symbols, binding="single-pass").tokenize_buffer()
+    lexico = tracemalloc.get_traced_memory()[0] - antes
+
+    antes = tracemalloc.get_traced_memory()[0]
+    parser = Parser(tokens, trace="off")
+    parser.parse()
+    ts = parser.ts
+    del parser
+    semantico = tracemalloc.get_traced_memory()[0] - antes
+
+    antes = tracemalloc.get_traced_memory()[0]
+    parser = Parser(tokens_ctx, trace="off", contexto=contexto)
+    parser.parse()
+    del parser
+    compartida = tracemalloc.get_traced_memory()[0] - antes
+    tracemalloc.stop()
+
+    for nombre, memoria, n in (("léxico", lexico, _simbolos(symbols, symbols.locales)),
+                               ("parser", semantico, _simbolos(ts.tabla_global, ts.locales)),
+                               ("compartida", compartida,
+                                _simbolos(contexto.ts.tabla_global, contexto.ts.locales))):
+        print(f"{nombre:>10}: {n:>8} símbolos  {memoria / 2**20:8.2f} MiB  ({memoria / n:6.1f} B/símbolo)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks del compilador")
+    ap.add_argument("prueba", choices=["lexer", "binding", "tokens", "tokfile", "relex", "lectura", "tamanos", "paralelo", "parser", "traza", "ast", "recuperacion", "reanalisis", "semantico_paralelo", "memoria_simbolos"])
+    ap.add_argument("--funciones", type=int, default=2000)
+    ap.add_argument("--repeticiones", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.prueba == "tamanos":
+        bench_tamanos(args.funciones, args.repeticiones)
+        return
+    if args.prueba == "memoria_simbolos":
+        bench_memoria_simbolos(args.funciones)
+        return
+
+    source = generar_fuente(args.funciones)
+    print(f"Entrada: {len(source) / 1e6:.2f} MB, {args.funciones} funciones")
+
+    if args.prueba == "lexer":
+        bench_lexer(source, args.repeticiones)
+    elif args.prueba == "binding":
+        bench_binding(source, args.repeticiones)
+    elif args.prueba == "tokens":
+        bench_tokens(source, args.repeticiones)
+    elif args.prueba == "tokfile":
+        bench_token_file(source, args.repeticiones)
+    elif args.prueba == "relex":
+        bench_relex(source, args.repeticiones)
+    elif args.prueba == "lectura":
+        bench_lectura(source, args.repeticiones)
+    elif args.prueba == "paralelo":
+        bench_paralelo(source, args.repeticiones)
+    elif args.prueba == "parser":
+        bench_parser(source, args.repeticiones)
+    elif args.prueba == "traza":
+        bench_traza(source, args.repeticiones)
+    elif args.prueba == "ast":
+        bench_ast(source, args.repeticiones)
+    elif args.prueba == "recuperacion":
+        bench_recuperacion(source, args.repeticiones)
+    elif args.prueba == "reanalisis":
+        bench_reanalisis(source, args.repeticiones)
+    elif args.prueba == "semantico_paralelo":
+        bench_semantico_paralelo(source, args.repeticiones)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import itertools
+
+from lexeme_pool import LexemePool
+from Tabla_Simbolos.symbol_table import SymbolTable
+from Tabla_Simbolos.gestor_tabla import GestorTablas
+
+
+class CompilationContext:
+    """Estado de una compilación: numeración de símbolos, tablas, pool de
+    lexemas y errores.
+
+    El Lexer, el Parser, SymbolTable y GestorTablas lo reciben al crearse en
+    lugar de compartir estado de clase, así que varias compilaciones pueden
+    ir a la vez en un mismo proceso (hilos, un servidor) y cada una numera
+    sus símbolos desde 0.
+    """
+
+    def __init__(self, symbols=None, pool=None):
+        # Índices de la tabla del léxico y, aparte, los de las tablas del
+        # parser, que pueden rellenarse a la vez en streaming
+        self.contador = itertools.count()
+        self.contador_semantico = itertools.count()
+        self.symbols = symbols if symbols is not None else SymbolTable(contexto=self)
+        self.pool = pool if pool is not None else LexemePool()
+        self.ts = GestorTablas(self)
+        # Errores léxicos, y sintácticos y semánticos, en orden de aparición
+        self.lex_errors = []
+        self.errors = []
+
+    def compartir_tabla(self):
+        """Con el léxico ya terminado, el parser que se cree después
+        completa la tabla del léxico (tipos, declaraciones implícitas) en
+        lugar de construir la suya: queda una sola tabla de símbolos."""
+        self.ts = GestorTablas(self, self.symbols)
@@ -0,0 +1,249 @@
+import argparse
+import hashlib
+import importlib
+import os
+import sys
+
+from token_types import TokenType
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RUTA_GRAMATICA = os.path.join(BASE_DIR, "gramatica.ll1")
+# Tabla de predicción generada a partir de RUTA_GRAMATICA
+MODULO_TABLA = "tabla_ll1"
+RUTA_TABLA = os.path.join(BASE_DIR, MODULO_TABLA + ".py")
+
+LAMBDA = "lambda"
+
+
+def es_accion(simbolo):
+    return simbolo.startswith("@")
+
+
+class Gramatica:
+    """Producciones numeradas de un fichero de gramática (ver gramatica.ll1).
+
+    Calcula los conjuntos FIRST y FOLLOW, la tabla de predicción LL(1) y
+    los conflictos que impiden construirla.
+    """
+
+    def __init__(self, texto):
+        self.huella = hashlib.sha256(texto.encode("utf-8")).hexdigest()
+        # número -> (cabeza, cuerpo con acciones)
+        self.producciones = {}
+        self.marcadas = {}
+        for n, linea in enumerate(texto.splitlines(), 1):
+            linea = linea.split("#", 1)[0].strip()
+            if not linea:
+                continue
+            partes = linea.split()
+            if len(partes) < 3 or partes[2] != "->":
+                raise ValueError(f"Línea {n}: se esperaba 'número cabeza -> cuerpo'")
+            numero, cabeza = partes[0], partes[1]
+            por_defecto = numero.endswith("*")
+            numero = int(numero.rstrip("*"))
+            if numero in self.producciones:
+                raise ValueError(f"Línea {n}: producción {numero} repetida")
+            cuerpo = tuple(s for s in partes[3:] if s != LAMBDA)
+            self.producciones[numero] = (cabeza, cuerpo)
+            if por_defecto:
+                if cabeza in self.marcadas:
+                    raise ValueError(f"Línea {n}: '{cabeza}' ya tiene producción por defecto")
+                self.marcadas[cabeza] = numero
+
+        if not self.producciones:
+            raise ValueError("La gramática no tiene producciones")
+        self.no_terminales = []
+        for cabeza, _ in self.producciones.values():
+            if cabeza not in self.no_terminales:
+                self.no_terminales.append(cabeza)
+        # El axioma es la cabeza de la primera producción
+        self.inicial = self.producciones[min(self.producciones)][0]
+
+        for numero, (cabeza, cuerpo) in self.producciones.items():
+            for s in cuerpo:
+                if not es_accion(s) and s not in self.no_terminales and s not in TokenType.__members__:
+                    raise ValueError(f"Producción {numero}: '{s}' no es un no terminal ni un TokenType")
+
+        self.first, self.anulables = self._calcular_first()
+        self.follow = self._calcular_follow()
+
+    @classmethod
+    def desde_fichero(cls, ruta=RUTA_GRAMATICA):
+        with open(ruta, "r", encoding="utf-8") as f:
+            return cls(f.read())
+
+    def simbolos(self, numero):
+        # Cuerpo sin acciones semánticas
+        return [s for s in self.producciones[numero][1] if not es_accion(s)]
+
+    def first_de(self, simbolos):
+        """FIRST de una secuencia y si deriva lambda."""
+        resultado = set()
+        for s in simbolos:
+            if s not in self.first:
+                resultado.add(s)
+                return resultado, False
+            resultado |= self.first[s]
+            if s not in self.anulables:
+                return resultado, False
+        return resultado, True
+
+    def _calcular_first(self):
+        first = {a: set() for a in self.no_terminales}
+        anulables = set()
+        cambio = True
+        while cambio:
+            cambio = False
+            for numero, (cabeza, _) in self.producciones.items():
+                antes = (len(first[cabeza]), cabeza in anulables)
+                for s in self.simbolos(numero):
+                    if s not in first:
+                        first[cabeza].add(s)
+                        break
+                    first[cabeza] |= first[s]
+                    if s not in anulables:
+                        break
+                else:
+                    anulables.add(cabeza)
+                cambio |= antes != (len(first[cabeza]), cabeza in anulables)
+        return first, anulables
+
+    def _calcular_follow(self):
+        follow = {a: set() for a in self.no_terminales}
+        cambio = True
+        while cambio:
+            cambio = False
+            for numero, (cabeza, _) in self.producciones.items():
+                cuerpo = self.simbolos(numero)
+                for i, s in enumerate(cuerpo):
+                    if s not in follow:
+                        continue
+                    resto, anulable = self.first_de(cuerpo[i + 1:])
+                    if anulable:
+                        resto |= follow[cabeza]
+                    if not resto <= follow[s]:
+                        follow[s] |= resto
+                        cambio = True
+        return follow
+
+    def prediccion(self, numero):
+        cabeza = self.producciones[numero][0]
+        conjunto, anulable = self.first_de(self.simbolos(numero))
+        if anulable:
+            conjunto |= self.follow[cabeza]
+        return conjunto
+
+    def tabla(self):
+        """Tabla de predicción {no terminal: {terminal: producción}} y conflictos.
+
+        Cada conflicto es (no terminal, terminal, [producciones]); en la tabla
+        se queda la primera producción.
+        """
+        tabla = {a: {} for a in self.no_terminales}
+        choques = {}
+        for numero, (cabeza, _) in sorted(self.producciones.items()):
+            for t in sorted(self.prediccion(numero)):
+                anterior = tabla[cabeza].setdefault(t, numero)
+                if anterior != numero:
+                    choques.setdefault((cabeza, t), [anterior]).append(numero)
+        conflictos = [(a, t, nums) for (a, t), nums in choques.items()]
+        return tabla, conflictos
+
+    def por_defecto(self):
+        """Producción que se aplica con un token fuera de la tabla."""
+        defecto = {}
+        for a in self.no_terminales:
+            propias = [n for n, (cabeza, _) in sorted(self.producciones.items()) if cabeza == a]
+            lambdas = [n for n in propias if not self.simbolos(n)]
+            if a in self.marcadas:
+                defecto[a] = self.marcadas[a]
+            elif lambdas:
+                defecto[a] = lambdas[0]
+            elif len(propias) == 1:
+                defecto[a] = propias[0]
+        return defecto
+
+
+def generar_tabla(gramatica, ruta=RUTA_TABLA):
+    """Escribe la tabla de predicción como módulo Python."""
+    tabla, conflictos = gramatica.tabla()
+    if conflictos:
+        raise ValueError(f"La gramática no es LL(1): {len(conflictos)} conflicto(s)")
+    lineas = [
+        f"# Generado por gramatica.py a partir de {os.path.basename(RUTA_GRAMATICA)}: no editar.",
+        "# Se regenera con: python gramatica.py",
+        "",
+        f"HUELLA = {gramatica.huella!r}",
+        f"INICIAL = {gramatica.inicial!r}",
+        "",
+        "PRODUCCIONES = {",
+    ]
+    for numero, (cabeza, cuerpo) in sorted(gramatica.producciones.items()):
+        lineas.append(f"    {numero}: ({cabeza!r}, {cuerpo!r}),")
+    lineas += ["}", "", "PREDICCION = {"]
+    for a in gramatica.no_terminales:
+        lineas.append(f"    {a!r}: {dict(sorted(tabla[a].items()))!r},")
+    lineas += ["}", "", f"DEFECTO = {gramatica.por_defecto()!r}", ""]
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas))
+
+
+def cargar_tabla(ruta=RUTA_GRAMATICA):
+    """(inicial, producciones, predicción, por defecto) de la gramática.
+
+    Usa el módulo generado si su huella coincide con la gramática; si no,
+    la tabla se calcula en memoria (y un conflicto es un ValueError).
+    """
+    with open(ruta, "r", encoding="utf-8") as f:
+        texto = f.read()
+    if ruta == RUTA_GRAMATICA:
+        try:
+            generado = importlib.import_module(MODULO_TABLA)
+        except ImportError:
+            generado = None
+        huella = hashlib.sha256(texto.encode("utf-8")).hexdigest()
+        if generado is not None and generado.HUELLA == huella:
+            return generado.INICIAL, generado.PRODUCCIONES, generado.PREDICCION, generado.DEFECTO
+
+    gramatica = Gramatica(texto)
+    tabla, conflictos = gramatica.tabla()
+    if conflictos:
+        raise ValueError(f"La gramática no es LL(1): {len(conflictos)} conflicto(s)")
+    return gramatica.inicial, gramatica.producciones, tabla, gramatica.por_defecto()
+
+
+def _conjunto(simbolos):
+    return "{ " + ", ".join(sorted(simbolos)) + " }" if simbolos else "{}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="FIRST/FOLLOW y tabla LL(1) de la gramática")
+    ap.add_argument("gramatica", nargs="?", default=RUTA_GRAMATICA)
+    ap.add_argument("--salida", default=RUTA_TABLA, help="módulo de la tabla generada")
+    ap.add_argument("--no-generar", action="store_true", help="sólo comprobar la gramática")
+    args = ap.parse_args()
+
+    gramatica = Gramatica.desde_fichero(args.gramatica)
+    print(f"{len(gramatica.producciones)} producciones, {len(gramatica.no_terminales)} no terminales\n")
+    ancho = max(len(a) for a in gramatica.no_terminales)
+    for a in gramatica.no_terminales:
+        lam = ", lambda" if a in gramatica.anulables else ""
+        print(f"FIRST({a}){' ' * (ancho - len(a))}  = {_conjunto(gramatica.first[a])}{lam}")
+    print()
+    for a in gramatica.no_terminales:
+        print(f"FOLLOW({a}){' ' * (ancho - len(a))} = {_conjunto(gramatica.follow[a])}")
+
+    _, conflictos = gramatica.tabla()
+    print()
+    if conflictos:
+        for a, t, nums in conflictos:
+            print(f"Conflicto LL(1) en M[{a}, {t}]: producciones {', '.join(map(str, nums))}")
+        sys.exit(1)
+    print("La gramática es LL(1).")
+    if not args.no_generar:
+        generar_tabla(gramatica, args.salida)
+        print(f"Tabla de predicción en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from an_lexico import Lexer
+from errors import LexError
+from line_index import LineIndex
+from token_buffer import TokenBuffer
+from Tabla_Simbolos.symbol_table import SymbolTable
+
+
+class TokenChange:
+    """Tokens sustituidos por una edición: [first, first + removed) del
+    TokenBuffer anterior pasan a ser [first, first + inserted) del nuevo."""
+
+    __slots__ = ("first", "removed", "inserted")
+
+    def __init__(self, first, removed, inserted):
+        self.first = first
+        self.removed = removed
+        self.inserted = inserted
+
+    def __repr__(self):
+        return f"TokenChange(first={self.first}, removed={self.removed}, inserted={self.inserted})"
+
+
+def relex(tokens, offset, removed, inserted, errors=None, engine="char"):
+    """Aplica una edición a la fuente de un TokenBuffer relexeando sólo las
+    líneas afectadas. Devuelve (tokens, errores, TokenChange).
+
+    Ningún lexema cruza un salto de línea (los comentarios acaban en él y las
+    cadenas no lo admiten), así que basta con volver a pasar el Lexer por las
+    líneas completas que toca la edición y desplazar el resto. Se supone que
+    `tokens` y `errors` salen de un Lexer con recovery=True y sin max_errors.
+
+    Los índices de símbolo dependen del orden de todo el fichero: los tokens
+    relexeados quedan sin índice (-1) y el resto conserva el que tenía.
+    """
+    source = tokens.source
+    if offset < 0 or removed < 0 or offset + removed > len(source):
+        raise ValueError(f"Edición fuera de la fuente: offset={offset}, removed={removed}")
+
+    nueva = source[:offset] + inserted + source[offset + removed:]
+    delta = len(inserted) - removed
+
+    # Líneas completas dañadas: [ini, fin) en la fuente anterior
+    ini = source.rfind("\n", 0, offset) + 1
+    fin = source.find("\n", offset + removed)
+    hasta_final = fin < 0
+    fin = len(source) if hasta_final else fin + 1
+    nuevo_fin = fin + delta
+
+    old_ls = tokens.line_index.starts
+    linea0 = bisect_right(old_ls, ini)
+    lineas_viejas = bisect_left(old_ls, fin) - linea0 + 1 if not hasta_final else len(old_ls) - linea0 + 1
+
+    # Relexeo de la zona dañada con una tabla de símbolos desechable
+    texto = nueva[ini:nuevo_fin]
+    zona, errores_zona = Lexer(texto, SymbolTable(), engine=engine,
+                               recovery=True, pool=tokens.pool).tokenize_buffer()
+    m = len(zona) if hasta_final else len(zona) - 1     # sin su EOF si hay más detrás
+    reg_ls = zona.line_index.starts
+
+    # Tokens antiguos de la zona: [i0, i1). El EOF (siempre el último) puede
+    # ir en la columna 1 tras un comentario final: queda fuera de la búsqueda.
+    n = len(tokens) - 1
+    i0 = bisect_left(tokens.starts, ini, 0, n)
+    i1 = len(tokens) if hasta_final else bisect_left(tokens.starts, fin, 0, n)
+    dlineas = (len(reg_ls) - 1 if hasta_final else len(reg_ls) - 2) - (lineas_viejas - 1)
+
+    # Inicios de línea de la nueva fuente
+    if hasta_final:
+        line_starts = old_ls[:linea0] + array("I", (ini + x for x in reg_ls[1:]))
+    else:
+        line_starts = (old_ls[:linea0]
+                       + array("I", (ini + x for x in reg_ls[1:-1]))
+                       + array("I", (x + delta for x in old_ls[bisect_left(old_ls, fin):])))
+
+    nb = TokenBuffer(nueva, LineIndex(starts=line_starts), tokens.pool)
+    nb.kinds = tokens.kinds[:i0] + zona.kinds[:m] + tokens.kinds[i1:]
+    nb.starts = (tokens.starts[:i0] + array("I", (ini + x for x in zona.starts[:m]))
+                 + array("I", (x + delta for x in tokens.starts[i1:])))
+    nb.ends = (tokens.ends[:i0] + array("I", (ini + x for x in zona.ends[:m]))
+               + array("I", (x + delta for x in tokens.ends[i1:])))
+    nb.symbols = tokens.symbols[:i0] + array("i", [-1]) * m + tokens.symbols[i1:]
+    nb.lexeme_ids = tokens.lexeme_ids[:i0] + zona.lexeme_ids[:m] + tokens.lexeme_ids[i1:]
+
+    # Errores: los de las líneas dañadas se sustituyen por los del relexeo
+    nuevos_errores = None
+    if errors is not None:
+        ultima = linea0 + lineas_viejas - 1
+        nuevos_errores = [e for e in errors if e.line < linea0]
+        nuevos_errores += [LexError(e.line + linea0 - 1, e.column, e.message) for e in errores_zona]
+        nuevos_errores += [LexError(e.line + dlineas, e.column, e.message) for e in errors if e.line > ultima]
+
+    # Cambio mínimo: se descartan los tokens iguales al principio y al final
+    n_viejos = i1 - i0
+    pre = 0
+    while (pre < n_viejos and pre < m
+           and _igual(tokens, i0 + pre, nb, i0 + pre, 0)):
+        pre += 1
+    suf = 0
+    while (suf < n_viejos - pre and suf < m - pre
+           and _igual(tokens, i1 - 1 - suf, nb, i0 + m - 1 - suf, delta)):
+        suf += 1
+
+    return nb, nuevos_errores, TokenChange(i0 + pre, n_viejos - pre - suf, m - pre - suf)
+
+
+def _igual(a, i, b, j, delta):
+    # Mismo token salvo el desplazamiento que ya aplica la edición
+    return (a.kinds[i] == b.kinds[j] and a.starts[i] + delta == b.starts[j]
+            and a.column(i) == b.column(j) and a.lexeme(i) == b.lexeme(j))
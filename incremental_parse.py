@@ -0,0 +1,343 @@
+from array import array
+
+from an_sintactico_semtant import Parser, FIRST_E
+from ast_arena import AstArena, PROGRAMA
+from token_types import TokenType
+from Tabla_Simbolos.gestor_tabla import GestorTablas
+
+# FIRST(E) como códigos de la columna kinds del TokenBuffer
+_FIRST_E_CODIGOS = frozenset(t.value for t in FIRST_E)
+_ERROR = TokenType.ERROR.value
+
+
+def _firma(entrada):
+    # Lo único de un símbolo que influye en el análisis de otra unidad
+    return None if entrada is None else (entrada.categoria, entrada.tipo)
+
+
+# Firma de la variable global que crea una declaración implícita
+_IMPLICITA = ("Variable", "int")
+
+
+def _cambiados(unidad, ts):
+    # Lexemas de los símbolos que la unidad vio con otra firma que la que
+    # tienen ahora en ts (ninguno si se puede reutilizar)
+    cambiados = []
+    for clave, firma in unidad.entradas.items():
+        actual = _firma(ts.buscar(clave))
+        if actual != firma:
+            # Si la unidad lo declaró implícitamente, que ya exista con esa
+            # misma firma no cambia nada
+            if firma is None and actual == _IMPLICITA and clave[0] is None \
+                    and clave[1] in unidad.implicitas:
+                continue
+            cambiados.append(clave[1])
+    return cambiados
+
+
+class _Unidad:
+    """Resultado de analizar una sentencia de nivel superior (una función,
+    una declaración global o una sentencia suelta).
+
+    [a, b] son los tokens de los que depende: b es el token de anticipación
+    en el que acabó (len(tokens) si se llegó más allá del EOF). Las líneas y
+    offsets guardados son los del análisis; `dlineas` y `delta` los llevan a
+    la fuente actual. `entradas` guarda el estado previo de cada símbolo que
+    consultó o registró ((ámbito, lexema) -> (categoría, tipo) o None; el
+    ámbito global es None) y `registro` las llamadas de registro en orden,
+    que rehacen sus tablas (la local incluida) sin volver a analizarla.
+    `implicitas` son los globales que ella misma declaró implícitamente.
+    """
+
+    __slots__ = ("a", "b", "reglas", "errores", "arena", "raices",
+                 "entradas", "registro", "implicitas", "claves", "dlineas", "delta")
+
+    def __init__(self, a):
+        self.a = a
+        self.b = a
+        self.reglas = None
+        self.errores = None
+        self.arena = None
+        self.raices = ()
+        self.entradas = {}
+        self.registro = []
+        self.implicitas = set()
+        # Símbolo -> (ámbito, lexema), para recolocar los del árbol
+        self.claves = {}
+        self.dlineas = 0
+        self.delta = 0
+
+    @property
+    def funcion(self):
+        # Nombre de la función si la unidad es una F
+        for metodo, args in self.registro:
+            if metodo == "registrar_funcion":
+                return args[0]
+        return None
+
+
+class _GestorRegistrado(GestorTablas):
+    # GestorTablas que anota en la unidad en curso (si la hay) sus entradas
+    # y su registro
+    def __init__(self):
+        super().__init__()
+        self.unidad = None
+
+    def _tocar(self, ambito, lexema, entrada):
+        u = self.unidad
+        if u is not None:
+            # Sólo el primer acceso ve el estado anterior a la unidad
+            u.entradas.setdefault((ambito, lexema), _firma(entrada))
+            if entrada is not None:
+                u.claves[entrada] = (ambito, lexema)
+        return entrada
+
+    def _registrar(self, ambito, lexema, metodo, args):
+        u = self.unidad
+        if u is not None:
+            anterior = (GestorTablas.buscar_global(self, lexema) if ambito is None
+                        else GestorTablas.buscar_local(self, ambito, lexema))
+            self._tocar(ambito, lexema, anterior)
+            u.registro.append((metodo, args))
+        entrada = getattr(GestorTablas, metodo)(self, *args)
+        if u is not None:
+            u.claves[entrada] = (ambito, lexema)
+        return entrada
+
+    def buscar_global(self, lexema):
+        return self._tocar(None, lexema, super().buscar_global(lexema))
+
+    def buscar_local(self, nombre_funcion, lexema):
+        return self._tocar(nombre_funcion, lexema, super().buscar_local(nombre_funcion, lexema))
+
+    def registrar_variable_global(self, lexema, tipo="id"):
+        return self._registrar(None, lexema, "registrar_variable_global", (lexema, tipo))
+
+    def registrar_funcion(self, nombre_funcion, tipo="void"):
+        return self._registrar(None, nombre_funcion, "registrar_funcion", (nombre_funcion, tipo))
+
+    def registrar_variable_local(self, nombre_funcion, lexema, tipo="id"):
+        return self._registrar(nombre_funcion, lexema, "registrar_variable_local",
+                               (nombre_funcion, lexema, tipo))
+
+    # Las búsquedas por ámbito se anotan como las de buscar_local/global
+    def resolver(self, lexema):
+        entrada = None
+        if self.nivel:
+            entrada = self.buscar_local(self.ambito_actual, lexema)
+        return entrada or self.buscar_global(lexema)
+
+    def en_ambito_actual(self, lexema):
+        if self.nivel:
+            return self.buscar_local(self.ambito_actual, lexema)
+        return self.buscar_global(lexema)
+
+    def resolver_o_declarar(self, lexema):
+        u = self.unidad
+        primera = u is not None and (None, lexema) not in u.entradas
+        entrada = super().resolver_o_declarar(lexema)
+        if primera and u.entradas.get((None, lexema), 0) is None:
+            u.implicitas.add(lexema)
+        return entrada
+
+    def buscar(self, clave):
+        ambito, lexema = clave
+        if ambito is None:
+            return GestorTablas.buscar_global(self, lexema)
+        return GestorTablas.buscar_local(self, ambito, lexema)
+
+
+def _siguiente(tokens, i):
+    # Primer token desde i que llega al parser
+    kinds, n = tokens.kinds, len(tokens)
+    while i < n and kinds[i] == _ERROR:
+        i += 1
+    return i
+
+
+def _analizar_unidad(tokens, i, ts, ast=False):
+    # Sentencia de nivel superior que empieza en el token i, anotando en ts
+    # (un _GestorRegistrado) lo que consulta y registra
+    n = len(tokens)
+    unidad = _Unidad(i)
+    parser = Parser((tokens[j] for j in range(i, n)), ast=ast)
+    parser.ts = ts
+    ts.unidad = unidad
+    # L -> E L: la regla 2 va con su sentencia
+    parser.rules.append(2)
+    parser.E()
+    ts.unidad = None
+    unidad.reglas = parser.rules
+    unidad.errores = parser.errors
+    unidad.arena = parser.ast
+    unidad.raices = parser._nodos
+    unidad.b = parser.current_token.index if parser.current_token else n
+    return unidad
+
+
+class ReparseReport:
+    """Lo que rehízo ParseSession.update(): las unidades reanalizadas con su
+    motivo, en orden de fuente, y cuántas se reutilizaron tal cual."""
+
+    __slots__ = ("reanalizadas", "reutilizadas")
+
+    def __init__(self):
+        # (descripción, motivo)
+        self.reanalizadas = []
+        self.reutilizadas = 0
+
+    def __str__(self):
+        lineas = [f"{desc}: {motivo}" for desc, motivo in self.reanalizadas]
+        lineas.append(f"{len(self.reanalizadas)} reanalizada(s), {self.reutilizadas} reutilizada(s)")
+        return "\n".join(lineas)
+
+
+class ParseSession:
+    """Análisis sintáctico y semántico de un fichero que se va editando.
+
+    Guarda por separado el resultado de cada sentencia de nivel superior
+    (reglas, errores, registro de símbolos y árbol). Tras una edición
+    (incremental.relex) sólo se vuelven a analizar las que tocan los tokens
+    cambiados y las que consultaron algún símbolo cuya categoría o tipo ya
+    no es el mismo; las demás se reutilizan y sus registros se repiten en
+    orden para rehacer las tablas. Las reglas, los errores, las tablas y el
+    árbol resultantes son los de un Parser sobre el fichero completo.
+
+    Se analiza como Parser sin recuperación: `tokens` es un TokenBuffer de
+    un Lexer con recovery=True (los tokens ERROR no llegan al parser).
+    """
+
+    def __init__(self, tokens, ast=False, unidades=()):
+        # `unidades`: ya analizadas sobre estos mismos tokens con otro estado
+        # de las tablas (parallel_parse); se reutilizan las que sigan valiendo
+        self.tokens = tokens
+        self.con_ast = ast
+        self.unidades = list(unidades)
+        self.ts = None
+        self._rules = self._errors = self._ast = None
+        self.informe = self._analizar(tokens)
+
+    def update(self, tokens, cambio):
+        """Pasa a los tokens editados (tokens, cambio de relex) y devuelve un
+        ReparseReport con lo que se rehízo."""
+        anteriores = self.tokens
+        self.tokens = tokens
+        return self._analizar(anteriores, cambio)
+
+    def _analizar(self, anteriores=None, cambio=None):
+        tokens = self.tokens
+        n = len(tokens)
+        kinds = tokens.kinds
+        viejas = self.unidades
+        informe = ReparseReport()
+        ts = _GestorRegistrado()
+        unidades = []
+        if cambio is not None:
+            fin_cambio = cambio.first + cambio.removed
+            salto = cambio.inserted - cambio.removed
+
+        def nuevo_indice(i):
+            # Índice en los tokens nuevos de un token anterior (None si cambió)
+            if cambio is None or i < cambio.first:
+                return i
+            return i + salto if i >= fin_cambio else None
+
+        k = 0
+        i = _siguiente(tokens, 0)
+        while i < n and kinds[i] in _FIRST_E_CODIGOS:
+            # Unidad anterior que empezaba en este mismo token
+            vieja = None
+            while k < len(viejas):
+                j = nuevo_indice(viejas[k].a)
+                if j is not None and j >= i:
+                    if j == i:
+                        vieja = viejas[k]
+                    break
+                k += 1
+
+            motivo = "nueva"
+            if vieja is not None:
+                if cambio is None or vieja.b < cambio.first or vieja.a >= fin_cambio:
+                    ts.unidad = None
+                    cambiados = _cambiados(vieja, ts)
+                    if not cambiados:
+                        self._reutilizar(vieja, i, anteriores, ts)
+                        unidades.append(vieja)
+                        informe.reutilizadas += 1
+                        i = vieja.b
+                        k += 1
+                        continue
+                    motivo = "cambió " + ", ".join(f"'{x}'" for x in dict.fromkeys(cambiados))
+                else:
+                    motivo = "tokens editados"
+
+            unidad = _analizar_unidad(tokens, i, ts, self.con_ast)
+            unidades.append(unidad)
+            if viejas:
+                informe.reanalizadas.append((self._describir(unidad), motivo))
+            i = unidad.b
+
+        self.unidades = unidades
+        self.ts = ts
+        self._rules = self._errors = self._ast = None
+        return informe
+
+    def _reutilizar(self, unidad, i, anteriores, ts):
+        # Unidad intacta que ahora empieza en el token i: se recoloca y se
+        # repiten sus registros
+        a, tokens = unidad.a, self.tokens
+        unidad.dlineas += tokens.line(i) - anteriores.line(a)
+        unidad.delta += tokens.starts[i] - anteriores.starts[a]
+        unidad.b += i - a
+        unidad.a = i
+        for metodo, args in unidad.registro:
+            getattr(ts, metodo)(*args)
+
+    def _describir(self, unidad):
+        nombre = unidad.funcion
+        if nombre is not None:
+            return f"función '{nombre}'"
+        return f"sentencia de la línea {self.tokens.line(unidad.a)}"
+
+    # --- resultado del fichero completo ---
+    @property
+    def rules(self):
+        if self._rules is None:
+            # P -> L eof: la 1, las de cada sentencia y la 3 de L -> lambda
+            reglas = array("B", [1])
+            for u in self.unidades:
+                reglas += u.reglas
+            reglas.append(3)
+            self._rules = reglas
+        return self._rules
+
+    @property
+    def errors(self):
+        if self._errors is None:
+            errores = []
+            for u in self.unidades:
+                dl = u.dlineas
+                if dl:
+                    # Los de línea 0 (pasado el EOF) no se mueven
+                    errores += [type(e)(e.line + dl, e.column, e.message) if e.line else e
+                                for e in u.errores]
+                else:
+                    errores += u.errores
+            self._errors = errores
+        return self._errors
+
+    @property
+    def ast(self):
+        if not self.con_ast:
+            return None
+        if self._ast is None:
+            arena = AstArena()
+            raices = []
+            ts = self.ts
+            for u in self.unidades:
+                claves = u.claves
+                base = arena.anexar(u.arena, u.delta, lambda s: ts.buscar(claves[s]))
+                raices += [base + r for r in u.raices]
+            arena.add(PROGRAMA, 0, hijos=raices)
+            self._ast = arena
+        return self._ast
@@ -0,0 +1,45 @@
+from token_types import TokenType
+
+
+def literal_value(t, lexeme):
+    """Valor de un literal a partir de su lexema (None si no es un literal)."""
+    if t == TokenType.INT_CONST:
+        return int(lexeme)
+    if t == TokenType.FLOAT_CONST:
+        return float(lexeme)
+    if t == TokenType.STRING_CONST:
+        return lexeme[1:-1]
+    return None
+
+
+class LexemePool:
+    """Identificadores y literales de una compilación, guardados una sola vez.
+
+    Cada lexema distinto recibe un identificador entero; los tokens lo
+    referencian en lugar de guardar su propia copia del texto. Los literales
+    guardan además su valor ya convertido, para no volver a leer el texto.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.lexemes = []
+        self.values = []
+
+    def intern(self, lexeme, t=TokenType.ID):
+        idx = self.ids.get(lexeme)
+        if idx is None:
+            # Un identificador nunca coincide con un literal: los números
+            # empiezan por dígito y las cadenas por comilla.
+            idx = self.ids[lexeme] = len(self.lexemes)
+            self.lexemes.append(lexeme)
+            self.values.append(literal_value(t, lexeme))
+        return idx
+
+    def __len__(self):
+        return len(self.lexemes)
+
+    def lexeme(self, idx):
+        return self.lexemes[idx]
+
+    def value(self, idx):
+        return self.values[idx]
@@ -0,0 +1,40 @@
+from array import array
+from bisect import bisect_right
+
+
+class LineIndex:
+    """Inicio de cada línea de la fuente: traduce desplazamientos a línea/columna."""
+
+    def __init__(self, source="", starts=None):
+        if starts is not None:
+            self.starts = starts
+            return
+        self.starts = array("I", [0])
+        self.extend(source, 0)
+
+    def extend(self, text, offset):
+        # text empieza en un inicio de línea, en el desplazamiento offset de la
+        # fuente completa. Se busca salto a salto para no partir el texto en
+        # una lista de líneas (la fuente entera ocuparía el doble).
+        starts = self.starts
+        find = text.find
+        i = find("\n")
+        while i >= 0:
+            starts.append(offset + i + 1)
+            i = find("\n", i + 1)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def line(self, offset):
+        return bisect_right(self.starts, offset)
+
+    def column(self, offset):
+        return offset - self.starts[bisect_right(self.starts, offset) - 1] + 1
+
+    def position(self, offset):
+        linea = bisect_right(self.starts, offset)
+        return linea, offset - self.starts[linea - 1] + 1
+
+    def line_start(self, offset):
+        return self.starts[bisect_right(self.starts, offset) - 1]
@@ -1,10 +1,39 @@
+import argparse
+import mmap
 import os
 from an_lexico import Lexer
-from an_sintactico import Parser
-from Tabla_Simbolos.symbol_table import SymbolTable
-from Tabla_Simbolos.symbol_entry import SymbolEntry
-
-def procesar_archivo(filepath):
+from an_sintactico_semtant import Parser
+from compilation_context import CompilationContext
+from rule_trace import TRACE_MODES, write_trace, write_counts
+
+# El léxico se recupera de los errores y los informa todos en una pasada;
+# al llegar a este número deja de analizar el fichero.
+MAX_ERRORES_LEXICOS = 100
+# Con --recuperacion el parser se resincroniza tras cada error sintáctico y
+# se detiene al acumular este número de errores.
+MAX_ERRORES_SINTACTICOS = 100
+
+def _volcar_tokens(tokens, fichero):
+    # Escribe cada token según pasa hacia el parser
+    for t in tokens:
+        fichero.write(str(t) + "\n")
+        yield t
+
+
+def _proyectar_fuente(f):
+    # Fichero proyectado en memoria en lugar de leerlo con f.read(). Si hay
+    # retornos de carro se normalizan los saltos de línea como hace el modo
+    # texto de open(), y entonces sí hace falta una copia en un str.
+    if os.fstat(f.fileno()).st_size == 0:
+        return ""
+    datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if datos.find(b"\r") < 0:
+        return datos
+    with datos:
+        return str(datos, "utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def procesar_archivo(filepath, streaming=False, trace="full", recovery=False, bloques=False):
     nombre_archivo = os.path.basename(filepath)
     nombre_sin_ext, _ = os.path.splitext(nombre_archivo)
     
@@ -15,43 +44,83 @@ def procesar_archivo(filepath):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    # Leer código fuente
-    with open(filepath, "r", encoding="utf-8") as f:
-        source = f.read()
-
-    # 1. Análisis Léxico
-    SymbolEntry.reset_contador()
-    symbols = SymbolTable()
-    lexer = Lexer(source, symbols)
-    tokens, lex_errors = lexer.tokenize()
-
-    # --- Salidas Léxico ---
     tokens_path = os.path.join(output_dir, f"resultado_tokens_{nombre_sin_ext}.txt")
     symbols_path = os.path.join(output_dir, f"resultado_symbols_{nombre_sin_ext}.txt")
     errors_path = os.path.join(output_dir, f"resultado_errors_{nombre_sin_ext}.txt")
+    parse_path = os.path.join(output_dir, f"resultado_parse_{nombre_sin_ext}.txt")
 
-    with open(tokens_path, "w", encoding="utf-8") as ft:
-        for t in tokens:
-            ft.write(str(t) + "\n")
-    
+    # Numeración, tablas y errores propios de este fichero
+    contexto = CompilationContext()
+    opciones_parser = {"recovery": True, "max_errors": MAX_ERRORES_SINTACTICOS} if recovery else {}
+    # Ámbito propio para cada bloque { } en el léxico y en el parser
+    opciones_parser["bloques"] = bloques
+
+    if streaming:
+        # Léxico y sintáctico a la vez: el parser tira de Lexer.iter_tokens()
+        # y nunca se materializa la lista completa de tokens.
+        with open(filepath, "r", encoding="utf-8") as f, \
+             open(tokens_path, "w", encoding="utf-8") as ft:
+            lexer = Lexer(f, binding="single-pass", recovery=True,
+                          max_errors=MAX_ERRORES_LEXICOS, contexto=contexto, bloques=bloques)
+            tokens = _volcar_tokens(lexer.iter_tokens(), ft)
+            rules_applied, syn_errors = Parser(tokens, trace, contexto=contexto,
+                                               **opciones_parser).parse()
+            # El parser puede parar antes del EOF: el volcado debe ser completo
+            for _ in tokens:
+                pass
+        lex_errors = lexer.errors
+        # Lo que registró el parser pasa ahora a la tabla del léxico, como
+        # sin streaming
+        if not lex_errors:
+            contexto.ts.integrar(contexto.symbols)
+    else:
+        # Leer código fuente
+        with open(filepath, "rb") as f:
+            source = _proyectar_fuente(f)
+
+        # 1. Análisis Léxico
+        # Con una fuente ASCII el motor "bytes" recorre directamente la
+        # proyección; con otros caracteres usa el motor Unicode.
+        lexer = Lexer(source, engine="bytes", binding="single-pass",
+                      recovery=True, max_errors=MAX_ERRORES_LEXICOS, contexto=contexto,
+                      bloques=bloques)
+        # Los tokens se guardan por columnas (TokenBuffer), no como objetos
+        tokens, lex_errors = lexer.tokenize_buffer()
+
+        # --- Salidas Léxico ---
+        with open(tokens_path, "w", encoding="utf-8") as ft:
+            for linea in tokens.iter_str():
+                ft.write(linea + "\n")
+
+        # 2. Análisis Sintáctico 
+        syn_errors = []
+        if not lex_errors:
+            # El parser completa la tabla del léxico en lugar de hacer otra
+            contexto.compartir_tabla()
+            # Instanciamos el Parser pasándole los tokens limpios
+            parser = Parser(tokens, trace, contexto=contexto, **opciones_parser)
+            rules_applied, syn_errors = parser.parse()
+        # Los lexemas se han ido leyendo de la proyección hasta aquí
+        if isinstance(source, mmap.mmap):
+            source.close()
+
+    # Una sola tabla: la del léxico con lo que añadió el parser (si lo hubo)
     with open(symbols_path, "w", encoding="utf-8") as fs:
-        fs.write(symbols.dump())
-
-    # 2. Análisis Sintáctico 
-    parse_path = os.path.join(output_dir, f"resultado_parse_{nombre_sin_ext}.txt")
-    syn_errors = []
+        fs.write(contexto.symbols.dump())
 
     if not lex_errors:
-        # Instanciamos el Parser pasándole los tokens limpios
-        parser = Parser(tokens)
-        rules_applied, syn_errors = parser.parse()
-
-        # Guardar reglas (Parse) para VASt
+        # Guardar reglas (Parse) para VASt; la traza se escribe por trozos
         with open(parse_path, "w", encoding="utf-8") as fp:
-            linea_reglas = " ".join(str(r) for r in rules_applied)
-            fp.write(f"Descendente {linea_reglas}")
+            if trace == "full":
+                write_trace(fp, rules_applied)
+            elif trace == "counts":
+                write_counts(fp, rules_applied)
+            else:
+                fp.write("Traza de reglas desactivada.")
             
     else:
+        # Con errores léxicos se descarta cualquier resultado sintáctico
+        syn_errors = []
         with open(parse_path, "w", encoding="utf-8") as fp:
             fp.write("No se realizó análisis sintáctico debido a errores léxicos.")
 
@@ -71,7 +140,7 @@ def procesar_archivo(filepath):
     print("-" * 70)
 
 
-def main():
+def main(trace="full", recovery=False, bloques=False):
     
     base_dir = os.path.dirname(os.path.abspath(__file__))
     
@@ -102,11 +171,19 @@ def main():
     print("\nIniciando análisis...\n" + "=" * 70)
 
     for archivo in archivos:
-        procesar_archivo(archivo)
+        procesar_archivo(archivo, trace=trace, recovery=recovery, bloques=bloques)
 
     print("Análisis completado.\n")
 
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser(description="Analiza los ficheros de pruebas/")
+    ap.add_argument("--traza", choices=TRACE_MODES, default="full",
+                    help="reglas en resultado_parse_*: todas, recuento por regla o ninguna")
+    ap.add_argument("--recuperacion", action="store_true",
+                    help="recuperación de errores sintácticos por conjuntos FOLLOW")
+    ap.add_argument("--bloques", action="store_true",
+                    help="cada bloque { } abre su propio ámbito de declaraciones")
+    args = ap.parse_args()
+    main(args.traza, args.recuperacion, args.bloques)
 
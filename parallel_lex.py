@@ -0,0 +1,70 @@
+import itertools
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from an_lexico import Lexer
+from token_buffer import TokenBuffer
+from Tabla_Simbolos.symbol_table import SymbolTable
+
+
+def split_lines(source, trozos):
+    """Parte la fuente en como mucho `trozos` textos que acaban en salto de línea."""
+    cortes = [0]
+    objetivo = max(1, len(source) // max(1, trozos))
+    while len(cortes) < trozos:
+        corte = source.find("\n", cortes[-1] + objetivo)
+        if corte < 0 or corte + 1 >= len(source):
+            break
+        cortes.append(corte + 1)
+    cortes.append(len(source))
+    return cortes
+
+
+def _lexear_trozo(texto, engine, base):
+    # En el proceso hijo: tokens del trozo sin registrar (tabla desechable).
+    # Con recuperación cada error deja su token ERROR, en el mismo orden.
+    # Las posiciones se devuelven ya en la fuente completa, para que el
+    # recorrido final las copie sin tocarlas.
+    tokens, errores = Lexer(texto, SymbolTable(), engine=engine,
+                            binding="single-pass", recovery=True).tokenize_buffer()
+    eof = tokens.starts[-1]
+    if base:
+        starts = array("I", [s + base for s in tokens.starts[:-1]])
+        ends = array("I", [e + base for e in tokens.ends[:-1]])
+    else:
+        starts, ends = tokens.starts[:-1], tokens.ends[:-1]
+    return tokens.kinds[:-1], starts, ends, [e.message for e in errores], base + eof
+
+
+def tokenize_parallel(source, symbols, procesos=None, trozos=None, buffer=False, **opciones):
+    """Lexea `source` por trozos de líneas completas en varios procesos.
+
+    Ningún lexema cruza un salto de línea, así que los trozos se lexean por
+    separado; el registro en la tabla de símbolos (ámbitos de función,
+    declaraciones) se hace después en un único recorrido en orden, con lo que
+    índices de símbolo, atributos y errores son los de Lexer.tokenize.
+    `opciones` son las del Lexer (engine, binding, recovery, max_errors).
+    Con buffer=True ese recorrido copia las columnas de los trozos y sólo
+    trata uno a uno los tokens que tocan la tabla, así que es bastante más
+    corto que con una lista de Token.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    cortes = split_lines(source, trozos or procesos)
+    textos = [source[a:b] for a, b in zip(cortes, cortes[1:])]
+    # El recorrido final no escanea: el motor sólo se usa en los trozos
+    engine = opciones.pop("engine", "char")
+
+    if len(textos) <= 1:
+        resultados = [_lexear_trozo(t, engine, 0) for t in textos]
+    else:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(textos))) as pool:
+            resultados = list(pool.map(_lexear_trozo, textos, itertools.repeat(engine), cortes))
+
+    lexer = Lexer(source, symbols, **opciones)
+    if buffer:
+        lexer.tokens = TokenBuffer(source, lexer.line_index, lexer.pool)
+    # El EOF sólo cuenta en el último trozo
+    n = len(resultados)
+    return lexer.tokenize_chunks((kinds, starts, ends, mensajes, eof if i == n - 1 else None)
+                                 for i, (kinds, starts, ends, mensajes, eof) in enumerate(resultados))
@@ -0,0 +1,168 @@
+import os
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+from incremental_parse import (ParseSession, _GestorRegistrado, _analizar_unidad,
+                               _siguiente, _FIRST_E_CODIGOS)
+from lexeme_pool import LexemePool
+from line_index import LineIndex
+from token_buffer import TokenBuffer
+from token_types import TokenType
+
+_LBRACE = TokenType.LBRACE.value
+_RBRACE = TokenType.RBRACE.value
+_LET = TokenType.LET.value
+_FUNCTION = TokenType.FUNCTION.value
+_ID = TokenType.ID.value
+# Nombre de tipo de cada palabra de tipo (T, y void sólo en H)
+_TIPOS_T = {TokenType.INT.value: "int", TokenType.FLOAT.value: "float",
+            TokenType.BOOLEAN.value: "boolean", TokenType.STRING.value: "string"}
+_TIPOS_H = {**_TIPOS_T, TokenType.VOID.value: "void"}
+
+
+def scan_signatures(tokens):
+    """Pasada rápida por los tokens de un TokenBuffer, sin analizarlos.
+
+    Devuelve el índice del token `function` de cada función de nivel
+    superior y los globales que va a haber, en orden de fuente, como
+    (índice, método de GestorTablas, argumentos): los declarados con
+    `let T id` y `function H id` y los identificadores que se usan sin estar
+    declarados (como parámetro o `let` de la función en la que están, o
+    antes como global), que el parser declara implícitamente.
+    """
+    kinds = tokens.kinds
+    n = len(kinds)
+    funciones, declaraciones = [], []
+    globales = set()
+    locales = None
+    nivel = 0
+    for i in range(n):
+        k = kinds[i]
+        if k == _LBRACE:
+            nivel += 1
+        elif k == _RBRACE:
+            if nivel:
+                nivel -= 1
+                if nivel == 0:
+                    locales = None
+        elif k == _FUNCTION and nivel == 0:
+            funciones.append(i)
+            locales = set()
+        elif k == _ID:
+            lexema = tokens.lexeme(i)
+            anterior = kinds[i - 1] if i else None
+            if locales is not None and anterior in _TIPOS_T and kinds[i - 2] != _FUNCTION:
+                # Parámetro o `let` de la función
+                locales.add(lexema)
+                continue
+            if lexema in globales or (locales is not None and lexema in locales):
+                continue
+            if i >= 2 and kinds[i - 2] == _FUNCTION and anterior in _TIPOS_H:
+                declaracion = ("registrar_funcion", (lexema, _TIPOS_H[anterior]))
+            elif i >= 2 and kinds[i - 2] == _LET and anterior in _TIPOS_T:
+                declaracion = ("registrar_variable_global", (lexema, _TIPOS_T[anterior]))
+            else:
+                declaracion = ("resolver_o_declarar", (lexema,))
+            globales.add(lexema)
+            declaraciones.append((i,) + declaracion)
+    return funciones, declaraciones
+
+
+def split_functions(funciones, n, trozos):
+    """Cortes de como mucho `trozos` tramos de tokens de tamaño parecido que
+    empiezan en una función; el último acaba en el EOF (token n - 1)."""
+    cortes = [0]
+    objetivo = max(1, n // max(1, trozos))
+    for f in funciones:
+        if len(cortes) >= trozos:
+            break
+        if f - cortes[-1] >= objetivo:
+            cortes.append(f)
+    cortes.append(n - 1)
+    return cortes
+
+
+def _analizar_trozo(lexemas, kinds, starts, ends, symbols, lineas, declaraciones, ultimo):
+    # En el proceso hijo: sentencias de nivel superior del trozo con las
+    # tablas que predice la pasada de firmas. El último token es el primero
+    # del trozo siguiente (o el EOF); una sentencia que lo consume se deja
+    # para el proceso padre. Los desplazamientos y las líneas empiezan en la
+    # primera línea del trozo, y cada token trae su lexema.
+    pool = LexemePool()
+    pool.lexemes = lexemas
+    pool.values = [None] * len(lexemas)
+    tokens = TokenBuffer("", LineIndex(starts=lineas), pool)
+    tokens.kinds, tokens.starts, tokens.ends, tokens.symbols = kinds, starts, ends, symbols
+    tokens.lexeme_ids = array("i", range(len(lexemas)))
+    ts = _GestorRegistrado()
+    for metodo, args in declaraciones:
+        getattr(ts, metodo)(*args)
+
+    n = len(tokens)
+    hasta = n if ultimo else n - 1
+    unidades = []
+    i = _siguiente(tokens, 0)
+    while i < hasta and kinds[i] in _FIRST_E_CODIGOS:
+        unidad = _analizar_unidad(tokens, i, ts)
+        if unidad.b > hasta:
+            break
+        # Las entradas de este proceso no le sirven al padre
+        unidad.claves = {}
+        unidades.append(unidad)
+        i = unidad.b
+    return unidades
+
+
+def parse_parallel(tokens, procesos=None, trozos=None):
+    """Análisis sintáctico y semántico de un TokenBuffer en varios procesos.
+
+    Una pasada de firmas por el nivel superior da las declaraciones globales
+    y dónde empieza cada función; los tramos entre funciones se analizan a
+    la vez, cada uno con las tablas que predicen las declaraciones
+    anteriores. Después, en orden de fuente, cada sentencia se acepta si los
+    símbolos que consultó tienen en las tablas reales la categoría y el tipo
+    con que los vio (y se repiten sus registros) o se vuelve a analizar aquí
+    (ParseSession). Reglas, errores y tablas son los de Parser sin
+    recuperación y sin árbol; devuelve la ParseSession, cuyo `informe` dice
+    qué sentencias hubo que reanalizar y por qué.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    n = len(tokens)
+    funciones, declaraciones = scan_signatures(tokens)
+    cortes = split_functions(funciones, n, trozos or procesos)
+    if len(cortes) <= 2:
+        return ParseSession(tokens)
+
+    starts, ends, lineas = tokens.starts, tokens.ends, tokens.line_index.starts
+    posiciones = [d[0] for d in declaraciones]
+    trozos_args = []
+    for t0, t1 in zip(cortes, cortes[1:]):
+        # Desde el inicio de la línea de t0, para que las columnas no cambien
+        l0, l1 = tokens.line(t0), tokens.line(t1)
+        base = lineas[l0 - 1]
+        trozos_args.append((
+            [tokens.lexeme(j) for j in range(t0, t1 + 1)],
+            tokens.kinds[t0:t1 + 1],
+            array("I", (s - base for s in starts[t0:t1 + 1])),
+            array("I", (e - base for e in ends[t0:t1 + 1])),
+            tokens.symbols[t0:t1 + 1],
+            array("I", (s - base for s in lineas[l0 - 1:l1])),
+            [d[1:] for d in declaraciones[:bisect_left(posiciones, t0)]],
+            t1 == n - 1,
+        ))
+
+    with ProcessPoolExecutor(max_workers=min(procesos, len(trozos_args))) as pool:
+        resultados = list(pool.map(_analizar_trozo, *zip(*trozos_args)))
+
+    unidades = []
+    for t0, lista in zip(cortes, resultados):
+        dlineas = tokens.line(t0) - 1
+        delta = lineas[dlineas]
+        for u in lista:
+            u.a += t0
+            u.b += t0
+            u.dlineas = dlineas
+            u.delta = delta
+        unidades += lista
+    return ParseSession(tokens, unidades=unidades)
@@ -0,0 +1,64 @@
+from array import array
+from collections import deque
+
+# Modos de traza de reglas del parser:
+#  - "full": todas las reglas en orden, un byte por regla (array('B')).
+#  - "counts": sólo cuántas veces se aplica cada regla.
+#  - "off": no se guarda nada (sólo interesan los errores).
+TRACE_MODES = ("full", "counts", "off")
+
+# Las reglas van de 1 a 59: caben en un byte
+N_REGLAS = 59
+
+# Texto de cada número de regla, para no convertirlo en cada escritura
+_TEXTO = [str(n) for n in range(256)]
+
+# Reglas por escritura al volcar la traza
+TROZO_TRAZA = 1 << 16
+
+
+class RuleCounts:
+    """Traza reducida a un contador por regla; se rellena con append()."""
+
+    __slots__ = ("counts",)
+
+    def __init__(self, n_reglas=N_REGLAS):
+        self.counts = array("I", [0]) * (n_reglas + 1)
+
+    def append(self, regla):
+        self.counts[regla] += 1
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def items(self):
+        # (regla, veces) de las reglas usadas, en orden de regla
+        return [(regla, n) for regla, n in enumerate(self.counts) if n]
+
+
+def new_trace(mode="full"):
+    """Contenedor de la traza según el modo: todos admiten append(regla)."""
+    if mode == "full":
+        return array("B")
+    if mode == "counts":
+        return RuleCounts()
+    if mode == "off":
+        # Un deque de longitud máxima 0 descarta lo que se le añade
+        return deque(maxlen=0)
+    raise ValueError(f"Modo de traza desconocido: '{mode}'")
+
+
+def write_trace(f, rules, cabecera="Descendente", trozo=TROZO_TRAZA):
+    """Escribe `cabecera r1 r2 ...` por trozos, sin montar la línea entera."""
+    f.write(cabecera + " ")
+    texto = _TEXTO.__getitem__
+    for i in range(0, len(rules), trozo):
+        if i:
+            f.write(" ")
+        f.write(" ".join(map(texto, rules[i:i + trozo])))
+
+
+def write_counts(f, counts):
+    # Una línea "regla veces" por cada regla usada
+    for regla, n in counts.items():
+        f.write(f"{regla} {n}\n")
@@ -0,0 +1,97 @@
+# Generado por gramatica.py a partir de gramatica.ll1: no editar.
+# Se regenera con: python gramatica.py
+
+HUELLA = '02e76c0bdae00d3a98079956bb9ca2268fefd9abd05df64a69f0051a8e3a6a98'
+INICIAL = 'P'
+
+PRODUCCIONES = {
+    1: ('P', ('L', 'EOF')),
+    2: ('L', ('E', 'L')),
+    3: ('L', ()),
+    4: ('E', ('F',)),
+    5: ('E', ('V',)),
+    6: ('E', ('S',)),
+    7: ('T', ('INT', '@tipo')),
+    8: ('T', ('FLOAT', '@tipo')),
+    9: ('T', ('BOOLEAN', '@tipo')),
+    10: ('T', ('STRING', '@tipo')),
+    11: ('V', ('LET', 'T', '@declarar_variable', 'ID', 'V1')),
+    12: ('V1', ('SEMICOLON', '@descartar')),
+    13: ('V1', ('ASSIGN', 'X', '@inicializar', 'SEMICOLON')),
+    14: ('F', ('FUNCTION', 'H', '@declarar_funcion', 'ID', 'LPAREN', 'A', 'RPAREN', 'B', '@cerrar_funcion')),
+    15: ('H', ('T',)),
+    16: ('H', ('VOID', '@tipo')),
+    17: ('A', ('T', '@declarar_parametro', 'ID', 'A1')),
+    18: ('A', ('VOID',)),
+    19: ('A', ()),
+    20: ('A1', ('COMMA', 'T', '@otro_parametro', 'ID', 'A1')),
+    21: ('A1', ()),
+    22: ('B', ('LBRACE', 'LS', 'RBRACE')),
+    23: ('LS', ('S', 'LS')),
+    24: ('LS', ('V', 'LS')),
+    25: ('LS', ()),
+    26: ('S', ('IF', 'LPAREN', 'X', '@condicion_if', 'RPAREN', 'SS')),
+    27: ('S', ('SS',)),
+    28: ('SS', ('DO', '@abrir_bloque', 'B', '@cerrar_bloque', 'WHILE', 'LPAREN', 'X', '@condicion_while', 'RPAREN', 'SEMICOLON')),
+    29: ('SS', ('READ', '@leer', 'ID', 'SEMICOLON')),
+    30: ('SS', ('WRITE', 'X', '@descartar', 'SEMICOLON')),
+    31: ('SS', ('RETURN', 'R1', '@retorno', 'SEMICOLON')),
+    32: ('R1', ('X',)),
+    33: ('R1', ('@void',)),
+    34: ('SS', ('@abrir_bloque', 'B', '@cerrar_bloque')),
+    35: ('SS', ('@simbolo', 'ID', 'SE1')),
+    36: ('SE1', ('ASSIGN', 'X', '@asignar', 'SEMICOLON')),
+    37: ('SE1', ('OR_ASSIGN', 'X', '@or_asignar', 'SEMICOLON')),
+    38: ('SE1', ('@llamar', 'LPAREN', 'G', 'RPAREN', 'SEMICOLON')),
+    39: ('G', ('X', '@descartar', 'G1')),
+    40: ('G', ()),
+    41: ('G1', ('COMMA', 'X', '@descartar', 'G1')),
+    42: ('G1', ()),
+    43: ('X', ('D', '@duplicar', 'R', '@descartar')),
+    44: ('R', ('LT', 'D', '@comparar', 'R')),
+    45: ('R', ()),
+    46: ('D', ('M', 'D1')),
+    47: ('D1', ('PLUS', 'M', '@sumar', 'D1')),
+    48: ('D1', ()),
+    49: ('M', ('NOT', 'M', '@negar')),
+    50: ('M', ('K',)),
+    51: ('K', ('LPAREN', 'X', 'RPAREN')),
+    52: ('K', ('INT_CONST', '@tipo')),
+    53: ('K', ('FLOAT_CONST', '@tipo')),
+    54: ('K', ('STRING_CONST', '@tipo')),
+    55: ('K', ('TRUE', '@tipo')),
+    56: ('K', ('FALSE', '@tipo')),
+    57: ('K', ('@identificador', 'ID', 'K1')),
+    58: ('K1', ('LPAREN', 'G', 'RPAREN')),
+    59: ('K1', ()),
+}
+
+PREDICCION = {
+    'P': {'DO': 1, 'EOF': 1, 'FUNCTION': 1, 'ID': 1, 'IF': 1, 'LBRACE': 1, 'LET': 1, 'READ': 1, 'RETURN': 1, 'WRITE': 1},
+    'L': {'DO': 2, 'EOF': 3, 'FUNCTION': 2, 'ID': 2, 'IF': 2, 'LBRACE': 2, 'LET': 2, 'READ': 2, 'RETURN': 2, 'WRITE': 2},
+    'E': {'DO': 6, 'FUNCTION': 4, 'ID': 6, 'IF': 6, 'LBRACE': 6, 'LET': 5, 'READ': 6, 'RETURN': 6, 'WRITE': 6},
+    'T': {'BOOLEAN': 9, 'FLOAT': 8, 'INT': 7, 'STRING': 10},
+    'V': {'LET': 11},
+    'V1': {'ASSIGN': 13, 'SEMICOLON': 12},
+    'F': {'FUNCTION': 14},
+    'H': {'BOOLEAN': 15, 'FLOAT': 15, 'INT': 15, 'STRING': 15, 'VOID': 16},
+    'A': {'BOOLEAN': 17, 'FLOAT': 17, 'INT': 17, 'RPAREN': 19, 'STRING': 17, 'VOID': 18},
+    'A1': {'COMMA': 20, 'RPAREN': 21},
+    'B': {'LBRACE': 22},
+    'LS': {'DO': 23, 'ID': 23, 'IF': 23, 'LBRACE': 23, 'LET': 24, 'RBRACE': 25, 'READ': 23, 'RETURN': 23, 'WRITE': 23},
+    'S': {'DO': 27, 'ID': 27, 'IF': 26, 'LBRACE': 27, 'READ': 27, 'RETURN': 27, 'WRITE': 27},
+    'SS': {'DO': 28, 'ID': 35, 'LBRACE': 34, 'READ': 29, 'RETURN': 31, 'WRITE': 30},
+    'R1': {'FALSE': 32, 'FLOAT_CONST': 32, 'ID': 32, 'INT_CONST': 32, 'LPAREN': 32, 'NOT': 32, 'SEMICOLON': 33, 'STRING_CONST': 32, 'TRUE': 32},
+    'SE1': {'ASSIGN': 36, 'LPAREN': 38, 'OR_ASSIGN': 37},
+    'G': {'FALSE': 39, 'FLOAT_CONST': 39, 'ID': 39, 'INT_CONST': 39, 'LPAREN': 39, 'NOT': 39, 'RPAREN': 40, 'STRING_CONST': 39, 'TRUE': 39},
+    'G1': {'COMMA': 41, 'RPAREN': 42},
+    'X': {'FALSE': 43, 'FLOAT_CONST': 43, 'ID': 43, 'INT_CONST': 43, 'LPAREN': 43, 'NOT': 43, 'STRING_CONST': 43, 'TRUE': 43},
+    'R': {'COMMA': 45, 'LT': 44, 'RPAREN': 45, 'SEMICOLON': 45},
+    'D': {'FALSE': 46, 'FLOAT_CONST': 46, 'ID': 46, 'INT_CONST': 46, 'LPAREN': 46, 'NOT': 46, 'STRING_CONST': 46, 'TRUE': 46},
+    'D1': {'COMMA': 48, 'LT': 48, 'PLUS': 47, 'RPAREN': 48, 'SEMICOLON': 48},
+    'M': {'FALSE': 50, 'FLOAT_CONST': 50, 'ID': 50, 'INT_CONST': 50, 'LPAREN': 50, 'NOT': 49, 'STRING_CONST': 50, 'TRUE': 50},
+    'K': {'FALSE': 56, 'FLOAT_CONST': 53, 'ID': 57, 'INT_CONST': 52, 'LPAREN': 51, 'STRING_CONST': 54, 'TRUE': 55},
+    'K1': {'COMMA': 59, 'LPAREN': 58, 'LT': 59, 'PLUS': 59, 'RPAREN': 59, 'SEMICOLON': 59},
+}
+
+DEFECTO = {'P': 1, 'L': 3, 'E': 6, 'V': 11, 'F': 14, 'H': 15, 'A': 19, 'A1': 21, 'B': 22, 'LS': 25, 'S': 27, 'R1': 33, 'G': 40, 'G1': 42, 'X': 43, 'R': 45, 'D': 46, 'D1': 48, 'M': 50, 'K1': 59}
@@ -0,0 +1,9 @@
+import benchmark
+
+
+def test_lectura_con_mmap(tmp_path, capsys):
+    # Los lexemas del TokenBuffer se leen de la proyección: no debe cerrarse
+    # antes de sacar las líneas de tokens
+    benchmark.bench_lectura(benchmark.generar_fuente(20), repeticiones=1,
+                            ruta=str(tmp_path / "fuente.myjs"))
+    assert "mmap" in capsys.readouterr().out
@@ -0,0 +1,98 @@
+import glob
+import os
+
+import pytest
+
+from an_lexico import Lexer, ENGINES, BINDINGS, np
+from incremental import relex
+from parallel_lex import tokenize_parallel
+from token_file import write_token_file, TokenFile
+from Tabla_Simbolos.symbol_table import SymbolTable
+
+PRUEBAS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                        "pruebas", "*.myjs")))
+
+
+def _leer(ruta):
+    with open(ruta, "rb") as f:
+        return f.read()
+
+
+def _lexear(fuente, engine, binding):
+    # Tokens, errores y tabla del léxico tal como los escribe main.py
+    symbols = SymbolTable()
+    tokens, errores = Lexer(fuente, symbols, engine=engine, binding=binding,
+                            recovery=True).tokenize()
+    return [str(t) for t in tokens], [str(e) for e in errores], symbols.dump()
+
+
+def test_hay_pruebas():
+    assert PRUEBAS
+
+
+# Cada motor, con la fuente como str y como bytes, da lo mismo que el
+# motor "char" (el de referencia)
+@pytest.mark.parametrize("binding", BINDINGS)
+@pytest.mark.parametrize("engine", [e for e in ENGINES if e != "char"])
+@pytest.mark.parametrize("ruta", PRUEBAS, ids=os.path.basename)
+def test_motor_igual_que_char(ruta, engine, binding):
+    if engine == "numpy" and np is None:
+        pytest.skip("numpy no está instalado")
+    datos = _leer(ruta)
+    texto = datos.decode("utf-8")
+    referencia = _lexear(texto, "char", binding)
+    assert _lexear(texto, engine, binding) == referencia
+    assert _lexear(datos, engine, binding) == referencia
+
+
+@pytest.mark.parametrize("ruta", PRUEBAS, ids=os.path.basename)
+def test_buffer_igual_que_lista(ruta):
+    datos = _leer(ruta)
+    tokens, errores = Lexer(datos.decode("utf-8"), SymbolTable(), recovery=True).tokenize()
+    buffer, errores_buffer = Lexer(datos, SymbolTable(), engine="bytes",
+                                   recovery=True).tokenize_buffer()
+    assert list(buffer.iter_str()) == [str(t) for t in tokens]
+    assert [str(e) for e in errores_buffer] == [str(e) for e in errores]
+
+
+def _fuente(nombre):
+    return _leer(os.path.join(os.path.dirname(PRUEBAS[0]), nombre)).decode("utf-8")
+
+
+@pytest.mark.parametrize("buffer", [False, True])
+def test_paralelo_igual_que_serie(buffer):
+    fuente = _fuente("gen30.myjs") + _fuente("quirks1.myjs") + _fuente("err_char.myjs")
+    symbols = SymbolTable()
+    tokens, errores = Lexer(fuente, symbols, binding="single-pass", recovery=True).tokenize()
+    symbols_paralelo = SymbolTable()
+    paralelo, errores_paralelo = tokenize_parallel(fuente, symbols_paralelo, procesos=2, trozos=4,
+                                                   buffer=buffer, binding="single-pass",
+                                                   recovery=True)
+    lineas = list(paralelo.iter_str()) if buffer else [str(t) for t in paralelo]
+    assert lineas == [str(t) for t in tokens]
+    assert [str(e) for e in errores_paralelo] == [str(e) for e in errores]
+    assert symbols_paralelo.dump() == symbols.dump()
+
+
+def test_fichero_de_tokens(tmp_path):
+    fuente = _fuente("gen30.myjs")
+    tokens, _ = Lexer(fuente, SymbolTable()).tokenize_buffer()
+    ruta = str(tmp_path / "tokens.bin")
+    write_token_file(ruta, tokens)
+    with TokenFile(ruta) as tf:
+        assert tf.matches(fuente)
+        assert list(tf.iter_str()) == list(tokens.iter_str())
+
+
+def test_relex_igual_que_lexear_de_nuevo():
+    # Cada edición sólo relexea sus líneas; tokens y errores son los de
+    # lexear la fuente editada entera (los índices de símbolo no se comparan)
+    fuente = _fuente("gen5.myjs")
+    tokens, errores = Lexer(fuente, SymbolTable(), recovery=True).tokenize_buffer()
+    for pos, quitar, poner in ((0, 0, "x"), (40, 3, ""), (200, 1, "'"), (100, 0, "\n1 |")):
+        tokens, errores, _ = relex(tokens, pos, quitar, poner, errores)
+        fuente = fuente[:pos] + poner + fuente[pos + quitar:]
+        nuevos, errores_nuevos = Lexer(fuente, SymbolTable(), recovery=True).tokenize_buffer()
+        assert [(t.type, t.lexeme, t.offset) for t in tokens] == \
+               [(t.type, t.lexeme, t.offset) for t in nuevos]
+        assert [str(e) for e in errores] == [str(e) for e in errores_nuevos]
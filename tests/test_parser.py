@@ -0,0 +1,86 @@
+import glob
+import os
+
+import pytest
+
+from an_lexico import Lexer
+from an_sintactico_semtant import Parser
+from an_sintactico_ll1 import ParserLL1
+from ast_arena import AstArena
+from incremental_parse import ParseSession
+from parallel_parse import parse_parallel
+from Tabla_Simbolos.symbol_table import SymbolTable
+
+PRUEBAS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                        "pruebas", "*.myjs")))
+
+
+def _tokens(ruta):
+    # Tokens de las pruebas sin errores léxicos (las demás no llegan al parser)
+    with open(ruta, encoding="utf-8") as f:
+        tokens, errores = Lexer(f.read(), SymbolTable(), recovery=True).tokenize_buffer()
+    if errores:
+        pytest.skip("con errores léxicos")
+    return tokens
+
+
+def _analisis(parser):
+    reglas, errores = parser.parse()
+    return list(reglas), [str(e) for e in errores], parser.ts.dump()
+
+
+def _arbol(clase, fuente, **opciones):
+    tokens, _ = Lexer(fuente, SymbolTable()).tokenize()
+    parser = clase(tokens, ast=True, **opciones)
+    _, errores = parser.parse()
+    return parser.ast.volcar(), [str(e) for e in errores]
+
+
+def test_arena_vacia():
+    arena = AstArena()
+    assert arena.raiz is None
+    assert arena.volcar() == ""
+    assert list(arena.preorden()) == []
+
+
+# max_errors corta el análisis antes de cerrar P: lo construido queda bajo
+# PROGRAMA y los dos analizadores dan el mismo árbol
+@pytest.mark.parametrize("fuente, esperado", [
+    ("let int a = ;\nlet int b = ;", "PROGRAMA @0"),
+    ("let int a; x = 1 + ;", "PROGRAMA @0\n  DECLARACION int 'a' @0\n  ENTERO int 1 @15"),
+])
+def test_limite_de_errores_deja_programa(fuente, esperado):
+    arbol, errores = _arbol(Parser, fuente, recovery=True, max_errors=1)
+    assert arbol == esperado
+    assert len(errores) == 1
+    assert _arbol(ParserLL1, fuente, recovery=True, max_errors=1) == (arbol, errores)
+
+
+def test_limite_de_errores_en_negacion():
+    # El error de '!' se anota antes de crear su nodo en los dos analizadores
+    fuente = "write !1; write 2;"
+    assert _arbol(Parser, fuente, max_errors=1) == _arbol(ParserLL1, fuente, max_errors=1)
+
+
+def test_ll1_mismos_argumentos_que_parser():
+    tokens, _ = Lexer("let int a; a = 1;", SymbolTable()).tokenize()
+    recursivo, ll1 = Parser(tokens, "off"), ParserLL1(tokens, "off")
+    assert ll1.parse() == recursivo.parse()
+    assert ll1.ts.dump() == recursivo.ts.dump()
+
+
+@pytest.mark.parametrize("opciones", [{}, {"recovery": True}, {"bloques": True}])
+@pytest.mark.parametrize("ruta", PRUEBAS, ids=os.path.basename)
+def test_ll1_igual_que_recursivo(ruta, opciones):
+    tokens = _tokens(ruta)
+    assert _analisis(ParserLL1(tokens, **opciones)) == _analisis(Parser(tokens, **opciones))
+
+
+@pytest.mark.parametrize("ruta", PRUEBAS, ids=os.path.basename)
+def test_sesion_y_paralelo_igual_que_parser(ruta):
+    tokens = _tokens(ruta)
+    reglas, errores, tablas = _analisis(Parser(tokens))
+    for sesion in (ParseSession(tokens), parse_parallel(tokens, procesos=2, trozos=3)):
+        assert list(sesion.rules) == reglas
+        assert [str(e) for e in sesion.errors] == errores
+        assert sesion.ts.dump() == tablas
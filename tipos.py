@@ -0,0 +1,40 @@
+# Tipos del análisis semántico como códigos enteros. El 0 es "sin tipo"
+# (p.ej. R sin ningún '<'), así que un código se evalúa como booleano
+# igual que la cadena o el None de antes.
+TIPOS = (None, "int", "float", "boolean", "string", "void", "error")
+(NINGUNO, INT, FLOAT, BOOLEAN, STRING, VOID, ERROR) = range(len(TIPOS))
+N_TIPOS = len(TIPOS)
+
+# Código de cada nombre de tipo (los de las entradas de las tablas de símbolos)
+CODIGO = {t: c for c, t in enumerate(TIPOS)}
+
+
+def _tabla(f):
+    # [izquierdo][derecho] para todos los pares de códigos
+    return tuple(tuple(f(a, b) for b in range(N_TIPOS)) for a in range(N_TIPOS))
+
+
+def _iguales_o_sin_tipo(a, b):
+    return not (a and b and a != b)
+
+
+# --- Compatibilidad: True si la operación no da error semántico ---
+# '+' y '<': operandos del mismo tipo (o alguno sin tipo)
+COMPATIBLES_SUMA = _tabla(_iguales_o_sin_tipo)
+COMPATIBLES_MENOR = _tabla(_iguales_o_sin_tipo)
+# 'let T x = X': [tipo declarado][tipo de la expresión]
+COMPATIBLES_INICIALIZACION = _tabla(_iguales_o_sin_tipo)
+# 'id = X': [tipo de la variable][tipo de la expresión]; con un 'error' por
+# medio ya se informó antes. '|=' no comprueba tipos, sólo la categoría.
+COMPATIBLES_ASIGNACION = _tabla(lambda a, b: _iguales_o_sin_tipo(a, b) or ERROR in (a, b))
+# 'return R1': [tipo de la función][tipo retornado]; fuera de una función no hay tipo
+COMPATIBLES_RETORNO = _tabla(lambda a, b: not a or a == b)
+# '!' y las condiciones de 'if' y 'do ... while'
+NEGABLE = tuple(t == BOOLEAN for t in range(N_TIPOS))
+CONDICION_VALIDA = tuple(t == BOOLEAN for t in range(N_TIPOS))
+
+# --- Tipo resultado ---
+# Todos los sumandos se comparan con el primero, que da el tipo de la suma
+RESULTADO_SUMA = _tabla(lambda a, b: a)
+RESULTADO_MENOR = _tabla(lambda a, b: BOOLEAN)
+RESULTADO_NOT = tuple(BOOLEAN for _ in range(N_TIPOS))
@@ -0,0 +1,135 @@
+from array import array
+
+from line_index import LineIndex
+from lexeme_pool import LexemePool
+from token_types import TokenType
+from tokens import token_str
+
+# TokenType por su valor numérico (la columna kinds guarda .value)
+TIPOS_POR_CODIGO = {t.value: t for t in TokenType}
+
+
+class TokenBuffer:
+    """Tokens de una fuente completa guardados en columnas paralelas."""
+
+    def __init__(self, source, line_index=None, pool=None):
+        self.source = source
+        self.kinds = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        # Índice en la tabla de símbolos (-1 si el token no tiene atributo)
+        self.symbols = array("i")
+        # Posición del lexema en el pool (-1 en palabras clave y operadores)
+        self.lexeme_ids = array("i")
+        # Línea y columna no se guardan: salen de starts con este índice
+        self.line_index = line_index if line_index is not None else LineIndex(source)
+        self.pool = pool if pool is not None else LexemePool()
+
+    # --- construcción (la usa el Lexer como si fuera una lista) ---
+    def append(self, token):
+        start = token.offset
+        self.kinds.append(token.type.value)
+        self.starts.append(start)
+        self.ends.append(start + len(token.lexeme))
+        self.symbols.append(int(token.attribute) if token.attribute else -1)
+        self.lexeme_ids.append(token.lexeme_id)
+
+    def clear(self):
+        for columna in (self.kinds, self.starts, self.ends, self.symbols, self.lexeme_ids):
+            del columna[:]
+
+    # --- acceso por columnas ---
+    def __len__(self):
+        return len(self.kinds)
+
+    def type(self, i):
+        return TIPOS_POR_CODIGO[self.kinds[i]]
+
+    def lexeme(self, i):
+        idx = self.lexeme_ids[i]
+        if idx >= 0:
+            return self.pool.lexemes[idx]
+        return self.source[self.starts[i]:self.ends[i]]
+
+    def value(self, i):
+        idx = self.lexeme_ids[i]
+        return self.pool.values[idx] if idx >= 0 else None
+
+    def attribute(self, i):
+        idx = self.symbols[i]
+        return str(idx) if idx >= 0 else ""
+
+    def line(self, i):
+        return self.line_index.line(self.starts[i])
+
+    def column(self, i):
+        return self.line_index.column(self.starts[i])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.kinds)
+        if not 0 <= i < len(self.kinds):
+            raise IndexError("índice de token fuera de rango")
+        return TokenView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.kinds)):
+            yield TokenView(self, i)
+
+    # --- salida ---
+    def iter_str(self):
+        """Líneas de resultado_tokens_* sin crear objetos por token."""
+        source = self.source
+        tipos = TIPOS_POR_CODIGO
+        for kind, start, end, idx in zip(self.kinds, self.starts, self.ends, self.symbols):
+            yield token_str(tipos[kind], source[start:end], str(idx) if idx >= 0 else "")
+
+    def nbytes(self):
+        # Memoria de las columnas (sin contar la fuente, que se comparte)
+        return sum(c.itemsize * len(c) for c in
+                   (self.kinds, self.starts, self.ends, self.symbols, self.lexeme_ids, self.line_index.starts))
+
+
+class TokenView:
+    """Vista ligera de la posición i de un TokenBuffer, con la interfaz de Token."""
+
+    __slots__ = ("_buffer", "_i", "type")
+
+    def __init__(self, buffer, i):
+        self._buffer = buffer
+        self._i = i
+        self.type = TIPOS_POR_CODIGO[buffer.kinds[i]]
+
+    @property
+    def index(self):
+        return self._i
+
+    @property
+    def offset(self):
+        return self._buffer.starts[self._i]
+
+    @property
+    def line(self):
+        return self._buffer.line(self._i)
+
+    @property
+    def column(self):
+        return self._buffer.column(self._i)
+
+    @property
+    def lexeme(self):
+        return self._buffer.lexeme(self._i)
+
+    @property
+    def attribute(self):
+        return self._buffer.attribute(self._i)
+
+    @property
+    def value(self):
+        return self._buffer.value(self._i)
+
+    def __str__(self):
+        return token_str(self.type, self.lexeme, self.attribute)
+
+    def __repr__(self):
+        return f"TokenView(type={self.type}, lexeme={self.lexeme!r}, line={self.line}, column={self.column})"
@@ -0,0 +1,179 @@
+import hashlib
+import mmap
+import struct
+import sys
+from array import array
+
+from lexeme_pool import literal_value
+from token_buffer import TokenView, TIPOS_POR_CODIGO
+from tokens import token_str
+
+# Fichero binario de tokens (resultado de TokenBuffer), versión 1:
+#
+#   cabecera   MAGIC, versión, orden de bytes, nº tokens, nº lexemas,
+#              tamaño de la tabla de lexemas y sha256 de la fuente
+#   columnas   starts, lines, columns (u32), symbols (i32), lexema (u32)
+#              por token; desplazamientos (u32, nº lexemas + 1); kinds (u8)
+#   lexemas    UTF-8 de cada lexema distinto, uno tras otro
+#
+# Las columnas van en el orden de bytes de la máquina que escribe, alineadas
+# a 4 bytes, para poder leerlas con memoryview.cast sin copiarlas. kinds
+# guarda TokenType.value: si cambia token_types.py hay que subir VERSION.
+MAGIC = b"MYJSTOK\0"
+VERSION = 1
+_CABECERA = struct.Struct("<8sHHIII32s")
+_ORDEN = {"little": 1, "big": 2}
+
+
+def source_digest(source):
+    return hashlib.sha256(source.encode("utf-8")).digest()
+
+
+def write_token_file(path, tokens):
+    """Guarda un TokenBuffer en formato binario."""
+    ids = {}
+    lexeme_ids = array("I")
+    for start, end in zip(tokens.starts, tokens.ends):
+        lexeme = tokens.source[start:end]
+        idx = ids.get(lexeme)
+        if idx is None:
+            idx = ids[lexeme] = len(ids)
+        lexeme_ids.append(idx)
+
+    offsets = array("I", [0])
+    blob = bytearray()
+    for lexeme in ids:
+        blob += lexeme.encode("utf-8")
+        offsets.append(len(blob))
+
+    # Línea y columna se guardan ya resueltas: el lector no necesita la fuente
+    posiciones = [tokens.line_index.position(start) for start in tokens.starts]
+    lines = array("I", [p[0] for p in posiciones])
+    columns = array("I", [p[1] for p in posiciones])
+
+    with open(path, "wb") as f:
+        f.write(_CABECERA.pack(MAGIC, VERSION, _ORDEN[sys.byteorder], len(tokens),
+                               len(ids), len(blob), source_digest(tokens.source)))
+        for columna in (tokens.starts, lines, columns, tokens.symbols,
+                        lexeme_ids, offsets, tokens.kinds):
+            columna.tofile(f)
+        f.write(blob)
+
+
+class TokenFile:
+    """Lectura sin copias (mmap) de un fichero escrito por write_token_file.
+
+    Ofrece la misma interfaz de lectura que TokenBuffer, así que el Parser
+    puede recorrerlo directamente.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mv = memoryview(self._mmap)
+
+        if len(self._mv) < _CABECERA.size:
+            self.close()
+            raise ValueError(f"Fichero de tokens truncado: {path}")
+        magic, version, orden, n, n_lexemas, tam_lexemas, self.digest = _CABECERA.unpack_from(self._mv)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"No es un fichero de tokens: {path}")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Versión de fichero de tokens no soportada ({version}): {path}")
+        if orden != _ORDEN[sys.byteorder]:
+            self.close()
+            raise ValueError(f"Fichero de tokens escrito con otro orden de bytes: {path}")
+
+        pos = _CABECERA.size
+        if len(self._mv) < pos + 21 * n + 4 * (n_lexemas + 1) + tam_lexemas:
+            self.close()
+            raise ValueError(f"Fichero de tokens truncado: {path}")
+
+        def columna(cuantos, fmt, tam):
+            nonlocal pos
+            vista = self._mv[pos:pos + cuantos * tam].cast(fmt)
+            pos += cuantos * tam
+            return vista
+
+        self.starts = columna(n, "I", 4)
+        self.lines = columna(n, "I", 4)
+        self.columns = columna(n, "I", 4)
+        self.symbols = columna(n, "i", 4)
+        self.lexeme_ids = columna(n, "I", 4)
+        self._offsets = columna(n_lexemas + 1, "I", 4)
+        self.kinds = columna(n, "B", 1)
+        self._blob = self._mv[pos:pos + tam_lexemas]
+
+        # Lexemas ya decodificados y valores de literales, por identificador
+        self._lexemas = [None] * n_lexemas
+        self._valores = {}
+
+    def matches(self, source):
+        # ¿Se generó a partir de exactamente esta fuente?
+        return self.digest == source_digest(source)
+
+    # --- acceso por columnas (misma interfaz que TokenBuffer) ---
+    def __len__(self):
+        return len(self.kinds)
+
+    def type(self, i):
+        return TIPOS_POR_CODIGO[self.kinds[i]]
+
+    def lexeme(self, i):
+        idx = self.lexeme_ids[i]
+        lexeme = self._lexemas[idx]
+        if lexeme is None:
+            lexeme = self._lexemas[idx] = str(self._blob[self._offsets[idx]:self._offsets[idx + 1]], "utf-8")
+        return lexeme
+
+    def attribute(self, i):
+        idx = self.symbols[i]
+        return str(idx) if idx >= 0 else ""
+
+    def value(self, i):
+        # El fichero no guarda valores: se convierten una vez por lexema
+        idx = self.lexeme_ids[i]
+        if idx not in self._valores:
+            self._valores[idx] = literal_value(self.type(i), self.lexeme(i))
+        return self._valores[idx]
+
+    def line(self, i):
+        return self.lines[i]
+
+    def column(self, i):
+        return self.columns[i]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.kinds)
+        if not 0 <= i < len(self.kinds):
+            raise IndexError("índice de token fuera de rango")
+        return TokenView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.kinds)):
+            yield TokenView(self, i)
+
+    def iter_str(self):
+        """Líneas de resultado_tokens_* leídas directamente del fichero."""
+        for i in range(len(self.kinds)):
+            yield token_str(TIPOS_POR_CODIGO[self.kinds[i]], self.lexeme(i), self.attribute(i))
+
+    # --- cierre ---
+    def close(self):
+        for nombre in ("starts", "lines", "columns", "symbols", "lexeme_ids", "_offsets", "kinds", "_blob"):
+            vista = self.__dict__.pop(nombre, None)
+            if vista is not None:
+                vista.release()
+        if self._mv is not None:
+            self._mv.release()
+            self._mv = None
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,26 @@
+from collections import deque
+
+from token_types import TokenType
+
+
+class TokenStream:
+    """Buffer de anticipación sobre cualquier iterable de tokens."""
+
+    def __init__(self, tokens):
+        # Los tokens ERROR del léxico en modo recuperación no llegan al parser
+        self._it = (t for t in tokens if t.type is not TokenType.ERROR)
+        self._buffer = deque()
+
+    def next(self):
+        if self._buffer:
+            return self._buffer.popleft()
+        return next(self._it, None)
+
+    def peek(self, k=0):
+        # Token k posiciones por delante del siguiente, sin consumirlo
+        while len(self._buffer) <= k:
+            token = next(self._it, None)
+            if token is None:
+                return None
+            self._buffer.append(token)
+        return self._buffer[k]
@@ -3,6 +3,7 @@ from enum import Enum, auto
 class TokenType(Enum):
     
     EOF = auto()
+    ERROR = auto()         # texto erróneo (sólo en modo recuperación)
 
     # Identificadores y literales
     ID = auto()
@@ -1,90 +1,123 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from token_types import TokenType
+from line_index import LineIndex
+from lexeme_pool import LexemePool
 
-@dataclass
+# Código de cada tipo de token en resultado_tokens_*
+CODES = {
+    # Especiales
+    TokenType.EOF:           "EOF",
+    TokenType.ERROR:         "ERROR",
+
+    # Identificadores y literales
+    TokenType.ID:            "ID",      # identificador
+    TokenType.INT_CONST:     "ENT",     # entero
+    TokenType.FLOAT_CONST:   "REAL",    # real
+    TokenType.STRING_CONST:  "CAD",     # cadena
+
+    # Palabras reservadas
+    TokenType.LET:       "LET",
+    TokenType.INT:       "INT",
+    TokenType.FLOAT:     "FLOAT",
+    TokenType.BOOLEAN:   "BOOLEAN",
+    TokenType.STRING:    "STRING",
+    TokenType.VOID:      "VOID",
+    TokenType.FUNCTION:  "FUNCTION",
+    TokenType.RETURN:    "RETURN",
+    TokenType.IF:        "IF",
+    TokenType.ELSE:      "ELSE",
+    TokenType.DO:        "DO",
+    TokenType.WHILE:     "WHILE",
+    TokenType.READ:      "READ",
+    TokenType.WRITE:     "WRITE",
+    TokenType.TRUE:      "TRUE",
+    TokenType.FALSE:     "FALSE",
+
+    # Operadores 
+    TokenType.PLUS:      "SUMA",      # +
+    TokenType.LT:        "MENOR",     # <
+    TokenType.NOT:       "DIST",      # !  
+    TokenType.ASSIGN:    "ASSIG",     # =
+    TokenType.OR_ASSIGN: "ORASSIG",  # |=  
+
+    # Delimitadores 
+    TokenType.LPAREN:    "LPAR",      # (
+    TokenType.RPAREN:    "RPAR",      # )
+    TokenType.LBRACE:    "LLAVEI",    # {  
+    TokenType.RBRACE:    "LLAVED",    # }   
+    TokenType.SEMICOLON: "PCOMA",     # ;
+    TokenType.COMMA:     "COMA",      # ,
+}
+
+
+def token_attr(t, lexeme, attribute=""):
+    """Atributo de un token tal y como aparece en resultado_tokens_*."""
+
+    if t == TokenType.ID:
+        return (attribute or lexeme)
+
+    if t in (TokenType.INT_CONST, TokenType.FLOAT_CONST):
+        return lexeme
+
+    if t == TokenType.ERROR:
+        return f"\"{lexeme}\""
+
+    if t == TokenType.STRING_CONST:
+       
+        raw = lexeme
+        if len(raw) >= 2 and raw[0] == "'" and raw[-1] == "'":
+            contenido = raw[1:-1]
+        else:
+            contenido = raw
+        
+        contenido = contenido.replace('"', '\\"')
+        return f"\"{contenido}\""
+
+    
+    return ""
+
+
+def token_str(t, lexeme, attribute=""):
+    # Compartido por Token y por las vistas de TokenBuffer
+    code = CODES.get(t, t.name)
+    attr = token_attr(t, lexeme, attribute)
+    return f"<{code}, {attr}>" if attr else f"<{code}, >"
+
+
+@dataclass(slots=True)
 class Token:
     type: TokenType
     lexeme: str
-    line: int
-    column: int
+    # Sólo se guarda el desplazamiento en la fuente; línea y columna se
+    # calculan al pedirlas (errores, volcados) con el índice de líneas.
+    offset: int
+    line_index: LineIndex = field(repr=False, compare=False)
     
     attribute: str = ""
+    # Identificadores y literales: posición en el LexemePool (-1 si no está)
+    lexeme_id: int = -1
+    pool: LexemePool = field(default=None, repr=False, compare=False)
+
+    @property
+    def value(self):
+        # Valor ya convertido del literal (None en el resto de tokens)
+        return self.pool.values[self.lexeme_id] if self.lexeme_id >= 0 else None
+
+    @property
+    def line(self) -> int:
+        return self.line_index.line(self.offset)
+
+    @property
+    def column(self) -> int:
+        return self.line_index.column(self.offset)
 
     def __str__(self) -> str:
-        
-        code = self._code()
-        attr = self._attr()
-        return f"<{code}, {attr}>" if attr else f"<{code}, >"
+        return token_str(self.type, self.lexeme, self.attribute)
 
     
     def _code(self) -> str:
-       
-        codes = {
-            # Especiales
-            TokenType.EOF:           "EOF",
-
-            # Identificadores y literales
-            TokenType.ID:            "ID",      # identificador
-            TokenType.INT_CONST:     "ENT",     # entero
-            TokenType.FLOAT_CONST:   "REAL",    # real
-            TokenType.STRING_CONST:  "CAD",     # cadena
-
-            # Palabras reservadas
-            TokenType.LET:       "LET",
-            TokenType.INT:       "INT",
-            TokenType.FLOAT:     "FLOAT",
-            TokenType.BOOLEAN:   "BOOLEAN",
-            TokenType.STRING:    "STRING",
-            TokenType.VOID:      "VOID",
-            TokenType.FUNCTION:  "FUNCTION",
-            TokenType.RETURN:    "RETURN",
-            TokenType.IF:        "IF",
-            TokenType.ELSE:      "ELSE",
-            TokenType.DO:        "DO",
-            TokenType.WHILE:     "WHILE",
-            TokenType.READ:      "READ",
-            TokenType.WRITE:     "WRITE",
-            TokenType.TRUE:      "TRUE",
-            TokenType.FALSE:     "FALSE",
-
-            # Operadores 
-            TokenType.PLUS:      "SUMA",      # +
-            TokenType.LT:        "MENOR",     # <
-            TokenType.NOT:       "DIST",      # !  
-            TokenType.ASSIGN:    "ASSIG",     # =
-            TokenType.OR_ASSIGN: "ORASSIG",  # |=  
-
-            # Delimitadores 
-            TokenType.LPAREN:    "LPAR",      # (
-            TokenType.RPAREN:    "RPAR",      # )
-            TokenType.LBRACE:    "LLAVEI",    # {  
-            TokenType.RBRACE:    "LLAVED",    # }   
-            TokenType.SEMICOLON: "PCOMA",     # ;
-            TokenType.COMMA:     "COMA",      # ,
-        }
-        return codes.get(self.type, self.type.name)
+        return CODES.get(self.type, self.type.name)
 
     
     def _attr(self) -> str:
-
-        t = self.type
-
-        if t == TokenType.ID:
-            return (self.attribute or self.lexeme)
-
-        if t in (TokenType.INT_CONST, TokenType.FLOAT_CONST):
-            return self.lexeme
-
-        if t == TokenType.STRING_CONST:
-           
-            raw = self.lexeme
-            if len(raw) >= 2 and raw[0] == "'" and raw[-1] == "'":
-                contenido = raw[1:-1]
-            else:
-                contenido = raw
-            
-            contenido = contenido.replace('"', '\\"')
-            return f"\"{contenido}\""
-
-        
-        return ""
+        return token_attr(self.type, self.lexeme, self.attribute)